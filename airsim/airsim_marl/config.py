@@ -46,3 +46,81 @@ class PPOConfig:
     vf_coef: float = 0.5
     ent_coef: float = 0.0
     max_grad_norm: float = 0.5
+    # MAPPO: centralized critic on the global state (with value normalization)
+    centralized_critic: bool = False
+    # GRU actor-critic trained on burn_in + seq_len windows (not combined with centralized_critic)
+    recurrent: bool = False
+    seq_len: int = 16
+    burn_in: int = 8
+    minibatch_seqs: int = 64
+    # rollout storage: observation dtype ("float32" / "float16"), bit-packed done flags,
+    # [start, stop) observation columns in [0, 1] stored as uint8 (image/depth features)
+    buffer_obs_dtype: str = "float32"
+    buffer_pack_flags: bool = False
+    buffer_uint8_obs: List[int] = field(default_factory=list)
+    checkpoint_path: str = "checkpoints/ppo_actor_critic.pt"
+    # warm start from a checkpoint (e.g. PretrainConfig.checkpoint_path); empty -> random init
+    init_checkpoint: str = ""
+    # persist every collected step to a trajectory dataset (data/trajectory.py); empty -> off.
+    # Ranks of the data-parallel learner write to record_dir/rank<r>.
+    record_dir: str = ""
+    record_chunk_steps: int = 512
+    # data-parallel learner (started via scripts/launch_ddp_ppo.py): rank r drives the
+    # simulator at rank_ports[r % len]; empty -> EnvConfig.port
+    dist_backend: str = "gloo"
+    rank_ports: List[int] = field(default_factory=list)
+
+@dataclass
+class ActorLearnerConfig:
+    seed: int = 42
+    num_workers: int = 2
+    # one simulator per worker: worker k uses worker_ports[k % len]; empty -> EnvConfig.port
+    worker_ports: List[int] = field(default_factory=list)
+    # steps per trajectory chunk sent by a worker
+    chunk_len: int = 64
+    # bounded chunk queue between workers and learner
+    queue_size: int = 8
+    # chunks concatenated (along the agent axis) per learner update
+    chunks_per_update: int = 2
+    total_updates: int = 1000
+    # publish learner weights to workers every N updates
+    publish_every: int = 1
+    gamma: float = 0.99
+    # serve worker actions from one dynamic-batching inference process
+    inference_server: bool = False
+    # rows (agents) per worker request slot
+    server_max_rows: int = 32
+    # run a forward pass once this many rows are pending ...
+    server_max_batch: int = 256
+    # ... or this long after the first pending request
+    server_max_wait_ms: float = 2.0
+    # torch intra-op threads of the server process (0: torch default)
+    server_threads: int = 0
+    # V-trace truncation levels for the importance weights
+    rho_bar: float = 1.0
+    c_bar: float = 1.0
+    lr: float = 3e-4
+    vf_coef: float = 0.5
+    ent_coef: float = 0.0
+    max_grad_norm: float = 0.5
+
+@dataclass
+class PretrainConfig:
+    seed: int = 42
+    # trajectory dataset written by data/trajectory.py (PPOConfig.record_dir or scripted demos)
+    data_dir: str = "data/trajectories"
+    # record this many episodes of the scripted goal-seeking controller into data_dir first
+    demo_episodes: int = 0
+    epochs: int = 10
+    batch_size: int = 1024
+    # rows held by the shuffle buffer (bounds memory; larger = better mixing across chunks)
+    shuffle_rows: int = 65536
+    # threads decoding chunks from the memory-mapped dataset
+    num_workers: int = 2
+    # chunks being decoded ahead of the shuffle buffer / minibatches ready ahead of the learner
+    prefetch_chunks: int = 4
+    prefetch_batches: int = 4
+    lr: float = 1e-3
+    # floor on the policy std so PPO fine-tuning still explores
+    min_std: float = 0.1
+    checkpoint_path: str = "checkpoints/bc_actor_critic.pt"
@@ -0,0 +1,244 @@
+# airsim_marl/data/trajectory.py
+"""Append-only, chunked trajectory dataset.
+
+Layout of a dataset directory:
+
+    index.jsonl                  one line per chunk: name, episode, rows, field dtypes/shapes
+    ep000000_c0000/obs.npy       columnar arrays, one row per (step, agent) transition
+    ep000000_c0000/action.npy
+    ...
+
+Columns: `agent` (int16, index into `agents` of the dataset's meta.json), `t` (int32 step in
+episode), `obs`, `action`, `reward`, `terminated`, `truncated` and one float32 `info_<key>` column per
+numeric info entry (NaN where an agent did not report that key). Chunks are raw `.npy` files so
+the reader can memory-map them.
+"""
+from __future__ import annotations
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+INDEX_FILE = "index.jsonl"
+META_FILE = "meta.json"
+
+
+class TrajectoryWriter:
+    """Collects env steps per episode and writes chunks on a background thread.
+
+    `add_step` only appends to in-memory lists; full chunks (`chunk_steps` env steps, or the end
+    of an episode) are handed to the writer thread through a bounded queue. Samples are never
+    dropped: when the queue is full the caller blocks, and that time is reported as `blocked_s`.
+    """
+    def __init__(self, root: str, agents: Sequence[str], chunk_steps: int = 512, max_queue: int = 4):
+        self.root = root
+        self.agents = list(agents)
+        self._col = {a: i for i, a in enumerate(self.agents)}
+        self.chunk_steps = int(chunk_steps)
+        os.makedirs(root, exist_ok=True)
+        meta_path = os.path.join(root, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                if json.load(f)["agents"] != self.agents:
+                    raise ValueError(f"{root} already holds trajectories of different agents")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump({"agents": self.agents}, f)
+        # continue numbering after existing episodes (append-only)
+        self.episode = 1 + max((e["episode"] for e in read_index(root)), default=-1)
+        self._chunk = 0
+        self._t = 0
+        self._rows: Dict[str, list] = {}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self.chunks_written = 0
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.blocked_s = 0.0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._write_loop, name="trajectory-writer", daemon=True)
+        self._thread.start()
+
+    # ---- producer side ----
+    def add_step(self, obs: Dict[str, Any], actions: Dict[str, Any], rewards: Dict[str, float],
+                 terms: Dict[str, bool], truncs: Dict[str, bool], infos: Optional[Dict[str, dict]] = None) -> None:
+        """Record one parallel-env step: `obs` are the observations the actions were taken on."""
+        for a in actions:
+            row = {
+                "agent": self._col[a], "t": self._t, "obs": obs[a], "action": actions[a], "reward": rewards[a],
+                "terminated": bool(terms[a]), "truncated": bool(truncs[a]),
+            }
+            for k, v in ((infos or {}).get(a) or {}).items():
+                if isinstance(v, (bool, int, float, np.number, np.bool_)):
+                    row["info_" + k] = float(v)
+            n = len(self._rows.get("agent", ()))
+            for k, v in row.items():
+                # an info key seen for the first time: earlier rows get NaN
+                self._rows.setdefault(k, [np.nan] * n).append(v)
+            for k, col in self._rows.items():
+                if len(col) == n:
+                    col.append(np.nan)
+        self._t += 1
+        if self._t % self.chunk_steps == 0:
+            self._flush()
+
+    def end_episode(self) -> None:
+        self._flush()
+        self.episode += 1
+        self._chunk = 0
+        self._t = 0
+
+    def close(self) -> None:
+        """Flush the open episode and wait for all chunks to be written."""
+        if self._rows:
+            self.end_episode()
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, float]:
+        return {"chunks": self.chunks_written, "rows": self.rows_written, "bytes": self.bytes_written,
+                "blocked_s": self.blocked_s, "errors": self.errors, "queued": self._queue.qsize()}
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        arrays = {}
+        for k, v in self._rows.items():
+            arr = np.asarray(v)
+            if arr.dtype == np.float64:
+                arr = arr.astype(np.float32)
+            arrays[k] = arr
+        arrays["agent"] = arrays["agent"].astype(np.int16)
+        arrays["t"] = arrays["t"].astype(np.int32)
+        name = f"ep{self.episode:06d}_c{self._chunk:04d}"
+        self._chunk += 1
+        self._rows = {}
+        t0 = time.perf_counter()
+        self._queue.put((name, self.episode, arrays))
+        self.blocked_s += time.perf_counter() - t0
+
+    # ---- writer thread ----
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            name, episode, arrays = item
+            try:
+                tmp = os.path.join(self.root, "." + name + ".tmp")
+                os.makedirs(tmp, exist_ok=True)
+                for k, arr in arrays.items():
+                    np.save(os.path.join(tmp, k + ".npy"), arr)
+                # a chunk becomes visible only once complete: rename, then index
+                os.replace(tmp, os.path.join(self.root, name))
+                entry = {"chunk": name, "episode": episode, "rows": int(len(arrays["agent"])),
+                         "fields": {k: [a.dtype.str, list(a.shape[1:])] for k, a in arrays.items()}}
+                with open(os.path.join(self.root, INDEX_FILE), "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+                self.chunks_written += 1
+                self.rows_written += entry["rows"]
+                self.bytes_written += sum(a.nbytes for a in arrays.values())
+            except Exception:
+                self.errors += 1
+
+
+class RecordingEnv:
+    """Wraps a PettingZoo parallel env and records every step into a `TrajectoryWriter`."""
+    def __init__(self, env, writer: TrajectoryWriter):
+        self.env = env
+        self.writer = writer
+        self._obs: Dict[str, Any] = {}
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    def reset(self, *args, **kwargs):
+        if self.writer._t:
+            # reset in the middle of an episode: close it out
+            self.writer.end_episode()
+        self._obs, infos = self.env.reset(*args, **kwargs)
+        return self._obs, infos
+
+    def step(self, actions):
+        obs, rews, terms, truncs, infos = self.env.step(actions)
+        live = {a: actions[a] for a in actions if a in rews}
+        self.writer.add_step(self._obs, live, rews, terms, truncs, infos)
+        self._obs = obs
+        if not self.env.agents:
+            self.writer.end_episode()
+        return obs, rews, terms, truncs, infos
+
+    def close(self):
+        self.writer.close()
+        self.env.close()
+
+
+def read_index(root: str) -> List[dict]:
+    path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TrajectoryDataset:
+    """Memory-mapped reader: random access by global row index, or streaming by chunk."""
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, META_FILE)) as f:
+            self.agents: List[str] = json.load(f)["agents"]
+        self.index = read_index(root)
+        self.offsets = np.cumsum([0] + [e["rows"] for e in self.index])
+        self._cache: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.index)
+
+    def chunk(self, i: int, fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Columns of chunk `i` as read-only memory maps."""
+        if i not in self._cache:
+            self._cache[i] = {}
+        cols = self._cache[i]
+        for k in (fields or self.index[i]["fields"]):
+            if k not in cols:
+                cols[k] = np.load(os.path.join(self.root, self.index[i]["chunk"], k + ".npy"), mmap_mode="r")
+        return {k: cols[k] for k in (fields or self.index[i]["fields"])}
+
+    def __getitem__(self, idx) -> Dict[str, np.ndarray]:
+        """Rows by global index (int or integer array), gathered per chunk."""
+        scalar = np.ndim(idx) == 0
+        idx = np.atleast_1d(np.asarray(idx, dtype=np.int64))
+        if idx.size and (idx.min() < 0 or idx.max() >= len(self)):
+            raise IndexError("trajectory row index out of range")
+        which = np.searchsorted(self.offsets, idx, side="right") - 1
+        fields = {k: spec for e in self.index for k, spec in e["fields"].items()}
+        out = {}
+        for k, (dtype, shape) in fields.items():
+            # info columns absent from some chunks read as NaN there
+            out[k] = np.full((idx.size, *shape), np.nan, dtype=np.float32) if k.startswith("info_") \
+                else np.empty((idx.size, *shape), dtype=np.dtype(dtype))
+        for c in np.unique(which):
+            sel = which == c
+            local = idx[sel] - self.offsets[c]
+            for k, arr in self.chunk(int(c)).items():
+                out[k][sel] = arr[local]
+        return {k: v[0] for k, v in out.items()} if scalar else out
+
+    def iter_chunks(self, fields: Optional[Sequence[str]] = None, order: Optional[Sequence[int]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Stream chunks (memory-mapped) in index order or in the given chunk order."""
+        for i in (range(self.num_chunks) if order is None else order):
+            yield self.chunk(int(i), fields)
+
+    def episodes(self) -> Dict[int, List[int]]:
+        """Episode id -> chunk indices."""
+        out: Dict[int, List[int]] = {}
+        for i, e in enumerate(self.index):
+            out.setdefault(e["episode"], []).append(i)
+        return out
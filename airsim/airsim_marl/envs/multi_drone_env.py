@@ -48,6 +48,7 @@ class AirSimMultiDroneParallelEnv(ParallelEnv):
     def action_space(self, agent): return self._action_spaces[agent]
 
     def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        self.agents = list(self.possible_agents)
         # reset world & drones
         self.world.refresh_jammers()
         for a in self.agents:
@@ -65,10 +66,12 @@ class AirSimMultiDroneParallelEnv(ParallelEnv):
         return obs, infos
 
     def step(self, actions: Dict[str, np.ndarray]):
-        # issue actions
-        for a, act in actions.items():
-            if self._terminated[a] or self._truncated[a]:
+        # issue actions (only live agents; finished ones were removed from self.agents)
+        live = list(self.agents)
+        for a in live:
+            if a not in actions:
                 continue
+            act = actions[a]
             vx, vy, vz, yaw_rate = [float(x) for x in act]
             vx = clip(vx, -self.v_max, self.v_max)
             vy = clip(vy, -self.v_max, self.v_max)
@@ -79,20 +82,30 @@ class AirSimMultiDroneParallelEnv(ParallelEnv):
         self._steps += 1
 
         obs, rews, terms, truncs, infos = {}, {}, {}, {}, {}
-        for a in self.agents:
+        for a in live:
             ob = self._get_obs(a)
             r, info = self._reward_and_info(a, ob)
             done, trunc = self._done_trunc(a, ob, info)
             obs[a], rews[a], terms[a], truncs[a], infos[a] = ob, r, done, trunc, info
             self._terminated[a], self._truncated[a] = done, trunc
 
+        # drop finished agents (PettingZoo semantics) and park them in hover once
+        finished = [a for a in live if terms[a] or truncs[a]]
+        for a in finished:
+            self.drones[a].park()
+        self.agents = [a for a in self.agents if a not in finished]
+
         return obs, rews, terms, truncs, infos
 
+    def active_mask(self) -> np.ndarray:
+        live = set(self.agents)
+        return np.array([a in live for a in self.possible_agents], dtype=bool)
+
     def render(self):  # rely on AirSim window; return state for debugging
         return {a: self._get_obs(a) for a in self.agents}
 
     def close(self):
-        for a in self.agents:
+        for a in self.possible_agents:
             self.drones[a].shutdown()
 
     # ---- internals ----
@@ -0,0 +1,44 @@
+# airsim_marl/policy_runtime.py
+"""Minimal runtime for exported policies (see `airsim_marl.train.export`).
+
+Only NumPy plus the chosen backend is imported: `torch` for TorchScript files (`.pt`), or
+`onnxruntime` for ONNX files (`.onnx`). Nothing from the training stack is needed.
+"""
+from __future__ import annotations
+import json
+import numpy as np
+
+
+class ExportedPolicy:
+    """Deterministic actor: maps observations (N, obs_dim) or (obs_dim,) to mean actions."""
+    def __init__(self, path: str, threads: int = 1):
+        self.path = path
+        if path.endswith(".onnx"):
+            import onnxruntime as ort
+            opts = ort.SessionOptions()
+            opts.intra_op_num_threads = int(threads)
+            self._sess = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+            self._input = self._sess.get_inputs()[0].name
+            self.meta = json.loads(self._sess.get_modelmeta().custom_metadata_map.get("policy", "{}"))
+            self._run = lambda x: self._sess.run(None, {self._input: x})[0]
+        else:
+            import torch
+            torch.set_num_threads(int(threads))
+            files = {"policy.json": ""}
+            self._module = torch.jit.load(path, map_location="cpu", _extra_files=files)
+            self.meta = json.loads(files["policy.json"] or "{}")
+
+            def run(x):
+                with torch.inference_mode():
+                    return self._module(torch.from_numpy(x)).numpy()
+            self._run = run
+
+    def __call__(self, obs: np.ndarray) -> np.ndarray:
+        x = np.ascontiguousarray(obs, dtype=np.float32)
+        if x.ndim == 1:
+            return self._run(x[None])[0]
+        return self._run(x)
+
+
+def load_policy(path: str, threads: int = 1) -> ExportedPolicy:
+    return ExportedPolicy(path, threads=threads)
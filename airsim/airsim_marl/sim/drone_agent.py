@@ -49,6 +49,12 @@ class DroneAgent:
         col = self.client.get_collision(vehicle_name=self.name)
         return bool(col.has_collided)
 
+    def park(self):
+        try:
+            self.client.hover(vehicle_name=self.name).join()
+        except Exception:
+            pass
+
     def shutdown(self):
         try:
             self.client.hover(vehicle_name=self.name).join()
@@ -0,0 +1,350 @@
+# airsim_marl/train/actor_learner.py
+"""Decoupled actor-learner training.
+
+Rollout workers (one process per simulator) keep stepping their env with a recent policy
+snapshot and stream fixed-length trajectory chunks into a bounded queue; the learner consumes
+them and corrects for policy lag with V-trace. Weights are broadcast through a shared-memory
+copy of the model, so workers never wait for the learner to finish an update.
+"""
+from __future__ import annotations
+import copy
+import functools
+import queue as queue_mod
+import time
+import traceback
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.optim as optim
+from torch.distributions import Normal
+
+from ..config import ActorLearnerConfig, EnvConfig
+from .inference_server import InferenceClient, InferenceServer
+from .ppo import ActorCritic
+from .rollout import MARLRolloutBuffer
+
+CHUNK_KEYS = ("obs", "acts", "rews", "logps", "terms", "truncs", "valid")
+
+
+class PolicyStore:
+    """Shared-memory policy snapshot: the learner publishes, workers pull when the version changes."""
+    def __init__(self, model: ActorCritic, ctx):
+        self.model = copy.deepcopy(model).cpu().share_memory()
+        self.version = ctx.Value("l", 0, lock=False)
+        self.lock = ctx.Lock()
+
+    def publish(self, model: nn.Module, version: int) -> None:
+        """Copy `model`'s parameters into shared memory and tag them with `version` (learner update count)."""
+        with self.lock, torch.no_grad():
+            for dst, src in zip(self.model.parameters(), model.parameters()):
+                dst.copy_(src.detach())
+            self.version.value = int(version)
+
+    def pull(self, local: nn.Module, known: int) -> int:
+        """Refresh `local` if a newer snapshot exists; returns the version now held."""
+        if self.version.value == known:
+            return known
+        with self.lock:
+            local.load_state_dict(self.model.state_dict())
+            return self.version.value
+
+
+def vtrace(behavior_logps: torch.Tensor, target_logps: torch.Tensor, rews: torch.Tensor, values: torch.Tensor,
+           terms: torch.Tensor, truncs: torch.Tensor, valid: torch.Tensor, boot: torch.Tensor,
+           last_values: torch.Tensor, gamma=0.99, rho_bar=1.0, c_bar=1.0):
+    """V-trace targets and policy-gradient advantages for time-major (T, A) tensors.
+
+    Same episode-boundary rules as `MARLRolloutBuffer.compute_returns_advantages`:
+    terminated rows do not bootstrap, truncated rows bootstrap from `boot` and cut the trace,
+    other rows bootstrap from the next row (or `last_values` after the last one).
+    Returns (vs, pg_adv), both (T, A) and detached.
+    """
+    with torch.no_grad():
+        ratio = torch.exp(target_logps - behavior_logps)
+        rho = torch.clamp(ratio, max=rho_bar)
+        c = torch.clamp(ratio, max=c_bar)
+        T = rews.shape[0]
+        nonterminal = 1.0 - terms
+        cont = nonterminal * (1.0 - truncs)
+        next_values = torch.cat([values[1:], last_values.unsqueeze(0)], dim=0)
+        next_values = torch.where(truncs > 0, boot, next_values)
+        deltas = rho * (rews + gamma * nonterminal * next_values - values)
+        acc = torch.zeros_like(last_values)
+        vs_minus_v = torch.zeros_like(values)
+        for t in reversed(range(T)):
+            acc = (deltas[t] + gamma * cont[t] * c[t] * acc) * valid[t]
+            vs_minus_v[t] = acc
+        vs = vs_minus_v + values
+        # v_{s+1} inside the episode, boot/0 at boundaries
+        next_vs = torch.cat([vs[1:], last_values.unsqueeze(0)], dim=0)
+        next_vs = torch.where(cont > 0, next_vs, next_values)
+        pg_adv = rho * (rews + gamma * nonterminal * next_vs - values) * valid
+        return vs, pg_adv
+
+
+def _put(q, item, stop) -> bool:
+    """Blocking put that gives up once `stop` is set."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue_mod.Full:
+            continue
+    return False
+
+
+def rollout_worker(rank: int, env_fn: Callable[[int], Any], store: PolicyStore, chunks, stop, cfg: ActorLearnerConfig,
+                   client: Optional[InferenceClient] = None):
+    """Worker process: step the env non-stop and emit (chunk_len, n_agents) trajectory chunks.
+
+    Actions come from a local policy copy, or from the shared inference server when `client` is
+    given. Each chunk records the (oldest) policy version that produced it and the time the worker
+    spent blocked on a full queue (the only time its simulator is idle).
+    """
+    torch.set_num_threads(1)
+    torch.manual_seed(cfg.seed + rank)
+    env = None
+    try:
+        env = env_fn(rank)
+        model = copy.deepcopy(store.model)
+        version = store.pull(model, -1) if client is None else -1
+        policy = model if client is None else client
+        col = {a: i for i, a in enumerate(env.possible_agents)}
+        obs_dim = model.pi[0].in_features
+        act_dim = model.log_std.shape[0]
+        buf = MARLRolloutBuffer(obs_dim, act_dim, cfg.chunk_len, len(col))
+        obs, _ = env.reset(seed=cfg.seed + rank)
+        blocked = 0.0
+        while not stop.is_set():
+            if client is None:
+                version = store.pull(model, version)
+            buf.reset()
+            boot_t, boot_a, boot_obs = [], [], []
+            steps = 0
+            chunk_version = None
+            while not buf.full:
+                live = list(env.agents)
+                obs_batch = np.stack([obs[a] for a in live])
+                actions, logps, vals = policy.act(obs_batch)
+                if chunk_version is None:
+                    chunk_version = version if client is None else client.version
+                next_obs, rews, terms, truncs, _ = env.step({a: actions[i] for i, a in enumerate(live)})
+                term = np.array([terms[a] for a in live], dtype=np.float32)
+                trunc = np.array([truncs[a] and not terms[a] for a in live], dtype=np.float32)
+                for i in np.flatnonzero(trunc):
+                    # the learner evaluates these with its own (current) critic
+                    boot_t.append(buf.ptr); boot_a.append(col[live[i]]); boot_obs.append(next_obs[live[i]])
+                buf.add([col[a] for a in live], obs_batch, actions,
+                        np.array([rews[a] for a in live], dtype=np.float32), vals, logps, term, trunc)
+                steps += len(live)
+                obs = next_obs
+                if not env.agents:
+                    obs, _ = env.reset()
+            last_obs = np.zeros((len(col), obs_dim), dtype=np.float32)
+            last_valid = np.zeros(len(col), dtype=np.float32)
+            for a in env.agents:
+                last_obs[col[a]] = obs[a]
+                last_valid[col[a]] = 1.0
+            chunk = {k: getattr(buf, k).copy() for k in CHUNK_KEYS}
+            chunk.update(
+                boot_t=np.asarray(boot_t, dtype=np.int64), boot_a=np.asarray(boot_a, dtype=np.int64),
+                boot_obs=np.asarray(boot_obs, dtype=np.float32).reshape(-1, obs_dim),
+                last_obs=last_obs, last_valid=last_valid,
+                version=chunk_version, rank=rank, steps=steps, blocked_s=blocked,
+            )
+            t0 = time.perf_counter()
+            _put(chunks, chunk, stop)
+            blocked = time.perf_counter() - t0
+    except Exception:
+        # hand the traceback to the learner so it raises instead of waiting for chunks forever
+        _put(chunks, {"error": traceback.format_exc(), "rank": rank}, stop)
+        raise
+    finally:
+        if env is not None:
+            env.close()
+
+
+def _collate(chunks: List[Dict[str, Any]], device) -> Dict[str, torch.Tensor]:
+    """Concatenate chunks along the agent axis into (T, A_total) tensors on `device`."""
+    out = {k: torch.from_numpy(np.concatenate([c[k] for c in chunks], axis=1)).to(device) for k in CHUNK_KEYS}
+    for k in ("terms", "truncs", "valid"):
+        out[k] = out[k].float()
+    offsets = np.cumsum([0] + [c["rews"].shape[1] for c in chunks[:-1]])
+    out["boot_t"] = torch.from_numpy(np.concatenate([c["boot_t"] for c in chunks])).to(device)
+    out["boot_a"] = torch.from_numpy(np.concatenate([c["boot_a"] + off for c, off in zip(chunks, offsets)])).to(device)
+    out["boot_obs"] = torch.from_numpy(np.concatenate([c["boot_obs"] for c in chunks])).to(device)
+    out["last_obs"] = torch.from_numpy(np.concatenate([c["last_obs"] for c in chunks])).to(device)
+    out["last_valid"] = torch.from_numpy(np.concatenate([c["last_valid"] for c in chunks])).to(device)
+    return out
+
+
+def vtrace_update(model: ActorCritic, optimizer, batch: Dict[str, torch.Tensor], cfg: ActorLearnerConfig) -> Dict[str, torch.Tensor]:
+    """One V-trace actor-critic gradient step on a collated batch; returns on-device stats."""
+    T, A, obs_dim = batch["obs"].shape
+    mean, values = model(batch["obs"].reshape(T * A, obs_dim))
+    dist = Normal(mean, torch.exp(model.log_std))
+    logps = dist.log_prob(batch["acts"].reshape(T * A, -1)).sum(-1).reshape(T, A)
+    entropy = dist.entropy().sum(-1).reshape(T, A)
+    values = values.reshape(T, A)
+    with torch.no_grad():
+        last_values = model.value(batch["last_obs"]) * batch["last_valid"]
+        boot = torch.zeros_like(values)
+        if batch["boot_t"].numel():
+            boot[batch["boot_t"], batch["boot_a"]] = model.value(batch["boot_obs"])
+    vs, pg_adv = vtrace(batch["logps"], logps.detach(), batch["rews"], values.detach(), batch["terms"], batch["truncs"],
+                        batch["valid"], boot, last_values, gamma=cfg.gamma, rho_bar=cfg.rho_bar, c_bar=cfg.c_bar)
+    mask = batch["valid"]
+    n = mask.sum().clamp(min=1.0)
+    pg_loss = -(pg_adv * logps * mask).sum() / n
+    v_loss = (((vs - values) ** 2) * mask).sum() / n
+    ent = (entropy * mask).sum() / n
+    loss = pg_loss + cfg.vf_coef * v_loss - cfg.ent_coef * ent
+    optimizer.zero_grad(set_to_none=True)
+    loss.backward()
+    nn.utils.clip_grad_norm_(model.parameters(), cfg.max_grad_norm)
+    optimizer.step()
+    with torch.no_grad():
+        rho_clip = ((torch.exp(logps - batch["logps"]) > cfg.rho_bar).float() * mask).sum() / n
+    return {"pg_loss": pg_loss.detach(), "v_loss": v_loss.detach(), "entropy": ent.detach(), "rho_clip_frac": rho_clip}
+
+
+class ActorLearner:
+    """Learner side: owns the model, the worker processes and the bounded chunk queue.
+
+    With `cfg.inference_server` the workers share one dynamic-batching `InferenceServer` instead of
+    running their own policy copies. `env_fn(rank)` builds the env of worker `rank`. `mp_context` defaults to "spawn" (required once
+    the learner holds CUDA state); `env_fn` must then be picklable, e.g. a `functools.partial`.
+    """
+    def __init__(self, env_fn: Callable[[int], Any], obs_dim: int, act_dim: int, cfg: Optional[ActorLearnerConfig] = None,
+                 device="cpu", hidden=128, mp_context: str = "spawn"):
+        self.cfg = cfg or ActorLearnerConfig()
+        self.env_fn = env_fn
+        self.device = torch.device(device)
+        self.model = ActorCritic(obs_dim, act_dim, hidden=hidden).to(self.device)
+        self.optimizer = optim.Adam(self.model.parameters(), lr=self.cfg.lr)
+        self.ctx = mp.get_context(mp_context)
+        self.store = PolicyStore(self.model, self.ctx)
+        self.chunks = self.ctx.Queue(maxsize=self.cfg.queue_size)
+        self.stop_event = self.ctx.Event()
+        self.workers: List[Any] = []
+        self.updates = 0
+        self.server: Optional[InferenceServer] = None
+        if self.cfg.inference_server:
+            self.server = InferenceServer(
+                self.store, self.cfg.num_workers, obs_dim, act_dim, self.ctx, max_rows=self.cfg.server_max_rows,
+                max_batch=self.cfg.server_max_batch, max_wait_ms=self.cfg.server_max_wait_ms, threads=self.cfg.server_threads,
+            )
+
+    def start(self):
+        if self.server is not None:
+            self.server.start()
+        for rank in range(self.cfg.num_workers):
+            client = None if self.server is None else self.server.client(rank)
+            p = self.ctx.Process(target=rollout_worker, args=(rank, self.env_fn, self.store, self.chunks, self.stop_event, self.cfg, client), daemon=True)
+            p.start()
+            self.workers.append(p)
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        # drain so that workers blocked in put() can observe the stop flag
+        deadline = time.monotonic() + timeout
+        while any(p.is_alive() for p in self.workers) and time.monotonic() < deadline:
+            try:
+                self.chunks.get(timeout=0.05)
+            except queue_mod.Empty:
+                pass
+        for p in self.workers:
+            p.join(timeout=0.1)
+            if p.is_alive():
+                p.terminate()
+        self.workers = []
+        if self.server is not None:
+            self.server.stop()
+
+    def _next_chunk(self, poll_s: float = 1.0) -> Dict[str, Any]:
+        """Next chunk from the queue; raises once a worker has failed instead of waiting forever."""
+        while True:
+            try:
+                item = self.chunks.get(timeout=poll_s)
+            except queue_mod.Empty:
+                dead = [(rank, p.exitcode) for rank, p in enumerate(self.workers) if not p.is_alive()]
+                if not dead:
+                    continue
+                # a failed worker queues its traceback before exiting; prefer that over the bare exit code
+                try:
+                    item = self.chunks.get(timeout=poll_s)
+                except queue_mod.Empty:
+                    raise RuntimeError(f"rollout workers exited without reporting an error (rank, exitcode): {dead}")
+            if "error" in item:
+                raise RuntimeError(f"rollout worker {item['rank']} failed:\n{item['error']}")
+            return item
+
+    def step(self, chunks: List[Dict[str, Any]]) -> Dict[str, float]:
+        """Consume a list of chunks: one V-trace update, optional weight publish, stats."""
+        # policy lag: learner updates applied since the snapshot that generated each chunk
+        lag = [self.updates - c["version"] for c in chunks]
+        stats = vtrace_update(self.model, self.optimizer, _collate(chunks, self.device), self.cfg)
+        self.updates += 1
+        if self.updates % max(int(self.cfg.publish_every), 1) == 0:
+            self.store.publish(self.model, self.updates)
+        out = dict(zip(stats, torch.stack(list(stats.values())).tolist()))
+        out.update(
+            policy_lag_mean=float(np.mean(lag)), policy_lag_max=float(np.max(lag)),
+            steps=float(sum(c["steps"] for c in chunks)),
+            worker_blocked_s=float(sum(c["blocked_s"] for c in chunks)),
+        )
+        return out
+
+    def run(self, total_updates: Optional[int] = None, log_every: int = 10, log: Callable[[str], None] = print) -> List[Dict[str, float]]:
+        total_updates = self.cfg.total_updates if total_updates is None else total_updates
+        history: List[Dict[str, float]] = []
+        self.start()
+        try:
+            total_steps = 0
+            for _ in range(total_updates):
+                t0 = time.perf_counter()
+                batch = [self._next_chunk() for _ in range(self.cfg.chunks_per_update)]
+                wait = time.perf_counter() - t0
+                stats = self.step(batch)
+                stats["learner_wait_s"] = wait
+                total_steps += int(stats["steps"])
+                history.append(stats)
+                if log_every and self.updates % log_every == 0:
+                    log(f"update {self.updates} steps {total_steps} pg_loss={stats['pg_loss']:.4f} "
+                        f"v_loss={stats['v_loss']:.4f} lag={stats['policy_lag_mean']:.2f}/{stats['policy_lag_max']:.0f} "
+                        f"learner_wait={wait:.3f}s worker_blocked={stats['worker_blocked_s']:.3f}s")
+                    if self.server is not None:
+                        srv = self.server.stats()
+                        log(f"  inference: batch_rows={srv['batch_rows_mean']:.1f} batch_reqs={srv['batch_requests_mean']:.2f} "
+                            f"queue_wait={srv['queue_wait_ms_mean']:.2f}/{srv['queue_wait_ms_max']:.2f}ms infer={srv['infer_ms_mean']:.2f}ms")
+        finally:
+            self.stop()
+        return history
+
+
+def make_worker_env(env_cfg: EnvConfig, ports: List[int], rank: int):
+    """Worker `rank` drives the simulator at `ports[rank % len(ports)]` (or `env_cfg.port` if none given)."""
+    from ..envs.multi_drone_env import AirSimMultiDroneParallelEnv
+    if ports:
+        env_cfg = replace(env_cfg, port=int(ports[rank % len(ports)]))
+    return AirSimMultiDroneParallelEnv(env_cfg)
+
+
+def main():
+    env_cfg = EnvConfig()
+    cfg = ActorLearnerConfig()
+    probe = make_worker_env(env_cfg, cfg.worker_ports, 0)
+    obs_dim = probe.observation_space(probe.possible_agents[0]).shape[0]
+    act_dim = probe.action_space(probe.possible_agents[0]).shape[0]
+    probe.close()
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    learner = ActorLearner(functools.partial(make_worker_env, env_cfg, list(cfg.worker_ports)), obs_dim, act_dim, cfg, device=device)
+    learner.run()
+
+
+if __name__ == "__main__":
+    main()
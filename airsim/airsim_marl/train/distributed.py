@@ -0,0 +1,102 @@
+# airsim_marl/train/distributed.py
+"""CPU data-parallel helpers on `torch.distributed` (gloo).
+
+Every rank collects its own shard of the rollout (one simulator per rank), normalizes
+advantages with global statistics and averages gradients after each backward pass, so all
+ranks keep identical weights. Ranks are started by `torch.distributed.run`; see
+`airsim/scripts/launch_ddp_ppo.py`.
+"""
+from __future__ import annotations
+import math
+import os
+import random
+from typing import Tuple
+
+import numpy as np
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+
+
+def launched_distributed() -> bool:
+    """True when started by torch.distributed.run with more than one rank."""
+    return int(os.environ.get("WORLD_SIZE", "1")) > 1
+
+
+def init_distributed(backend: str = "gloo") -> Tuple[int, int]:
+    """Join the process group described by the torchrun environment; returns (rank, world_size)."""
+    if not dist.is_initialized():
+        dist.init_process_group(backend=backend)
+    return dist.get_rank(), dist.get_world_size()
+
+
+def shutdown_distributed() -> None:
+    if dist.is_initialized():
+        dist.destroy_process_group()
+
+
+def sum_across_ranks(x: float) -> float:
+    t = torch.tensor([float(x)], dtype=torch.float64)
+    dist.all_reduce(t)
+    return float(t.item())
+
+
+def seed_everything(seed: int) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def broadcast_parameters(model: nn.Module, src: int = 0) -> None:
+    """Make every rank start from `src`'s weights (and buffers)."""
+    for t in model.state_dict().values():
+        dist.broadcast(t, src)
+
+
+def average_buffers(module: nn.Module) -> None:
+    """Average module buffers (e.g. value-normalizer statistics) across ranks."""
+    for b in module.buffers():
+        dist.all_reduce(b)
+        b /= dist.get_world_size()
+
+
+def allreduce_gradients(model: nn.Module) -> None:
+    """Average gradients across ranks with one coalesced all-reduce.
+
+    Intended as the `grad_hook` of `ppo_update`; missing gradients count as zero so that every
+    rank issues the same collective.
+    """
+    params = [p for p in model.parameters() if p.requires_grad]
+    flat = torch.cat([(p.grad if p.grad is not None else torch.zeros_like(p)).reshape(-1) for p in params])
+    dist.all_reduce(flat)
+    flat /= dist.get_world_size()
+    offset = 0
+    for p in params:
+        n = p.numel()
+        p.grad = flat[offset:offset + n].view_as(p).clone()
+        offset += n
+
+
+def normalize_advantages(advs: torch.Tensor, eps: float = 1e-8) -> torch.Tensor:
+    """Normalize a local advantage shard with the global mean/std over all ranks."""
+    s = torch.stack([advs.sum(), (advs ** 2).sum(), torch.tensor(float(advs.numel()), dtype=advs.dtype, device=advs.device)])
+    dist.all_reduce(s)
+    n = s[2].clamp(min=1.0)
+    mean = s[0] / n
+    var = (s[1] / n - mean ** 2).clamp(min=0.0) * n / (n - 1.0).clamp(min=1.0)
+    return (advs - mean) / (var.sqrt() + eps)
+
+
+def global_num_minibatches(n_local: int, minibatch_size: int) -> int:
+    """Minibatches per epoch shared by all ranks (each rank must run the same number of steps).
+
+    Sized so that the global minibatch is about `minibatch_size` per rank, and never larger than
+    the smallest shard so no rank gets an empty minibatch.
+    """
+    t = torch.tensor([float(n_local), -float(n_local)])
+    total = t[:1].clone()
+    dist.all_reduce(total)
+    dist.all_reduce(t[1:], op=dist.ReduceOp.MAX)
+    smallest = int(-t[1].item())
+    k = math.ceil(total.item() / (dist.get_world_size() * max(int(minibatch_size), 1)))
+    return max(1, min(k, smallest))
@@ -0,0 +1,137 @@
+# airsim_marl/train/export.py
+"""Export a trained `ActorCritic` as a standalone deterministic actor.
+
+    python -m airsim_marl.train.export --ckpt checkpoints/ppo_actor_critic.pt --out exported --onnx --quantize --benchmark
+
+Produces `actor.pt` (TorchScript), optionally `actor_int8.pt` (int8 dynamically quantized Linear
+layers) and `actor.onnx`; all map observations to the mean action. Load them with
+`airsim_marl.policy_runtime.load_policy`.
+"""
+from __future__ import annotations
+import argparse
+import copy
+import json
+import os
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .ppo import ActorCritic, load_checkpoint
+
+
+class DeterministicActor(nn.Module):
+    """Policy mean head only: no critic, no sampling."""
+    def __init__(self, model: ActorCritic):
+        super().__init__()
+        if hasattr(model, "gru"):
+            raise ValueError("recurrent policies cannot be exported as a stateless actor")
+        self.pi = copy.deepcopy(model.pi).cpu().eval()
+
+    def forward(self, obs: torch.Tensor) -> torch.Tensor:
+        return self.pi(obs)
+
+
+def _meta(model: ActorCritic, **extra) -> Dict[str, object]:
+    return {"obs_dim": model.pi[0].in_features, "act_dim": model.log_std.shape[0], **extra}
+
+
+def export_torchscript(model: ActorCritic, path: str, quantize: bool = False) -> str:
+    """Trace the deterministic actor to TorchScript; `quantize` converts Linear layers to int8 (dynamic)."""
+    actor = DeterministicActor(model)
+    if quantize:
+        actor = torch.ao.quantization.quantize_dynamic(actor, {nn.Linear}, dtype=torch.qint8)
+    example = torch.zeros(1, model.pi[0].in_features)
+    with torch.no_grad():
+        scripted = torch.jit.trace(actor, example)
+    scripted = torch.jit.freeze(scripted.eval()) if not quantize else scripted
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.jit.save(scripted, path, _extra_files={"policy.json": json.dumps(_meta(model, int8=quantize))})
+    return path
+
+
+def export_onnx(model: ActorCritic, path: str, opset: int = 17) -> str:
+    """Export the float deterministic actor to ONNX with a dynamic batch axis (requires `onnx`)."""
+    try:
+        import onnx
+    except ImportError as e:
+        raise ImportError("ONNX export requires the 'onnx' package (pip install onnx onnxruntime)") from e
+    actor = DeterministicActor(model)
+    example = torch.zeros(1, model.pi[0].in_features)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.onnx.export(actor, (example,), path, input_names=["obs"], output_names=["action"],
+                      dynamic_axes={"obs": {0: "batch"}, "action": {0: "batch"}}, opset_version=opset, dynamo=False)
+    proto = onnx.load(path)
+    entry = proto.metadata_props.add()
+    entry.key, entry.value = "policy", json.dumps(_meta(model))
+    onnx.save(proto, path)
+    return path
+
+
+def _latency_ms(fn, x: np.ndarray, iters: int, warmup: int) -> np.ndarray:
+    for _ in range(warmup):
+        fn(x)
+    out = np.empty(iters)
+    for i in range(iters):
+        t0 = time.perf_counter()
+        fn(x)
+        out[i] = (time.perf_counter() - t0) * 1e3
+    return out
+
+
+def benchmark(model: ActorCritic, paths: Dict[str, str], batch_sizes: Sequence[int] = (1, 64), iters: int = 200,
+              warmup: int = 20, threads: int = 1, seed: int = 0) -> List[Dict[str, object]]:
+    """CPU latency (p50/p99 ms) and max |action − eager mean| of each exported variant vs the eager model."""
+    from ..policy_runtime import load_policy
+    torch.set_num_threads(int(threads))
+    eager = copy.deepcopy(model).cpu().eval()
+
+    def run_eager(x):
+        with torch.inference_mode():
+            return eager.pi(torch.from_numpy(x)).numpy()
+
+    runners = {"eager": run_eager}
+    runners.update({name: load_policy(p, threads=threads) for name, p in paths.items()})
+    rng = np.random.default_rng(seed)
+    rows = []
+    for bs in batch_sizes:
+        x = rng.normal(size=(int(bs), model.pi[0].in_features)).astype(np.float32)
+        ref = run_eager(x)
+        for name, fn in runners.items():
+            lat = _latency_ms(fn, x, iters, warmup)
+            rows.append({
+                "variant": name, "batch": int(bs),
+                "p50_ms": float(np.percentile(lat, 50)), "p99_ms": float(np.percentile(lat, 99)),
+                "max_abs_err": float(np.abs(fn(x) - ref).max()),
+            })
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export a trained ActorCritic as a deterministic actor")
+    ap.add_argument("--ckpt", required=True, help="checkpoint written by train_ppo (save_checkpoint)")
+    ap.add_argument("--out", default="exported")
+    ap.add_argument("--quantize", action="store_true", help="also write an int8 dynamically quantized TorchScript actor")
+    ap.add_argument("--onnx", action="store_true", help="also write an ONNX actor (needs onnx)")
+    ap.add_argument("--benchmark", action="store_true")
+    ap.add_argument("--threads", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    model = load_checkpoint(args.ckpt)
+    paths = {"torchscript": export_torchscript(model, os.path.join(args.out, "actor.pt"))}
+    if args.quantize:
+        paths["torchscript_int8"] = export_torchscript(model, os.path.join(args.out, "actor_int8.pt"), quantize=True)
+    if args.onnx:
+        paths["onnx"] = export_onnx(model, os.path.join(args.out, "actor.onnx"))
+    for name, p in paths.items():
+        print(f"{name}: {p}")
+    if args.benchmark:
+        for row in benchmark(model, paths, threads=args.threads):
+            print(f"{row['variant']:>16} batch={row['batch']:<4} p50={row['p50_ms']:.3f}ms "
+                  f"p99={row['p99_ms']:.3f}ms max_abs_err={row['max_abs_err']:.2e}")
+
+
+if __name__ == "__main__":
+    main()
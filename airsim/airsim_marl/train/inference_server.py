@@ -0,0 +1,179 @@
+# airsim_marl/train/inference_server.py
+"""Dynamic-batching local policy inference server.
+
+Env worker processes hand observations to one server process instead of each running its own
+copy of `ActorCritic`. Every client owns a fixed slot in shared-memory request/response tensors;
+only small (client, rows, timestamp) tuples travel through the request queue. The server gathers
+requests until `max_batch` rows are pending or `max_wait_ms` has passed since the first one,
+runs a single forward pass and scatters the results back into the slots.
+"""
+from __future__ import annotations
+import copy
+import queue as queue_mod
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import torch
+
+# indices into the shared metrics array
+_BATCHES, _REQUESTS, _ROWS, _WAIT_SUM, _WAIT_MAX, _INFER_SUM = range(6)
+
+
+class InferenceClient:
+    """Client handle for one slot; `act` mirrors `ActorCritic.act` and can be used in its place.
+
+    `version` is the policy version that served the last call.
+    """
+    def __init__(self, cid: int, obs_buf: torch.Tensor, out_buf: torch.Tensor, versions, requests, done, timeout: float):
+        self.cid = cid
+        self._obs_buf, self._out_buf = obs_buf, out_buf
+        self._versions = versions
+        self._requests = requests
+        self._done = done
+        self.timeout = timeout
+        self.version = -1
+        self._lat = [0, 0.0, 0.0]  # count, sum, max (seconds)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_obs", None)
+        state.pop("_out", None)
+        return state
+
+    def act(self, obs: np.ndarray, device=None, deterministic: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if deterministic:
+            raise ValueError("the inference server only serves stochastic rollout actions")
+        obs = np.asarray(obs, dtype=np.float32)
+        n = obs.shape[0]
+        if n > self._obs_buf.shape[1]:
+            raise ValueError(f"{n} observations exceed the slot size {self._obs_buf.shape[1]} (server max_rows)")
+        if "_obs" not in self.__dict__:
+            # NumPy views of this client's slot
+            self._obs = self._obs_buf[self.cid].numpy()
+            self._out = self._out_buf[self.cid].numpy()
+        self._obs[:n] = obs
+        self._done.clear()
+        t0 = time.monotonic()
+        self._requests.put((self.cid, n, t0))
+        if not self._done.wait(self.timeout):
+            raise TimeoutError(f"inference server did not answer within {self.timeout}s")
+        lat = time.monotonic() - t0
+        self._lat[0] += 1; self._lat[1] += lat; self._lat[2] = max(self._lat[2], lat)
+        self.version = int(self._versions[self.cid])
+        out = self._out[:n].copy()
+        act_dim = out.shape[1] - 2
+        return out[:, :act_dim], out[:, act_dim], out[:, act_dim + 1]
+
+    def stats(self) -> Dict[str, float]:
+        n, total, worst = self._lat
+        return {"calls": float(n), "latency_ms_mean": 1e3 * total / max(n, 1), "latency_ms_max": 1e3 * worst}
+
+
+def _serve(store, obs_buf, out_buf, versions, requests, dones, stop, metrics, hist, max_batch, max_wait_s, threads):
+    if threads:
+        torch.set_num_threads(int(threads))
+    model = copy.deepcopy(store.model)
+    version = store.pull(model, -1)
+    obs_np, out_np = obs_buf.numpy(), out_buf.numpy()
+    while not stop.is_set():
+        try:
+            first = requests.get(timeout=0.1)
+        except queue_mod.Empty:
+            continue
+        batch, rows = [first], first[1]
+        deadline = time.monotonic() + max_wait_s
+        while rows < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = requests.get(timeout=remaining)
+            except queue_mod.Empty:
+                break
+            batch.append(req)
+            rows += req[1]
+        # hot swap: pick up weights published by the learner since the last batch
+        version = store.pull(model, version)
+        t_start = time.monotonic()
+        actions, logps, vals = model.act(np.concatenate([obs_np[cid, :n] for cid, n, _ in batch]))
+        packed = np.concatenate([actions, logps[:, None], vals[:, None]], axis=1)
+        infer_s = time.monotonic() - t_start
+        waits = [t_start - t for _, _, t in batch]
+        # metrics first, so they already cover a batch once its clients are released
+        with metrics.get_lock():
+            metrics[_BATCHES] += 1
+            metrics[_REQUESTS] += len(batch)
+            metrics[_ROWS] += rows
+            metrics[_WAIT_SUM] += sum(waits)
+            metrics[_WAIT_MAX] = max(metrics[_WAIT_MAX], max(waits))
+            metrics[_INFER_SUM] += infer_s
+        with hist.get_lock():
+            hist[min(len(batch), len(hist) - 1)] += 1
+        start = 0
+        for cid, n, _ in batch:
+            out_np[cid, :n] = packed[start:start + n]
+            versions[cid] = version
+            start += n
+            dones[cid].set()
+
+
+class InferenceServer:
+    """Batched inference for `n_clients` env workers, backed by a `PolicyStore` snapshot.
+
+    The server reloads weights whenever the store's version changes, so the learner hot-swaps
+    policies simply by calling `store.publish`.
+    """
+    def __init__(self, store, n_clients: int, obs_dim: int, act_dim: int, ctx, max_rows=32, max_batch=256,
+                 max_wait_ms=2.0, threads=0, timeout=30.0):
+        self.store = store
+        self.ctx = ctx
+        self.obs_buf = torch.zeros(n_clients, max_rows, obs_dim).share_memory_()
+        self.out_buf = torch.zeros(n_clients, max_rows, act_dim + 2).share_memory_()
+        self.versions = ctx.Array("l", n_clients, lock=False)
+        self.requests = ctx.Queue()
+        self.dones = [ctx.Event() for _ in range(n_clients)]
+        self.stop_event = ctx.Event()
+        self.metrics = ctx.Array("d", 6)
+        # histogram of requests per batch (last bucket: n_clients)
+        self.hist = ctx.Array("l", n_clients + 1)
+        self.max_batch = int(max_batch)
+        self.max_wait_s = float(max_wait_ms) / 1e3
+        self.threads = int(threads)
+        self.timeout = float(timeout)
+        self.process: Optional[object] = None
+
+    def client(self, cid: int) -> InferenceClient:
+        return InferenceClient(cid, self.obs_buf, self.out_buf, self.versions, self.requests, self.dones[cid], self.timeout)
+
+    def start(self):
+        self.stop_event.clear()
+        self.process = self.ctx.Process(
+            target=_serve,
+            args=(self.store, self.obs_buf, self.out_buf, self.versions, self.requests, self.dones, self.stop_event,
+                  self.metrics, self.hist, self.max_batch, self.max_wait_s, self.threads),
+            daemon=True,
+        )
+        self.process.start()
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        if self.process is not None:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+
+    def stats(self) -> Dict[str, object]:
+        m = list(self.metrics)
+        batches = max(m[_BATCHES], 1.0)
+        requests = max(m[_REQUESTS], 1.0)
+        return {
+            "batches": m[_BATCHES],
+            "batch_requests_mean": m[_REQUESTS] / batches,
+            "batch_rows_mean": m[_ROWS] / batches,
+            "queue_wait_ms_mean": 1e3 * m[_WAIT_SUM] / requests,
+            "queue_wait_ms_max": 1e3 * m[_WAIT_MAX],
+            "infer_ms_mean": 1e3 * m[_INFER_SUM] / batches,
+            "batch_requests_hist": list(self.hist),
+        }
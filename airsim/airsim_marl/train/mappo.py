@@ -0,0 +1,143 @@
+# airsim_marl/train/mappo.py
+"""MAPPO: decentralized actors on local observations, centralized critic on a global state.
+
+The global state is assembled once per env step from the stacked local observations of all
+`possible_agents` (no extra simulator I/O) and broadcast to every agent with a one-hot agent id,
+giving one (A, state_dim) critic batch per step.
+"""
+from __future__ import annotations
+from typing import Optional, Tuple
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.distributions import Normal
+
+from .rollout import MARLRolloutBuffer
+
+# per-agent block of the global state: pos(3), vel(3), goal(3), nearest-jammer distance(1), alive(1)
+AGENT_STATE_DIM = 11
+
+
+def global_state_dim(n_agents: int) -> int:
+    """Size of a critic input: all agents' blocks plus the one-hot id of the evaluated agent."""
+    return n_agents * AGENT_STATE_DIM + n_agents
+
+
+def critic_inputs(obs: np.ndarray, alive: np.ndarray) -> np.ndarray:
+    """Build the per-agent critic inputs (A, global_state_dim(A)) from local observations.
+
+    `obs` is (A, 17) in `possible_agents` order (finished agents keep their last observation),
+    `alive` is (A,) bool. Goals are recovered as pos + goal_delta, the jammer summary as the
+    distance to each agent's nearest jammer.
+    """
+    obs = np.asarray(obs, dtype=np.float32)
+    A = obs.shape[0]
+    pos, vel, goal_delta, jam_vec = obs[:, 0:3], obs[:, 3:6], obs[:, 7:10], obs[:, 10:13]
+    blocks = np.concatenate([
+        pos, vel, pos + goal_delta,
+        np.linalg.norm(jam_vec, axis=1, keepdims=True),
+        np.asarray(alive, dtype=np.float32)[:, None],
+    ], axis=1)
+    state = np.broadcast_to(blocks.reshape(1, -1), (A, A * AGENT_STATE_DIM))
+    return np.concatenate([state, np.eye(A, dtype=np.float32)], axis=1)
+
+
+class ValueNormalizer(nn.Module):
+    """Running mean/std of value targets; the critic regresses normalized returns.
+
+    Statistics are module buffers, so they are saved with the model checkpoint.
+    """
+    def __init__(self, beta: float = 0.99999, eps: float = 1e-5):
+        super().__init__()
+        self.beta, self.eps = beta, eps
+        self.register_buffer("mean", torch.zeros(()))
+        self.register_buffer("mean_sq", torch.zeros(()))
+        self.register_buffer("debias", torch.zeros(()))
+
+    @torch.no_grad()
+    def update(self, x: torch.Tensor):
+        w = self.beta ** x.numel()
+        self.mean.mul_(w).add_(x.mean() * (1.0 - w))
+        self.mean_sq.mul_(w).add_((x ** 2).mean() * (1.0 - w))
+        self.debias.mul_(w).add_(1.0 - w)
+
+    def _stats(self) -> Tuple[torch.Tensor, torch.Tensor]:
+        d = self.debias.clamp(min=self.eps)
+        mean = self.mean / d
+        var = (self.mean_sq / d - mean ** 2).clamp(min=1e-2)
+        return mean, torch.sqrt(var)
+
+    def normalize(self, x: torch.Tensor) -> torch.Tensor:
+        mean, std = self._stats()
+        return (x - mean) / std
+
+    def denormalize(self, x: torch.Tensor) -> torch.Tensor:
+        mean, std = self._stats()
+        return x * std + mean
+
+
+class MAPPOActorCritic(nn.Module):
+    """Shared decentralized actor (local obs) with a centralized, value-normalized critic."""
+    def __init__(self, obs_dim: int, act_dim: int, state_dim: int, hidden=128):
+        super().__init__()
+        self.state_dim = int(state_dim)
+        self.pi = nn.Sequential(
+            nn.Linear(obs_dim, hidden), nn.Tanh(),
+            nn.Linear(hidden, hidden), nn.Tanh(),
+            nn.Linear(hidden, act_dim)
+        )
+        self.v = nn.Sequential(
+            nn.Linear(state_dim, hidden), nn.Tanh(),
+            nn.Linear(hidden, hidden), nn.Tanh(),
+            nn.Linear(hidden, 1)
+        )
+        self.log_std = nn.Parameter(torch.zeros(act_dim))
+        self.value_norm = ValueNormalizer()
+
+    def forward(self, x, state):
+        """Returns (action mean, normalized value); `ppo_update` trains on normalized returns."""
+        return self.pi(x), self.v(state).squeeze(-1)
+
+    @torch.inference_mode()
+    def act(self, obs: np.ndarray, state: np.ndarray, device="cpu", deterministic: bool = False):
+        """Batched rollout inference; values are returned in return units (denormalized)."""
+        x = torch.from_numpy(np.asarray(obs, dtype=np.float32)).to(device)
+        s = torch.from_numpy(np.asarray(state, dtype=np.float32)).to(device)
+        mean, value = self(x, s)
+        dist = Normal(mean, torch.exp(self.log_std))
+        action = mean if deterministic else dist.sample()
+        logp = dist.log_prob(action).sum(-1)
+        value = self.value_norm.denormalize(value)
+        packed = torch.cat([action, logp.unsqueeze(-1), value.unsqueeze(-1)], dim=-1).cpu().numpy()
+        act_dim = action.shape[-1]
+        return packed[:, :act_dim], packed[:, act_dim], packed[:, act_dim + 1]
+
+    @torch.inference_mode()
+    def predict_values(self, state: np.ndarray, device="cpu") -> np.ndarray:
+        s = torch.from_numpy(np.asarray(state, dtype=np.float32)).to(device)
+        return self.value_norm.denormalize(self.v(s).squeeze(-1)).cpu().numpy()
+
+    def policy(self, x):
+        return Normal(self.pi(x), torch.exp(self.log_std))
+
+
+class MAPPORolloutBuffer(MARLRolloutBuffer):
+    """`MARLRolloutBuffer` plus the per-agent critic input of every step."""
+    def __init__(self, obs_dim: int, act_dim: int, state_dim: int, horizon: int, n_agents: int, **storage):
+        super().__init__(obs_dim, act_dim, horizon, n_agents, **storage)
+        # critic inputs share the observation storage dtype
+        self.cstate = np.zeros((self.max, self.n_agents, state_dim), dtype=self.obs.dtype)
+
+    def add(self, rows, o, a, r, v, logp, term, trunc, boot: Optional[np.ndarray] = None, state: Optional[np.ndarray] = None):
+        t = self.ptr
+        if not super().add(rows, o, a, r, v, logp, term, trunc, boot):
+            return False
+        self.cstate[t, rows] = state
+        return True
+
+    def as_tensors(self, device="cpu", normalize_adv: bool = True):
+        out = super().as_tensors(device, normalize_adv)
+        mask = torch.from_numpy(self.valid[:self.ptr].reshape(-1)).to(device)
+        flat = self.cstate[:self.ptr].reshape(self.ptr * self.n_agents, -1)
+        out["cstate"] = torch.from_numpy(flat).to(device, non_blocking=True).float()[mask]
+        return out
@@ -1,5 +1,8 @@
 # airsim_marl/train/ppo.py
 from __future__ import annotations
+import os
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -21,7 +24,31 @@ class ActorCritic(nn.Module):
         self.log_std = nn.Parameter(torch.zeros(act_dim))
 
     def forward(self, x):
-        raise NotImplementedError
+        """Fused actor-critic pass: returns (action mean, value) for a batch of observations."""
+        return self.pi(x), self.v(x).squeeze(-1)
+
+    @torch.inference_mode()
+    def act(self, obs: np.ndarray, device="cpu", deterministic: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Batched rollout inference for stacked observations of shape (N, obs_dim).
+
+        One forward pass for all agents; actions, log-probs and values are packed into a
+        single tensor so there is exactly one device-to-host transfer per call.
+        Returns (actions (N, act_dim), logps (N,), values (N,)) as float32 NumPy arrays.
+        """
+        x = torch.from_numpy(np.asarray(obs, dtype=np.float32)).to(device)
+        mean, value = self(x)
+        dist = Normal(mean, torch.exp(self.log_std))
+        action = mean if deterministic else dist.sample()
+        logp = dist.log_prob(action).sum(-1)
+        packed = torch.cat([action, logp.unsqueeze(-1), value.unsqueeze(-1)], dim=-1).cpu().numpy()
+        act_dim = action.shape[-1]
+        return packed[:, :act_dim], packed[:, act_dim], packed[:, act_dim + 1]
+
+    @torch.inference_mode()
+    def predict_values(self, obs: np.ndarray, device="cpu") -> np.ndarray:
+        """Critic-only batched inference for bootstrapping; returns (N,) float32."""
+        x = torch.from_numpy(np.asarray(obs, dtype=np.float32)).to(device)
+        return self.value(x).cpu().numpy()
 
     def value(self, x):
         return self.v(x).squeeze(-1)
@@ -31,30 +58,101 @@ class ActorCritic(nn.Module):
         std = torch.exp(self.log_std)
         return Normal(mean, std)
 
-def ppo_update(model: ActorCritic, optimizer, data_iter, clip_ratio=0.2, vf_coef=0.5, ent_coef=0.0, max_grad_norm=0.5, epochs=8, device="cpu"):
+def save_checkpoint(path: str, model: ActorCritic, **extra) -> None:
+    """Save weights plus the architecture needed to rebuild the model (see `load_checkpoint`).
+
+    Centralized-critic models (`MAPPOActorCritic`) additionally record their `state_dim`,
+    recurrent ones (`RecurrentActorCritic`) are flagged with `recurrent`.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    recurrent = hasattr(model, "gru")
+    first = model.enc[0] if recurrent else model.pi[0]
+    torch.save({
+        "model": model.state_dict(),
+        "obs_dim": first.in_features,
+        "act_dim": model.log_std.shape[0],
+        "hidden": first.out_features,
+        "state_dim": getattr(model, "state_dim", None),
+        "recurrent": recurrent,
+        **extra,
+    }, path)
+
+def load_checkpoint(path: str, device="cpu") -> ActorCritic:
+    ckpt = torch.load(path, map_location=device)
+    if ckpt.get("recurrent"):
+        from .recurrent import RecurrentActorCritic
+        model = RecurrentActorCritic(ckpt["obs_dim"], ckpt["act_dim"], hidden=ckpt["hidden"]).to(device)
+    elif ckpt.get("state_dim"):
+        from .mappo import MAPPOActorCritic
+        model = MAPPOActorCritic(ckpt["obs_dim"], ckpt["act_dim"], ckpt["state_dim"], hidden=ckpt["hidden"]).to(device)
+    else:
+        model = ActorCritic(ckpt["obs_dim"], ckpt["act_dim"], hidden=ckpt["hidden"]).to(device)
+    model.load_state_dict(ckpt["model"])
+    return model
+
+def init_from_checkpoint(model: nn.Module, path: str, device="cpu") -> Tuple[str, ...]:
+    """Warm-start `model` from a checkpoint (e.g. behavior-cloning pretraining, see `pretrain.py`).
+
+    Every tensor whose name and shape match is copied, so an `ActorCritic` checkpoint also
+    initializes the actor (`pi`, `log_std`) of a `MAPPOActorCritic`. Returns the loaded names.
+    """
+    src = torch.load(path, map_location=device)["model"]
+    dst = model.state_dict()
+    loaded = tuple(k for k, v in src.items() if k in dst and dst[k].shape == v.shape)
+    if not loaded:
+        raise ValueError(f"no parameter of {path} matches {type(model).__name__}")
+    model.load_state_dict({k: src[k] for k in loaded}, strict=False)
+    return loaded
+
+def ppo_update(model: ActorCritic, optimizer, batch: Dict[str, torch.Tensor], clip_ratio=0.2, vf_coef=0.5, ent_coef=0.0,
+               max_grad_norm=0.5, epochs=8, minibatch_size=1024, num_minibatches: Optional[int] = None,
+               grad_hook: Optional[Callable[[nn.Module], None]] = None) -> Dict[str, float]:
+    """Clipped PPO update over a device-resident batch (see `MARLRolloutBuffer.as_tensors`).
+
+    Minibatch permutations are drawn on the batch's device and advantages are expected to be
+    normalized once up front. If the batch carries critic inputs ("cstate"), the model is called
+    as `model(obs, cstate)` (centralized critic, see `mappo.py`).
+
+    For data-parallel training (`distributed.py`), `num_minibatches` fixes the number of
+    minibatches per epoch regardless of the local batch size, and `grad_hook(model)` runs after
+    every backward pass (e.g. gradient all-reduce) before clipping. Loss statistics are accumulated
+    on-device and transferred to the host once at the end, so the loop itself never synchronizes.
+    """
+    obs, acts, rets, advs, old_logps = (batch[k] for k in ("obs", "acts", "rets", "advs", "logps"))
+    cstate = batch.get("cstate")
+    n = obs.shape[0]
+    device = obs.device
+    stats = torch.zeros(5, device=device)
+    n_mb = 0
     for _ in range(epochs):
-        for obs, acts, rets, advs, old_logps in data_iter():
-            obs = torch.as_tensor(obs, dtype=torch.float32, device=device)
-            acts = torch.as_tensor(acts, dtype=torch.float32, device=device)
-            rets = torch.as_tensor(rets, dtype=torch.float32, device=device)
-            advs = torch.as_tensor(advs, dtype=torch.float32, device=device)
-            old_logps = torch.as_tensor(old_logps, dtype=torch.float32, device=device)
-
-            dist = model.policy(obs)
-            logps = dist.log_prob(acts).sum(-1)
-            ratio = torch.exp(logps - old_logps)
-            advs_norm = (advs - advs.mean()) / (advs.std() + 1e-8)
-            clip_adv = torch.clamp(ratio, 1.0 - clip_ratio, 1.0 + clip_ratio) * advs_norm
-            pg_loss = -(torch.min(ratio * advs_norm, clip_adv)).mean()
-
-            v = model.value(obs)
-            v_loss = F.mse_loss(v, rets)
+        perm = torch.randperm(n, device=device)
+        for mb in (perm.split(minibatch_size) if num_minibatches is None else perm.tensor_split(num_minibatches)):
+            mean, v = model(obs[mb]) if cstate is None else model(obs[mb], cstate[mb])
+            dist = Normal(mean, torch.exp(model.log_std))
+            logps = dist.log_prob(acts[mb]).sum(-1)
+            log_ratio = logps - old_logps[mb]
+            ratio = torch.exp(log_ratio)
+            adv = advs[mb]
+            clip_adv = torch.clamp(ratio, 1.0 - clip_ratio, 1.0 + clip_ratio) * adv
+            pg_loss = -(torch.min(ratio * adv, clip_adv)).mean()
+
+            v_loss = F.mse_loss(v, rets[mb])
 
             ent = dist.entropy().sum(-1).mean()
 
             loss = pg_loss + vf_coef * v_loss - ent_coef * ent
 
-            optimizer.zero_grad()
+            optimizer.zero_grad(set_to_none=True)
             loss.backward()
+            if grad_hook is not None:
+                grad_hook(model)
             nn.utils.clip_grad_norm_(model.parameters(), max_grad_norm)
             optimizer.step()
+
+            with torch.no_grad():
+                approx_kl = ((ratio - 1.0) - log_ratio).mean()
+                clip_frac = ((ratio - 1.0).abs() > clip_ratio).float().mean()
+                stats += torch.stack([pg_loss, v_loss, ent, approx_kl, clip_frac]).detach()
+            n_mb += 1
+    values = (stats / max(n_mb, 1)).tolist()
+    return dict(zip(("pg_loss", "v_loss", "entropy", "approx_kl", "clip_frac"), values))
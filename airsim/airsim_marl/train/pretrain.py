@@ -0,0 +1,248 @@
+# airsim_marl/train/pretrain.py
+"""Offline behavior-cloning pretraining of `ActorCritic` from recorded trajectories.
+
+Data comes from a trajectory dataset (`data/trajectory.py`): rollouts recorded by `train_ppo.py`
+(`PPOConfig.record_dir`) or demos of the scripted `GoalSeekingController`. Chunks are decoded
+by a thread pool, mixed in a bounded shuffle buffer and turned into minibatches on a background
+thread, so disk I/O overlaps the gradient steps. The resulting checkpoint warm-starts PPO via
+`PPOConfig.init_checkpoint`; only the actor is trained, the critic keeps its initialization.
+"""
+from __future__ import annotations
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Sequence
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from ..config import EnvConfig, PretrainConfig
+from ..data.trajectory import RecordingEnv, TrajectoryDataset, TrajectoryWriter
+from .distributed import seed_everything
+from .ppo import ActorCritic, save_checkpoint
+
+
+class GoalSeekingController:
+    """Scripted demo policy: fly straight at the goal, pushed away from jammers within `jammer_radius`.
+
+    Works on the 17-dim observation of `AirSimMultiDroneParallelEnv` (goal delta at 7:10,
+    vector to the nearest jammer at 10:13) and outputs (vx, vy, vz, yaw_rate=0).
+    """
+    def __init__(self, v_max: float, jammer_radius: float, gain: float = 0.5, avoid_gain: float = 1.0):
+        self.v_max, self.jammer_radius = float(v_max), float(jammer_radius)
+        self.gain, self.avoid_gain = float(gain), float(avoid_gain)
+
+    def act(self, obs: np.ndarray) -> np.ndarray:
+        obs = np.asarray(obs, dtype=np.float32)
+        vel = self.gain * obs[:, 7:10]
+        jam = obs[:, 10:13]
+        d = np.linalg.norm(jam, axis=1, keepdims=True)
+        # no jammer in the world -> zero vector, no push
+        near = (d > 1e-6) & (d < self.jammer_radius)
+        push = self.avoid_gain * self.v_max * (1.0 - d / self.jammer_radius) * jam / np.maximum(d, 1e-6)
+        vel = vel - np.where(near, push, 0.0)
+        speed = np.linalg.norm(vel, axis=1, keepdims=True)
+        vel = vel * np.minimum(1.0, self.v_max / np.maximum(speed, 1e-6))
+        return np.concatenate([vel, np.zeros((len(obs), 1), np.float32)], axis=1).astype(np.float32)
+
+
+def record_demos(env, controller: GoalSeekingController, writer: TrajectoryWriter, episodes: int) -> Dict[str, float]:
+    """Run `controller` for `episodes` episodes of a parallel env, recording into `writer`."""
+    env = RecordingEnv(env, writer)
+    for _ in range(int(episodes)):
+        obs, _ = env.reset()
+        while env.agents:
+            live = list(env.agents)
+            acts = controller.act(np.stack([obs[a] for a in live]))
+            obs, *_ = env.step({a: acts[i] for i, a in enumerate(live)})
+    writer.close()
+    return writer.stats()
+
+
+class _ShuffleBuffer:
+    """Fixed-capacity row pool; minibatches are drawn uniformly from everything it holds."""
+    def __init__(self, capacity: int, rng: np.random.Generator):
+        self.capacity = int(capacity)
+        self.rng = rng
+        self.cols: Dict[str, np.ndarray] = {}
+        self.n = 0
+
+    def add(self, cols: Dict[str, np.ndarray], batch_size: int) -> Iterator[Dict[str, np.ndarray]]:
+        """Insert a decoded chunk, emitting a minibatch whenever the pool is full."""
+        if not self.cols:
+            self.cols = {k: np.empty((self.capacity, *v.shape[1:]), dtype=v.dtype) for k, v in cols.items()}
+        rows = len(next(iter(cols.values())))
+        start = 0
+        while start < rows:
+            if self.n == self.capacity:
+                yield self.sample(batch_size)
+            take = min(rows - start, self.capacity - self.n)
+            for k, v in cols.items():
+                self.cols[k][self.n:self.n + take] = v[start:start + take]
+            self.n += take
+            start += take
+
+    def sample(self, batch_size: int) -> Dict[str, np.ndarray]:
+        """Remove and return `batch_size` random rows (the tail rows move into the holes)."""
+        b = min(int(batch_size), self.n)
+        idx = self.rng.choice(self.n, b, replace=False)
+        out = {k: v[idx] for k, v in self.cols.items()}
+        tail = np.arange(self.n - b, self.n)
+        holes = idx[idx < self.n - b]
+        fillers = tail[~np.isin(tail, idx)]
+        for v in self.cols.values():
+            v[holes] = v[fillers]
+        self.n -= b
+        return out
+
+
+class ShuffledBatchStream:
+    """Shuffled, prefetched minibatches over a `TrajectoryDataset` with bounded memory.
+
+    Per epoch, chunks are visited in a random order and decoded by `num_workers` threads with up
+    to `prefetch_chunks` in flight; rows pass through a `shuffle_rows` shuffle buffer and ready
+    minibatches (float32 tensors) wait in a queue of `prefetch_batches`. Iterating yields
+    {field: tensor}; `stats()` reports how long the consumer waited for data.
+    """
+    def __init__(self, dataset: TrajectoryDataset, batch_size: int, shuffle_rows: int = 65536, epochs: int = 1,
+                 num_workers: int = 2, prefetch_chunks: int = 4, prefetch_batches: int = 4, seed: int = 0,
+                 fields: Sequence[str] = ("obs", "action")):
+        self.dataset = dataset
+        self.batch_size = int(batch_size)
+        self.shuffle_rows = max(int(shuffle_rows), self.batch_size)
+        self.epochs = int(epochs)
+        self.num_workers = max(1, int(num_workers))
+        self.prefetch_chunks = max(1, int(prefetch_chunks))
+        self.prefetch_batches = max(1, int(prefetch_batches))
+        self.seed = seed
+        self.fields = tuple(fields)
+        self.pin_memory = torch.cuda.is_available()
+        self.chunks_read = 0
+        self.rows_read = 0
+        self.wait_s = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"chunks": self.chunks_read, "rows": self.rows_read, "wait_s": self.wait_s}
+
+    def _decode(self, i: int) -> Dict[str, np.ndarray]:
+        # the copy out of the memory map is where the disk is actually read
+        return {k: np.array(v, dtype=np.float32) for k, v in self.dataset.chunk(i, self.fields).items()}
+
+    def _to_tensors(self, batch: Dict[str, np.ndarray]) -> Dict[str, torch.Tensor]:
+        out = {k: torch.from_numpy(v) for k, v in batch.items()}
+        return {k: v.pin_memory() for k, v in out.items()} if self.pin_memory else out
+
+    def _produce(self, out: "queue.Queue", stop: threading.Event) -> None:
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        rng = np.random.default_rng(self.seed)
+        buf = _ShuffleBuffer(self.shuffle_rows, rng)
+        try:
+            with ThreadPoolExecutor(self.num_workers, thread_name_prefix="bc-decode") as pool:
+                for _ in range(self.epochs):
+                    order = deque(rng.permutation(self.dataset.num_chunks).tolist())
+                    pending = deque()
+                    while order or pending:
+                        while order and len(pending) < self.prefetch_chunks:
+                            pending.append(pool.submit(self._decode, order.popleft()))
+                        cols = pending.popleft().result()
+                        self.chunks_read += 1
+                        self.rows_read += len(cols[self.fields[0]])
+                        for batch in buf.add(cols, self.batch_size):
+                            if not put(self._to_tensors(batch)):
+                                return
+                while buf.n:
+                    if not put(self._to_tensors(buf.sample(self.batch_size))):
+                        return
+            put(None)
+        except Exception as e:
+            put(e)
+
+    def __iter__(self) -> Iterator[Dict[str, torch.Tensor]]:
+        out: "queue.Queue" = queue.Queue(maxsize=self.prefetch_batches)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(out, stop), name="bc-prefetch", daemon=True)
+        producer.start()
+        try:
+            while True:
+                t0 = time.perf_counter()
+                item = out.get()
+                self.wait_s += time.perf_counter() - t0
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+
+
+def bc_update(model: ActorCritic, optimizer, batch: Dict[str, torch.Tensor], min_log_std: float) -> torch.Tensor:
+    """One behavior-cloning step: maximize the log-likelihood of the recorded actions."""
+    loss = -model.policy(batch["obs"]).log_prob(batch["action"]).sum(-1).mean()
+    optimizer.zero_grad(set_to_none=True)
+    loss.backward()
+    optimizer.step()
+    with torch.no_grad():
+        model.log_std.clamp_(min=min_log_std)
+    return loss.detach()
+
+
+def pretrain_bc(model: nn.Module, stream: ShuffledBatchStream, lr: float = 1e-3, min_std: float = 0.1,
+                device="cpu", log_every: int = 100) -> Dict[str, float]:
+    """Train the actor of `model` on every minibatch of `stream`; returns summary statistics."""
+    optimizer = optim.Adam(list(model.pi.parameters()) + [model.log_std], lr=lr)
+    min_log_std = math.log(min_std)
+    steps, loss_sum, t0 = 0, torch.zeros((), device=device), time.perf_counter()
+    for batch in stream:
+        batch = {k: v.to(device, non_blocking=True) for k, v in batch.items()}
+        loss = bc_update(model, optimizer, batch, min_log_std)
+        loss_sum += loss
+        steps += 1
+        if log_every and steps % log_every == 0:
+            print(f"bc step {steps}: nll={float(loss):.4f}")
+    return {"steps": steps, "nll": float(loss_sum) / max(steps, 1), "seconds": time.perf_counter() - t0,
+            **stream.stats()}
+
+
+def main():
+    env_cfg = EnvConfig()
+    cfg = PretrainConfig()
+    seed_everything(cfg.seed)
+    if cfg.demo_episodes > 0:
+        from ..envs.multi_drone_env import AirSimMultiDroneParallelEnv
+        env = AirSimMultiDroneParallelEnv(env_cfg)
+        controller = GoalSeekingController(env_cfg.v_max, env_cfg.jammer_radius)
+        print(f"recorded demos: {record_demos(env, controller, TrajectoryWriter(cfg.data_dir, env.possible_agents), cfg.demo_episodes)}")
+        env.close()
+
+    dataset = TrajectoryDataset(cfg.data_dir)
+    if len(dataset) == 0:
+        raise ValueError(f"no trajectories in {cfg.data_dir}")
+    fields = dataset.index[0]["fields"]
+    obs_dim, act_dim = fields["obs"][1][0], fields["action"][1][0]
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    # same architecture as train_ppo.py so the checkpoint loads there
+    model = ActorCritic(obs_dim, act_dim, hidden=128).to(device)
+    stream = ShuffledBatchStream(dataset, cfg.batch_size, cfg.shuffle_rows, cfg.epochs, cfg.num_workers,
+                                 cfg.prefetch_chunks, cfg.prefetch_batches, seed=cfg.seed)
+    stats = pretrain_bc(model, stream, cfg.lr, cfg.min_std, device=device)
+    print(f"pretrained on {len(dataset)} transitions x {cfg.epochs} epochs: {stats}")
+    save_checkpoint(cfg.checkpoint_path, model)
+
+
+if __name__ == "__main__":
+    main()
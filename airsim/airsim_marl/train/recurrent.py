@@ -0,0 +1,186 @@
+# airsim_marl/train/recurrent.py
+"""GRU actor-critic with chunked, burn-in BPTT over the time-major rollout buffer.
+
+The buffer stores, per agent, the hidden state the rollout policy held before each step and a
+flag marking episode starts. Training cuts the (T, A) rollout into fixed-length windows
+(`burn_in` + `seq_len` steps), gathered for all windows and agents at once with index arrays;
+burn-in steps only refresh the stored (stale) hidden state and carry no gradient or loss.
+"""
+from __future__ import annotations
+from typing import Dict, Tuple
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.distributions import Normal
+
+from .rollout import MARLRolloutBuffer
+
+
+class RecurrentActorCritic(nn.Module):
+    """Observation encoder -> GRU trunk -> policy mean / value heads."""
+    def __init__(self, obs_dim: int, act_dim: int, hidden=128):
+        super().__init__()
+        self.hidden = int(hidden)
+        self.enc = nn.Sequential(nn.Linear(obs_dim, hidden), nn.Tanh())
+        self.gru = nn.GRU(hidden, hidden)
+        self.pi = nn.Linear(hidden, act_dim)
+        self.v = nn.Linear(hidden, 1)
+        self.log_std = nn.Parameter(torch.zeros(act_dim))
+
+    def initial_state(self, n: int) -> np.ndarray:
+        return np.zeros((n, self.hidden), dtype=np.float32)
+
+    def step(self, x: torch.Tensor, h: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """One step for a batch: x (N, obs_dim), h (N, hidden) -> (mean, value, new h)."""
+        out, h_new = self.gru(self.enc(x).unsqueeze(0), h.unsqueeze(0))
+        return self.pi(out[0]), self.v(out[0]).squeeze(-1), h_new[0]
+
+    def forward_sequence(self, obs: torch.Tensor, h0: torch.Tensor, resets: torch.Tensor, live: torch.Tensor):
+        """Unroll over (L, B, obs_dim); returns (means (L, B, act_dim), values (L, B), final h).
+
+        `resets[t]` zeroes the hidden state before step t (episode start); where `live[t]` is
+        False (padding) the hidden state is carried through unchanged. Without resets or padding
+        inside the window the whole sequence runs as a single fused GRU call.
+        """
+        z = self.enc(obs)
+        if not bool(resets[1:].any()) and bool(live.all()):
+            out, h = self.gru(z, (h0 * (1.0 - resets[0]).unsqueeze(-1)).unsqueeze(0))
+            return self.pi(out), self.v(out).squeeze(-1), h[0]
+        h = h0
+        outs = []
+        for t in range(obs.shape[0]):
+            h = h * (1.0 - resets[t]).unsqueeze(-1)
+            out, h_new = self.gru(z[t:t + 1], h.unsqueeze(0))
+            h = torch.where(live[t].unsqueeze(-1), h_new[0], h)
+            outs.append(out[0])
+        out = torch.stack(outs)
+        return self.pi(out), self.v(out).squeeze(-1), h
+
+    @torch.inference_mode()
+    def act(self, obs: np.ndarray, h: np.ndarray, device="cpu", deterministic: bool = False):
+        """Batched rollout step; returns (actions, logps, values, new hidden) with one host transfer."""
+        x = torch.from_numpy(np.asarray(obs, dtype=np.float32)).to(device)
+        hx = torch.from_numpy(np.asarray(h, dtype=np.float32)).to(device)
+        mean, value, h_new = self.step(x, hx)
+        dist = Normal(mean, torch.exp(self.log_std))
+        action = mean if deterministic else dist.sample()
+        logp = dist.log_prob(action).sum(-1)
+        packed = torch.cat([action, logp.unsqueeze(-1), value.unsqueeze(-1), h_new], dim=-1).cpu().numpy()
+        k = action.shape[-1]
+        return packed[:, :k], packed[:, k], packed[:, k + 1], packed[:, k + 2:]
+
+    @torch.inference_mode()
+    def predict_values(self, obs: np.ndarray, h: np.ndarray, device="cpu") -> np.ndarray:
+        x = torch.from_numpy(np.asarray(obs, dtype=np.float32)).to(device)
+        hx = torch.from_numpy(np.asarray(h, dtype=np.float32)).to(device)
+        return self.step(x, hx)[1].cpu().numpy()
+
+
+class RecurrentRolloutBuffer(MARLRolloutBuffer):
+    """`MARLRolloutBuffer` plus per-agent GRU state before each step and episode-start flags."""
+    def __init__(self, obs_dim: int, act_dim: int, hidden: int, horizon: int, n_agents: int, **storage):
+        super().__init__(obs_dim, act_dim, horizon, n_agents, **storage)
+        self.hxs = np.zeros((self.max, self.n_agents, hidden), dtype=np.float32)
+        self.starts = np.zeros((self.max, self.n_agents), dtype=np.float32)
+
+    def reset(self):
+        super().reset()
+        self.starts[:] = 0.0
+
+    def add(self, rows, o, a, r, v, logp, term, trunc, boot=None, hxs=None, starts=None):
+        t = self.ptr
+        if not super().add(rows, o, a, r, v, logp, term, trunc, boot):
+            return False
+        self.hxs[t, rows] = hxs
+        self.starts[t] = 0.0
+        self.starts[t, rows] = 0.0 if starts is None else starts
+        return True
+
+    def as_sequences(self, seq_len: int, burn_in: int = 0, device="cpu", normalize_adv: bool = True) -> Dict[str, torch.Tensor]:
+        """Cut the rollout into windows of `burn_in + seq_len` steps, gathered in one indexing pass.
+
+        Window k trains on steps [k*seq_len, (k+1)*seq_len) of every agent column and replays the
+        `burn_in` steps before it. Returns time-major tensors (L, B) / (L, B, dim) with
+        B = n_windows * n_agents, the initial hidden states `h0` (B, hidden) and masks:
+        `live` (inside the rollout), `loss_mask` (valid and not burn-in), `resets` (episode starts).
+        """
+        T, A = self.ptr, self.n_agents
+        L = burn_in + seq_len
+        starts = np.arange(0, T, seq_len)
+        tidx = starts[:, None] - burn_in + np.arange(L)[None, :]          # (C, L)
+        live = (tidx >= 0) & (tidx < T)
+        ti = np.clip(tidx, 0, max(T - 1, 0))
+        train = live & (np.arange(L)[None, :] >= burn_in)
+
+        def gather(arr):
+            # (T, A, ...) -> (L, C * A, ...), windows-major along the batch axis
+            g = arr[ti]                                                   # (C, L, A, ...)
+            g = np.moveaxis(g, 1, 0)                                      # (L, C, A, ...)
+            return g.reshape(L, len(starts) * A, *arr.shape[2:])
+
+        def per_window(mask):
+            return np.repeat(mask.T, A, axis=1)                           # (L, C * A)
+
+        first = np.clip(starts - burn_in, 0, None)
+        arrays = {"obs": self.decode_obs(), "acts": self.acts, "logps": self.logps, "advs": self.advs,
+                  "rets": self.rets, "starts": self.starts}
+        out = {k: torch.from_numpy(np.ascontiguousarray(gather(arr))).to(device) for k, arr in arrays.items()}
+        out["resets"] = out.pop("starts")
+        valid = gather(self.valid) & per_window(train)
+        out["loss_mask"] = torch.from_numpy(np.ascontiguousarray(valid)).to(device)
+        out["live"] = torch.from_numpy(np.ascontiguousarray(per_window(live))).to(device)
+        out["h0"] = torch.from_numpy(self.hxs[first].reshape(len(starts) * A, -1)).to(device)
+        if normalize_adv and valid.sum() > 1:
+            m = out["loss_mask"]
+            a = out["advs"][m]
+            out["advs"] = torch.where(m, (out["advs"] - a.mean()) / (a.std() + 1e-8), torch.zeros_like(out["advs"]))
+        return out
+
+
+def recurrent_ppo_update(model: RecurrentActorCritic, optimizer, seqs: Dict[str, torch.Tensor], burn_in=0, clip_ratio=0.2,
+                         vf_coef=0.5, ent_coef=0.0, max_grad_norm=0.5, epochs=8, minibatch_seqs=64) -> Dict[str, float]:
+    """Clipped PPO over sequence windows from `RecurrentRolloutBuffer.as_sequences`.
+
+    Minibatches are sets of whole windows; the burn-in prefix is unrolled without gradient to
+    refresh the stored hidden state. Statistics are accumulated on-device, as in `ppo_update`.
+    """
+    B = seqs["obs"].shape[1]
+    device = seqs["obs"].device
+    stats = torch.zeros(5, device=device)
+    n_mb = 0
+    for _ in range(epochs):
+        perm = torch.randperm(B, device=device)
+        for start in range(0, B, minibatch_seqs):
+            mb = perm[start:start + minibatch_seqs]
+            obs, resets, live = seqs["obs"][:, mb], seqs["resets"][:, mb], seqs["live"][:, mb]
+            h = seqs["h0"][mb]
+            if burn_in:
+                with torch.no_grad():
+                    _, _, h = model.forward_sequence(obs[:burn_in], h, resets[:burn_in], live[:burn_in])
+            sl = slice(burn_in, None)
+            mean, v, _ = model.forward_sequence(obs[sl], h, resets[sl], live[sl])
+            mask = seqs["loss_mask"][sl][:, mb].float()
+            n = mask.sum().clamp(min=1.0)
+            dist = Normal(mean, torch.exp(model.log_std))
+            logps = dist.log_prob(seqs["acts"][sl][:, mb]).sum(-1)
+            log_ratio = logps - seqs["logps"][sl][:, mb]
+            ratio = torch.exp(log_ratio)
+            adv = seqs["advs"][sl][:, mb]
+            clip_adv = torch.clamp(ratio, 1.0 - clip_ratio, 1.0 + clip_ratio) * adv
+            pg_loss = -(torch.min(ratio * adv, clip_adv) * mask).sum() / n
+            v_loss = (((v - seqs["rets"][sl][:, mb]) ** 2) * mask).sum() / n
+            ent = (dist.entropy().sum(-1) * mask).sum() / n
+
+            loss = pg_loss + vf_coef * v_loss - ent_coef * ent
+            optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            nn.utils.clip_grad_norm_(model.parameters(), max_grad_norm)
+            optimizer.step()
+
+            with torch.no_grad():
+                approx_kl = (((ratio - 1.0) - log_ratio) * mask).sum() / n
+                clip_frac = (((ratio - 1.0).abs() > clip_ratio).float() * mask).sum() / n
+                stats += torch.stack([pg_loss, v_loss, ent, approx_kl, clip_frac]).detach()
+            n_mb += 1
+    values = (stats / max(n_mb, 1)).tolist()
+    return dict(zip(("pg_loss", "v_loss", "entropy", "approx_kl", "clip_frac"), values))
@@ -1,46 +1,167 @@
 # airsim_marl/train/rollout.py
 from __future__ import annotations
 import numpy as np
-from typing import Dict, List
+import torch
+from typing import Dict, Optional, Sequence, Tuple
+
+FLAG_FIELDS = ("terms", "truncs", "valid")
 
 class MARLRolloutBuffer:
-    """Simple on-policy buffer that concatenates steps from all agents into one big batch.
-    Assumes shared observation/action spaces across agents."""
-    def __init__(self, obs_dim: int, act_dim: int, horizon: int):
-        self.obs = np.zeros((horizon, obs_dim), dtype=np.float32)
-        self.acts = np.zeros((horizon, act_dim), dtype=np.float32)
-        self.rets = np.zeros((horizon,), dtype=np.float32)
-        self.rews = np.zeros((horizon,), dtype=np.float32)
-        self.vals = np.zeros((horizon,), dtype=np.float32)
-        self.logps = np.zeros((horizon,), dtype=np.float32)
-        self.advs = np.zeros((horizon,), dtype=np.float32)
-        self.dones = np.zeros((horizon,), dtype=np.float32)
+    """Time-major on-policy buffer of shape (T, A) for a shared policy.
+
+    Row t holds one env step, column a one agent (in `possible_agents` order). Agents that
+    already finished while others are still flying leave their column invalid (`valid=False`)
+    until the next reset; invalid entries carry no advantage and are skipped by `get`.
+    Arrays are allocated once and reused across iterations via `reset()`.
+
+    Storage is configurable to fit larger rollouts in the same RAM; computation is always float32:
+    - `obs_dtype`: e.g. float16 observations, upcast when read (`decode_obs`, `as_tensors`, `get`);
+    - `uint8_obs=(start, stop)`: observation columns holding features normalized to [0, 1]
+      (image/depth blocks) are stored quantized as uint8;
+    - `pack_flags`: terminated/truncated/valid flags bit-packed along the agent axis
+      (they are bool otherwise); `terms`/`truncs`/`valid` then return unpacked copies.
+    """
+    def __init__(self, obs_dim: int, act_dim: int, horizon: int, n_agents: int, obs_dtype=np.float32,
+                 pack_flags: bool = False, uint8_obs: Optional[Tuple[int, int]] = None):
+        T, A = int(horizon), int(n_agents)
+        self.obs_dim = int(obs_dim)
+        self.uint8_obs = tuple(uint8_obs) if uint8_obs else None
+        if self.uint8_obs:
+            s, e = self.uint8_obs
+            self._keep = np.r_[0:s, e:obs_dim]
+            self.obs_q = np.zeros((T, A, e - s), dtype=np.uint8)
+        else:
+            self._keep = None
+        self.obs = np.zeros((T, A, obs_dim if self._keep is None else len(self._keep)), dtype=obs_dtype)
+        self.acts = np.zeros((T, A, act_dim), dtype=np.float32)
+        self.rews = np.zeros((T, A), dtype=np.float32)
+        self.vals = np.zeros((T, A), dtype=np.float32)
+        self.logps = np.zeros((T, A), dtype=np.float32)
+        # value of the final observation, used to bootstrap truncated (not terminated) episodes
+        self.boot = np.zeros((T, A), dtype=np.float32)
+        self.advs = np.zeros((T, A), dtype=np.float32)
+        self.rets = np.zeros((T, A), dtype=np.float32)
+        self.pack_flags = bool(pack_flags)
+        shape = (T, (A + 7) // 8) if self.pack_flags else (T, A)
+        self._flags = {k: np.zeros(shape, dtype=np.uint8 if self.pack_flags else bool) for k in FLAG_FIELDS}
         self.ptr = 0
-        self.max = horizon
+        self.max = T
+        self.n_agents = A
+
+    # ---- flags ----
+    def _flag(self, name: str) -> np.ndarray:
+        arr = self._flags[name]
+        if not self.pack_flags:
+            return arr
+        return np.unpackbits(arr, axis=1, count=self.n_agents, bitorder="little").astype(bool)
 
-    def add(self, o, a, r, v, logp, done):
+    def _set_flag_row(self, name: str, t: int, rows, values) -> None:
+        if not self.pack_flags:
+            self._flags[name][t] = False
+            self._flags[name][t, rows] = values
+            return
+        row = np.zeros(self.n_agents, dtype=bool)
+        row[rows] = values
+        self._flags[name][t] = np.packbits(row, bitorder="little")
+
+    terms = property(lambda self: self._flag("terms"))
+    truncs = property(lambda self: self._flag("truncs"))
+    valid = property(lambda self: self._flag("valid"))
+
+    @property
+    def full(self) -> bool:
+        return self.ptr >= self.max
+
+    def reset(self):
+        self.ptr = 0
+        self._flags["valid"][:] = 0
+
+    def add(self, rows: Sequence[int], o, a, r, v, logp, term, trunc, boot: Optional[np.ndarray] = None):
+        """Write one env step for the agents at column indices `rows` (all other columns are invalid)."""
         if self.ptr >= self.max: return False
-        self.obs[self.ptr] = o
-        self.acts[self.ptr] = a
-        self.rews[self.ptr] = r
-        self.vals[self.ptr] = v
-        self.logps[self.ptr] = logp
-        self.dones[self.ptr] = float(done)
+        t = self.ptr
+        o = np.asarray(o, dtype=np.float32)
+        if self._keep is None:
+            self.obs[t, rows] = o
+        else:
+            s, e = self.uint8_obs
+            self.obs[t, rows] = o[..., self._keep]
+            self.obs_q[t, rows] = np.rint(np.clip(o[..., s:e], 0.0, 1.0) * 255.0).astype(np.uint8)
+        self.acts[t, rows] = a
+        self.rews[t, rows] = r
+        self.vals[t, rows] = v
+        self.logps[t, rows] = logp
+        self._set_flag_row("terms", t, rows, np.asarray(term) > 0)
+        self._set_flag_row("truncs", t, rows, np.asarray(trunc) > 0)
+        self._set_flag_row("valid", t, rows, True)
+        self.boot[t, rows] = 0.0 if boot is None else boot
         self.ptr += 1
         return True
 
-    def compute_returns_advantages(self, gamma=0.99, lam=0.95, last_val=0.0):
-        # GAE-Lambda with episode boundaries indicated by done flags
-        adv = 0.0
-        for t in reversed(range(self.ptr)):
-            next_nonterminal = 1.0 - self.dones[t]
-            delta = self.rews[t] + gamma * next_nonterminal * (self.vals[t+1] if t+1 < self.ptr else last_val) - self.vals[t]
-            adv = delta + gamma * lam * next_nonterminal * adv
+    def decode_obs(self) -> np.ndarray:
+        """Filled observations as float32 (ptr, A, obs_dim)."""
+        if self._keep is None:
+            return self.obs[:self.ptr].astype(np.float32, copy=False)
+        s, e = self.uint8_obs
+        out = np.empty((self.ptr, self.n_agents, self.obs_dim), dtype=np.float32)
+        out[..., self._keep] = self.obs[:self.ptr]
+        out[..., s:e] = self.obs_q[:self.ptr] * np.float32(1.0 / 255.0)
+        return out
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Bytes held per stored array (including subclass arrays), plus the total."""
+        out = {k: v.nbytes for k, v in vars(self).items() if isinstance(v, np.ndarray) and k != "_keep"}
+        out.update({k: v.nbytes for k, v in self._flags.items()})
+        out["total"] = sum(out.values())
+        return out
+
+    def footprint(self) -> str:
+        mem = self.memory_bytes()
+        parts = ", ".join(f"{k}={v / 2**20:.2f}" for k, v in mem.items() if k != "total")
+        return f"rollout buffer {self.max}x{self.n_agents}: {mem['total'] / 2**20:.2f} MiB ({parts})"
+
+    def compute_returns_advantages(self, gamma=0.99, lam=0.95, last_vals: Optional[np.ndarray] = None):
+        """GAE(lambda) as one backward scan over time, vectorized across agents.
+
+        - terminated: no bootstrap;
+        - truncated: bootstrap from `boot` (value of the final observation), trace cut;
+        - otherwise: bootstrap from the next row, or `last_vals` (A,) after the last row.
+        """
+        T = self.ptr
+        terms, truncs, valid = (self._flag(k)[:T].astype(np.float32) for k in FLAG_FIELDS)
+        nxt = np.zeros(self.n_agents, dtype=np.float32) if last_vals is None else np.asarray(last_vals, dtype=np.float32)
+        adv = np.zeros(self.n_agents, dtype=np.float32)
+        for t in reversed(range(T)):
+            next_v = np.where(truncs[t] > 0, self.boot[t], nxt)
+            nonterminal = 1.0 - terms[t]
+            cont = nonterminal * (1.0 - truncs[t])
+            delta = self.rews[t] + gamma * nonterminal * next_v - self.vals[t]
+            adv = (delta + gamma * lam * cont * adv) * valid[t]
             self.advs[t] = adv
-            self.rets[t] = self.advs[t] + self.vals[t]
+            nxt = self.vals[t]
+        self.rets[:T] = self.advs[:T] + self.vals[:T]
+
+    def as_tensors(self, device="cpu", normalize_adv: bool = True) -> Dict[str, torch.Tensor]:
+        """Valid transitions as flat float32 tensors on `device`, copied once per update.
+
+        Advantages are normalized here once over the whole batch rather than per minibatch.
+        """
+        mask = torch.from_numpy(self.valid[:self.ptr].reshape(-1)).to(device)
+        out = {}
+        for k, arr in (("obs", self.decode_obs()), ("acts", self.acts), ("rets", self.rets), ("advs", self.advs), ("logps", self.logps)):
+            flat = arr[:self.ptr].reshape(self.ptr * self.n_agents, *arr.shape[2:])
+            out[k] = torch.from_numpy(flat).to(device, non_blocking=True)[mask]
+        if normalize_adv and out["advs"].numel() > 1:
+            a = out["advs"]
+            out["advs"] = (a - a.mean()) / (a.std() + 1e-8)
+        return out
 
     def get(self, minibatch=1024):
-        idxs = np.random.permutation(self.ptr)
-        for start in range(0, self.ptr, minibatch):
+        flat = np.flatnonzero(self.valid[:self.ptr].reshape(-1))
+        idxs = np.random.permutation(flat)
+        obs = self.decode_obs().reshape(-1, self.obs_dim)
+        acts = self.acts[:self.ptr].reshape(-1, self.acts.shape[-1])
+        rets, advs, logps = (x[:self.ptr].reshape(-1) for x in (self.rets, self.advs, self.logps))
+        for start in range(0, len(idxs), minibatch):
             mb = idxs[start:start+minibatch]
-            yield (self.obs[mb], self.acts[mb], self.rets[mb], self.advs[mb], self.logps[mb])
+            yield (obs[mb], acts[mb], rets[mb], advs[mb], logps[mb])
@@ -1,84 +1,195 @@
 # airsim_marl/train/train_ppo.py
 from __future__ import annotations
+from dataclasses import replace
 import numpy as np
 import torch
 import torch.optim as optim
 
 from ..config import EnvConfig, PPOConfig
+from ..data.trajectory import RecordingEnv, TrajectoryWriter
 from ..envs.multi_drone_env import AirSimMultiDroneParallelEnv
 from .rollout import MARLRolloutBuffer
-from .ppo import ActorCritic, ppo_update
+from . import distributed as ddp
+from .mappo import MAPPOActorCritic, MAPPORolloutBuffer, critic_inputs, global_state_dim
+from .ppo import ActorCritic, init_from_checkpoint, ppo_update, save_checkpoint
+from .recurrent import RecurrentActorCritic, RecurrentRolloutBuffer, recurrent_ppo_update
 
 def main():
     env_cfg = EnvConfig()
+    ppo_cfg = PPOConfig()
+
+    # data-parallel mode: each rank collects its own rollout shard and gradients are averaged
+    distributed = ddp.launched_distributed()
+    rank, world = ddp.init_distributed(ppo_cfg.dist_backend) if distributed else (0, 1)
+    if distributed and ppo_cfg.recurrent:
+        raise ValueError("the data-parallel learner does not support recurrent policies")
+    if ppo_cfg.rank_ports:
+        env_cfg = replace(env_cfg, port=int(ppo_cfg.rank_ports[rank % len(ppo_cfg.rank_ports)]))
+    # identical model init on every rank (also broadcast below); per-rank seed for sampling
+    ddp.seed_everything(ppo_cfg.seed)
+
     env = AirSimMultiDroneParallelEnv(env_cfg)
+    if ppo_cfg.record_dir:
+        root = f"{ppo_cfg.record_dir}/rank{rank}" if distributed else ppo_cfg.record_dir
+        env = RecordingEnv(env, TrajectoryWriter(root, env.possible_agents, ppo_cfg.record_chunk_steps))
 
     # shared policy across agents
     obs_dim = env.observation_space(env.agents[0]).shape[0]
     act_dim = env.action_space(env.agents[0]).shape[0]
 
-    ppo_cfg = PPOConfig()
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = ActorCritic(obs_dim, act_dim, hidden=128).to(device)
+    device = torch.device("cpu" if distributed else ("cuda" if torch.cuda.is_available() else "cpu"))
+    # (T, A) buffer allocated once; columns follow possible_agents
+    col = {a: i for i, a in enumerate(env.possible_agents)}
+    centralized, recurrent = ppo_cfg.centralized_critic, ppo_cfg.recurrent
+    storage = dict(obs_dtype=np.dtype(ppo_cfg.buffer_obs_dtype), pack_flags=ppo_cfg.buffer_pack_flags,
+                   uint8_obs=tuple(ppo_cfg.buffer_uint8_obs) or None)
+    if centralized and recurrent:
+        raise ValueError("centralized_critic and recurrent cannot be combined")
+    if recurrent:
+        model = RecurrentActorCritic(obs_dim, act_dim, hidden=128).to(device)
+        buf = RecurrentRolloutBuffer(obs_dim, act_dim, model.hidden, ppo_cfg.rollout_horizon, len(col), **storage)
+    elif centralized:
+        # MAPPO: critic sees the global state built from all agents' latest observations
+        state_dim = global_state_dim(len(col))
+        model = MAPPOActorCritic(obs_dim, act_dim, state_dim, hidden=128).to(device)
+        buf = MAPPORolloutBuffer(obs_dim, act_dim, state_dim, ppo_cfg.rollout_horizon, len(col), **storage)
+    else:
+        model = ActorCritic(obs_dim, act_dim, hidden=128).to(device)
+        buf = MARLRolloutBuffer(obs_dim, act_dim, ppo_cfg.rollout_horizon, len(col), **storage)
+    if ppo_cfg.init_checkpoint:
+        # e.g. behavior-cloning pretraining (pretrain.py); rank 0's weights are broadcast below
+        loaded = init_from_checkpoint(model, ppo_cfg.init_checkpoint, device)
+        if rank == 0:
+            print(f"initialized {len(loaded)} tensors from {ppo_cfg.init_checkpoint}")
     optimiz = optim.Adam(model.parameters(), lr=ppo_cfg.lr)
+    if rank == 0:
+        print(buf.footprint())
+    if distributed:
+        ddp.broadcast_parameters(model)
+        ddp.seed_everything(ppo_cfg.seed + rank)
 
-    rng = np.random.default_rng(ppo_cfg.seed)
+    rng = np.random.default_rng(ppo_cfg.seed + rank)
     total_steps = 0
 
+    obs, infos = env.reset()
+    # latest observation of every possible agent (finished agents keep their last one)
+    all_obs = np.zeros((len(col), obs_dim), dtype=np.float32)
+    for a, o in obs.items():
+        all_obs[col[a]] = o
+    if recurrent:
+        # per-agent GRU state and episode-start flags, reset with the env
+        hx = model.initial_state(len(col))
+        fresh = np.ones(len(col), dtype=np.float32)
+
     while total_steps < ppo_cfg.total_steps:
-        buf = MARLRolloutBuffer(obs_dim, act_dim, ppo_cfg.rollout_horizon * len(env.agents))
-
-        obs, infos = env.reset()
-        done_flags = {a: False for a in env.agents}
-
-        # Collect
-        while buf.ptr < buf.max:
-            # per-agent action
-            acts = {}
-            for a in env.agents:
-                if done_flags[a]:
-                    # dummy no-op if already done
-                    acts[a] = np.zeros(act_dim, dtype=np.float32)
-                    continue
-                o = obs[a]
-                with torch.no_grad():
-                    dist = model.policy(torch.as_tensor(o, dtype=torch.float32, device=device).unsqueeze(0))
-                    action = dist.sample()[0].cpu().numpy()
-                    logp = dist.log_prob(torch.as_tensor(action, dtype=torch.float32, device=device)).sum(-1).cpu().item()
-                    v = model.value(torch.as_tensor(o, dtype=torch.float32, device=device).unsqueeze(0)).cpu().item()
-                acts[a] = action.astype(np.float32)
-                # temporarily stash for buffer after env.step: store per-agent tuples
-                obs[a] = (o, action, logp, v)
-
-            next_obs, rews, terms, truncs, infos = env.step({a: (obs[a][1] if isinstance(obs[a], tuple) else acts[a]) for a in env.agents})
-
-            # write to buffer
-            for a in env.agents:
-                o, act, logp, v = obs[a] if isinstance(obs[a], tuple) else (next_obs[a], acts[a], 0.0, 0.0)
-                r = rews[a]
-                done = terms[a] or truncs[a]
-                buf.add(o, act, r, v, logp, done)
-                done_flags[a] = done
+        buf.reset()
+        steps_start = total_steps
+
+        # Collect (env.agents only holds live agents; finished ones are dropped by the env)
+        while not buf.full:
+            # one fused forward for all live agents, single host transfer
+            live = list(env.agents)
+            rows = [col[a] for a in live]
+            obs_batch = np.stack([obs[a] for a in live])
+            if centralized:
+                alive = env.active_mask()
+                state = critic_inputs(all_obs, alive)[rows]
+                actions, logps, vals = model.act(obs_batch, state, device=device)
+            elif recurrent:
+                h_prev = hx[rows]
+                actions, logps, vals, hx[rows] = model.act(obs_batch, h_prev, device=device)
+            else:
+                actions, logps, vals = model.act(obs_batch, device=device)
+            acts = {a: actions[i] for i, a in enumerate(live)}
+
+            next_obs, rews, terms, truncs, infos = env.step(acts)
+            for a in live:
+                all_obs[col[a]] = next_obs[a]
+
+            term = np.array([terms[a] for a in live], dtype=np.float32)
+            trunc = np.array([truncs[a] and not terms[a] for a in live], dtype=np.float32)
+            boot = None
+            if trunc.any():
+                # bootstrap truncated episodes from the value of their final observation
+                cut = np.flatnonzero(trunc)
+                boot = np.zeros(len(live), dtype=np.float32)
+                if centralized:
+                    boot[cut] = model.predict_values(critic_inputs(all_obs, alive)[[rows[i] for i in cut]], device=device)
+                elif recurrent:
+                    boot[cut] = model.predict_values(np.stack([next_obs[live[i]] for i in cut]), hx[[rows[i] for i in cut]], device=device)
+                else:
+                    boot[cut] = model.predict_values(np.stack([next_obs[live[i]] for i in cut]), device=device)
+            extra = {}
+            if centralized:
+                extra = {"state": state}
+            elif recurrent:
+                extra = {"hxs": h_prev, "starts": fresh[rows]}
+                fresh[rows] = 0.0
+            buf.add(rows, obs_batch, actions, np.array([rews[a] for a in live], dtype=np.float32),
+                    vals, logps, term, trunc, boot, **extra)
 
             obs = next_obs
-            total_steps += len(env.agents)
+            total_steps += len(acts)
 
-            if all(done_flags.values()):
+            if not env.agents:
                 # reset to continue filling rollout
                 obs, infos = env.reset()
-                done_flags = {a: False for a in env.agents}
-
-        # GAE and update
-        buf.compute_returns_advantages(gamma=ppo_cfg.gamma, lam=ppo_cfg.gae_lambda, last_val=0.0)
-        def data_iter():
-            return buf.get(minibatch=ppo_cfg.minibatch_size)
-        ppo_update(model, optimiz, data_iter, clip_ratio=ppo_cfg.clip_ratio,
-                   vf_coef=ppo_cfg.vf_coef, ent_coef=ppo_cfg.ent_coef,
-                   max_grad_norm=ppo_cfg.max_grad_norm, epochs=ppo_cfg.update_epochs, device=device)
-
-        print(f"Trained on {total_steps} steps so far.")
-
+                for a, o in obs.items():
+                    all_obs[col[a]] = o
+                if recurrent:
+                    hx[:] = 0.0
+                    fresh[:] = 1.0
+
+        if distributed:
+            # count steps over all ranks so every rank runs the same number of updates
+            total_steps = steps_start + int(ddp.sum_across_ranks(total_steps - steps_start))
+
+        # GAE (bootstrapping still-running agents from their current value) and update
+        last_vals = np.zeros(len(col), dtype=np.float32)
+        if env.agents:
+            rows = [col[a] for a in env.agents]
+            if centralized:
+                last_vals[rows] = model.predict_values(critic_inputs(all_obs, env.active_mask())[rows], device=device)
+            elif recurrent:
+                last_vals[rows] = model.predict_values(np.stack([obs[a] for a in env.agents]), hx[rows], device=device)
+            else:
+                last_vals[rows] = model.predict_values(np.stack([obs[a] for a in env.agents]), device=device)
+        buf.compute_returns_advantages(gamma=ppo_cfg.gamma, lam=ppo_cfg.gae_lambda, last_vals=last_vals)
+        if recurrent:
+            seqs = buf.as_sequences(ppo_cfg.seq_len, ppo_cfg.burn_in, device=device)
+            stats = recurrent_ppo_update(model, optimiz, seqs, burn_in=ppo_cfg.burn_in, clip_ratio=ppo_cfg.clip_ratio,
+                                         vf_coef=ppo_cfg.vf_coef, ent_coef=ppo_cfg.ent_coef,
+                                         max_grad_norm=ppo_cfg.max_grad_norm, epochs=ppo_cfg.update_epochs,
+                                         minibatch_seqs=ppo_cfg.minibatch_seqs)
+        else:
+            batch = buf.as_tensors(device, normalize_adv=not distributed)
+            dist_kw = {}
+            if distributed:
+                batch["advs"] = ddp.normalize_advantages(batch["advs"])
+                dist_kw = dict(grad_hook=ddp.allreduce_gradients,
+                               num_minibatches=ddp.global_num_minibatches(batch["obs"].shape[0], ppo_cfg.minibatch_size))
+            if centralized:
+                # the centralized critic regresses normalized returns
+                model.value_norm.update(batch["rets"])
+                if distributed:
+                    ddp.average_buffers(model.value_norm)
+                batch["rets"] = model.value_norm.normalize(batch["rets"])
+            stats = ppo_update(model, optimiz, batch, clip_ratio=ppo_cfg.clip_ratio,
+                               vf_coef=ppo_cfg.vf_coef, ent_coef=ppo_cfg.ent_coef,
+                               max_grad_norm=ppo_cfg.max_grad_norm, epochs=ppo_cfg.update_epochs,
+                               minibatch_size=ppo_cfg.minibatch_size, **dist_kw)
+
+        if rank == 0:
+            print(f"Trained on {total_steps} steps so far. "
+                  f"pg_loss={stats['pg_loss']:.4f} v_loss={stats['v_loss']:.4f} kl={stats['approx_kl']:.4f}")
+
+    if rank == 0:
+        save_checkpoint(ppo_cfg.checkpoint_path, model)
     env.close()
+    if ppo_cfg.record_dir:
+        print(f"[rank {rank}] recorded trajectories: {env.writer.stats()}")
+    if distributed:
+        ddp.shutdown_distributed()
 
 if __name__ == "__main__":
     main()
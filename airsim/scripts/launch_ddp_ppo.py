@@ -0,0 +1,44 @@
+# scripts/launch_ddp_ppo.py
+"""启动数据并行 PPO learner（CPU，gloo 后端）。
+
+每个 rank 一个进程，驱动各自的仿真器（`PPOConfig.rank_ports`），梯度经 all-reduce 平均。
+
+单机 4 进程：
+    python airsim/scripts/launch_ddp_ppo.py --nproc 4
+两台机器各 4 进程（分别在两台机器上运行，node-rank 为 0/1）：
+    python airsim/scripts/launch_ddp_ppo.py --nproc 4 --nnodes 2 --node-rank 0 --master-addr 10.0.0.1
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# 旧训练包位于 airsim/ 下，子进程通过 PYTHONPATH 找到它
+airsim_dir = Path(__file__).resolve().parents[1]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="数据并行 PPO learner 启动器")
+    ap.add_argument("--nproc", type=int, default=2, help="每个节点的进程数")
+    ap.add_argument("--nnodes", type=int, default=1)
+    ap.add_argument("--node-rank", type=int, default=0)
+    ap.add_argument("--master-addr", default="127.0.0.1")
+    ap.add_argument("--master-port", type=int, default=29500)
+    ap.add_argument("--threads", type=int, default=1, help="每个进程的 torch 计算线程数（OMP_NUM_THREADS）")
+    args = ap.parse_args(argv)
+
+    # 每进程线程数需在子进程导入 torch 之前设定，避免多个 rank 争抢同一批核心
+    os.environ["OMP_NUM_THREADS"] = str(args.threads)
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [str(airsim_dir), os.environ.get("PYTHONPATH")]))
+
+    from torch.distributed.run import main as torchrun
+    torchrun([
+        f"--nproc_per_node={args.nproc}", f"--nnodes={args.nnodes}", f"--node_rank={args.node_rank}",
+        f"--master_addr={args.master_addr}", f"--master_port={args.master_port}",
+        "-m", "airsim_marl.train.train_ppo",
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
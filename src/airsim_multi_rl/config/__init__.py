@@ -22,6 +22,9 @@ class RewardWeights:
     success_bonus: float = 100.0
     collision_penalty: float = 50.0
     oob_penalty: float = 20.0
+    # 机间接近（仅在 proximity.enabled 时生效）：近失一次性扣分、间隔不足按差值线性扣分
+    near_miss_penalty: float = 10.0
+    separation_penalty: float = 0.5
 
 
 @dataclass
@@ -42,10 +45,34 @@ class EnvConfig:
     jammer_radius: float = 6.0
     world_bounds: Bounds = ((-60.0, 60.0), (-60.0, 60.0), (-25.0, -1.0))
     jammer_patterns: List[str] = field(default_factory=lambda: ["Jammer*", "JammerActor*", "BP_Jammer*"])
+    # 动作重复：每个策略步推进 action_repeat 个 dt（1 为关闭）
+    action_repeat: int = 1
+    # 动作重复模式：single（一条 action_repeat*dt 的长指令）| substeps（逐 dt 子步锁步，奖励累加、按子步判定终止）
+    action_repeat_mode: str = "single"
     # 干扰惩罚模式：distance 或 power（默认 distance）
     jammer_penalty_mode: str = "distance"
     # UE 蓝图 RPC 配置（用于查询干扰功率）
     ue_rpc: "UERPCConfig" = field(default_factory=lambda: UERPCConfig())
+    # AirSim 多连接池配置（不同载具的 RPC 并行）
+    client_pool: "ClientPoolConfig" = field(default_factory=lambda: ClientPoolConfig())
+    # 航位推算配置（中间步外推状态，减少状态 RPC）
+    dead_reckoning: "DeadReckoningConfig" = field(default_factory=lambda: DeadReckoningConfig())
+    # 摄像头批量抓图配置（render/录制/视觉观测共用）
+    camera: "CameraConfig" = field(default_factory=lambda: CameraConfig())
+    # 异步帧录制配置（runners/recorder.py）
+    recorder: "RecorderConfig" = field(default_factory=lambda: RecorderConfig())
+    # 深度扇区观测配置（障碍感知）
+    depth_obs: "DepthObsConfig" = field(default_factory=lambda: DepthObsConfig())
+    # 离线占据栅格与射线测距观测配置（每步无仿真 I/O）
+    occupancy: "OccupancyConfig" = field(default_factory=lambda: OccupancyConfig())
+    # 本地机间接近检测配置（近失/间隔奖励与碰撞 RPC 按需查询）
+    proximity: "ProximityConfig" = field(default_factory=lambda: ProximityConfig())
+    # 多竞技场布局（envs/arena.py）：为空表示单一环境
+    arenas: List["ArenaConfig"] = field(default_factory=list)
+    # 多服务端分片：启用后忽略 ip/port 与 client_pool，各载具连接其所属端点
+    sharding: "ShardingConfig" = field(default_factory=lambda: ShardingConfig())
+    # 适配层/UE HTTP 调用插桩（按方法与载具统计次数、字节数与延迟直方图）
+    instrumentation: "InstrumentationConfig" = field(default_factory=lambda: InstrumentationConfig())
 
     spawn_points: Dict[str, Vec3] = field(
         default_factory=lambda: {
@@ -88,6 +115,209 @@ class UERPCConfig:
     query_every_n_steps: int = 1
 
 
+@dataclass
+class ClientPoolConfig:
+    """AirSim 多连接池配置。
+
+    当 enabled=True 时，适配层对同一服务端打开 `size` 条连接，按载具分片（shard）
+    或按调用线程（thread）分配连接，使不同载具的 RPC 可以并行。
+    """
+    enabled: bool = False
+    # 连接数（建议不超过载具数）
+    size: int = 4
+    # 分配方式：shard（按载具分片）| thread（按线程分配）
+    mode: str = "shard"
+    # 健康检查间隔（秒）；<=0 表示仅在调用失败时检查
+    health_check_interval: float = 10.0
+
+
+@dataclass
+class DeadReckoningConfig:
+    """航位推算配置。
+
+    当 enabled=True 时，环境每 `sync_every` 步（或预测误差上界超过 `max_error` 时）
+    才拉取一次完整状态，中间步按上一速度与指令速度外推位置与偏航。
+    """
+    enabled: bool = False
+    # 同步周期（步）：1 表示每步同步（等价于关闭）
+    sync_every: int = 5
+    # 预测误差上界阈值（米），超过即强制同步
+    max_error: float = 0.5
+    # 模型漂移增长率（米/秒），用于累计误差上界
+    error_growth: float = 0.2
+    # 终止判定前的强制同步裕量（米）：推算位置距目标/边界小于该值时拉取真实状态
+    termination_margin: float = 1.0
+
+
+@dataclass
+class CameraConfig:
+    """摄像头批量抓图配置。
+
+    每个载具一次 `simGetImages` 请求 `cameras × image_types` 路未压缩图像，
+    解码后写入预分配的 (A, C, H, W, 3) 环形缓冲。width/height 需与 settings.json 中的
+    CaptureSettings 一致，downscale 为整数步长降采样。
+    """
+    cameras: List[str] = field(default_factory=lambda: ["0"])
+    # 可选：Scene | Segmentation | DepthPerspective | DepthPlanar 等 AirSim ImageType 名称
+    image_types: List[str] = field(default_factory=lambda: ["Scene"])
+    width: int = 256
+    height: int = 144
+    downscale: int = 1
+    # 环形缓冲槽位数
+    ring_size: int = 4
+
+
+@dataclass
+class RecorderConfig:
+    """异步帧录制配置。
+
+    录制器在后台线程按 `rate_hz` 抓帧，每 `chunk_frames` 帧为一块交给编码线程池写盘；
+    队列或块缓冲不足时丢帧并计数，内存占用有上界。
+    `enabled` 为 True 时由训练侧（如 `scripts/smoke_test.py`）用 `runners.recorder.RecordedEnv` 包装环境录制。
+    """
+    enabled: bool = False
+    out_dir: str = "recordings"
+    rate_hz: float = 5.0
+    chunk_frames: int = 64
+    # 编码线程数
+    workers: int = 2
+    # 抓帧队列长度（帧）
+    max_queue: int = 16
+    # 同时等待编码的块数上限
+    max_pending_chunks: int = 2
+    # 输出格式：npz（压缩数组）| mp4（需要 imageio）
+    fmt: str = "npz"
+
+
+@dataclass
+class DepthObsConfig:
+    """深度扇区观测配置。
+
+    当 enabled=True 时，每步为各载具批量抓取一张浮点深度图，按 `sectors_v × sectors_h`
+    网格取各扇区最小深度（伪激光雷达），追加在基础 17 维观测之后。
+    图像尺寸沿用 `camera.width/height`。
+    """
+    enabled: bool = False
+    camera: str = "0"
+    # DepthPerspective | DepthPlanar
+    image_type: str = "DepthPerspective"
+    # 水平/垂直扇区数，特征维度为二者之积（行优先展开：先上后下、从左到右）
+    sectors_h: int = 16
+    sectors_v: int = 2
+    # 量程（米）：超出量程、无效像素均按量程处理
+    max_range: float = 20.0
+    # 为 True 时除以量程归一化到 [0, 1]
+    normalize: bool = True
+    # 抽样步长：先按整数步长降采样再做扇区最小池化
+    downscale: int = 4
+
+
+@dataclass
+class OccupancyConfig:
+    """静态障碍占据栅格与批量射线测距配置。
+
+    当 enabled=True 时，首次 reset 通过适配层导出场景中匹配 `patterns` 的静态物体
+    （位姿 + 缩放，按边长 `base_size` 的立方体近似），体素化为占据栅格；
+    之后每步在本地对全部载具批量射线求交，得到测距观测，不产生任何仿真 I/O。
+    """
+    enabled: bool = False
+    # 障碍物名称匹配模式（simListSceneObjects 正则）
+    patterns: List[str] = field(default_factory=lambda: ["Cube.*", "Wall.*", "Building.*"])
+    # 缩放为 1 时物体的边长（米），UE 基础立方体为 1m
+    base_size: float = 1.0
+    # 体素边长（米）
+    resolution: float = 0.5
+    # 地图名：非空时把栅格缓存到 cache_dir，之后同一地图直接加载、跳过场景导出
+    map_name: str = ""
+    cache_dir: str = ".cache/occupancy"
+    # 水平射线数（机体系，按偏航旋转）与各层俯仰角（度，正为向上）
+    n_rays: int = 16
+    elevations_deg: List[float] = field(default_factory=lambda: [0.0])
+    # 量程（米）
+    max_range: float = 20.0
+    # 为 True 时除以量程归一化到 [0, 1]
+    normalize: bool = True
+
+
+@dataclass
+class ProximityConfig:
+    """本地机间接近检测配置。
+
+    当 enabled=True 时，环境由步快照位置计算机间最近距离，产生近失/间隔奖励项，
+    且仅对接近其他载具、边界或障碍物（启用 occupancy 时）的载具查询碰撞 RPC。
+    """
+    enabled: bool = False
+    # 近失半径（米）：最近邻距离小于该值记为近失
+    near_miss_radius: float = 1.5
+    # 期望最小间隔（米）：小于该值按差值扣分
+    separation_radius: float = 4.0
+    # 碰撞 RPC 查询半径（米）：与其他载具/障碍物距离小于该值时查询
+    collision_poll_radius: float = 3.0
+    # 距边界小于该值（米）时查询碰撞 RPC
+    bounds_margin: float = 2.0
+    # 每 N 步对全部载具兜底查询一次碰撞（未建模的障碍物）；0 为关闭
+    poll_all_every: int = 10
+    # 近失是否终止回合
+    terminate_on_near_miss: bool = False
+    # 载具数超过该值时改用空间哈希
+    hash_threshold: int = 64
+
+
+@dataclass
+class ArenaConfig:
+    """竞技场配置：同一 UE 实例中互不干扰的一组载具。
+
+    组内载具的 spawn_points/goal_points 与 world_bounds 均按局部坐标解释，
+    世界坐标 = 局部坐标 + origin；Jammer 按局部坐标是否落在 world_bounds 内归属竞技场。
+    """
+    name: str = "arena0"
+    agents: List[str] = field(default_factory=list)
+    origin: Vec3 = (0.0, 0.0, 0.0)
+
+
+@dataclass
+class ShardEndpoint:
+    """一个 AirSim 服务端及其承载的载具。"""
+    ip: str = "127.0.0.1"
+    port: int = 41451
+    agents: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ShardingConfig:
+    """多服务端分片配置。
+
+    当 enabled=True 时，`endpoints` 中每个服务端承载 agent_names 的一个子集，
+    适配层并发下发指令与读取状态并对环境呈现为单个客户端；Jammer 位置统一取自第一个端点。
+    """
+    enabled: bool = False
+    endpoints: List[ShardEndpoint] = field(default_factory=list)
+    # 每个端点的连接数（端点内载具轮询分配）
+    connections_per_endpoint: int = 1
+    # 创建时核对各服务端 Jammer 名单/位置是否一致（不一致时告警）
+    check_jammers: bool = True
+    # 位置一致性容差（米）
+    jammer_tolerance: float = 0.5
+
+
+@dataclass
+class InstrumentationConfig:
+    """RPC 插桩配置。
+
+    当 enabled=True 时，`make_client` 为每条 AirSim 连接包装 `InstrumentedClient`，
+    JammerLocator 的 HTTP 请求也计入同一统计；未启用时不创建代理，调用路径无额外开销。
+    """
+    enabled: bool = False
+    # 延迟直方图分桶上界（毫秒），最后隐含 +Inf 桶
+    buckets_ms: List[float] = field(
+        default_factory=lambda: [0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0]
+    )
+    # 环境 close 时写出统计快照的路径；为空则不写
+    export_path: str = ""
+    # 快照格式：json | prometheus | csv
+    export_format: str = "json"
+
+
 def _deep_update(dst: dict, src: dict) -> dict:
     """递归合并字典：src 覆盖 dst（浅层与嵌套）。"""
     for k, v in src.items():
@@ -132,11 +362,56 @@ def load_env_config(user_yaml_path: Optional[str] = None, cli_overrides: Optiona
         return RewardWeights(**d) if d else RewardWeights()
     def as_rpc(d: dict) -> UERPCConfig:
         return UERPCConfig(**d) if d else UERPCConfig()
+    def as_pool(d: dict) -> ClientPoolConfig:
+        return ClientPoolConfig(**d) if d else ClientPoolConfig()
+    def as_dr(d: dict) -> DeadReckoningConfig:
+        return DeadReckoningConfig(**d) if d else DeadReckoningConfig()
+    def as_camera(d: dict) -> CameraConfig:
+        return CameraConfig(**d) if d else CameraConfig()
+    def as_recorder(d: dict) -> RecorderConfig:
+        return RecorderConfig(**d) if d else RecorderConfig()
+    def as_depth_obs(d: dict) -> DepthObsConfig:
+        return DepthObsConfig(**d) if d else DepthObsConfig()
+    def as_occupancy(d: dict) -> OccupancyConfig:
+        return OccupancyConfig(**d) if d else OccupancyConfig()
+    def as_proximity(d: dict) -> ProximityConfig:
+        return ProximityConfig(**d) if d else ProximityConfig()
+    def as_sharding(d: dict) -> ShardingConfig:
+        d = dict(d or {})
+        d["endpoints"] = [ShardEndpoint(**e) if isinstance(e, dict) else e for e in d.get("endpoints", [])]
+        return ShardingConfig(**d)
+    def as_instrumentation(d: dict) -> InstrumentationConfig:
+        return InstrumentationConfig(**d) if d else InstrumentationConfig()
+    def as_arena(d: dict) -> ArenaConfig:
+        d = dict(d)
+        if "origin" in d:
+            d["origin"] = tuple(d["origin"])
+        return ArenaConfig(**d)
 
     if "reward" in cfg_dict and isinstance(cfg_dict["reward"], dict):
         cfg_dict["reward"] = as_reward(cfg_dict["reward"])
     if "ue_rpc" in cfg_dict and isinstance(cfg_dict["ue_rpc"], dict):
         cfg_dict["ue_rpc"] = as_rpc(cfg_dict["ue_rpc"])
+    if "client_pool" in cfg_dict and isinstance(cfg_dict["client_pool"], dict):
+        cfg_dict["client_pool"] = as_pool(cfg_dict["client_pool"])
+    if "dead_reckoning" in cfg_dict and isinstance(cfg_dict["dead_reckoning"], dict):
+        cfg_dict["dead_reckoning"] = as_dr(cfg_dict["dead_reckoning"])
+    if "camera" in cfg_dict and isinstance(cfg_dict["camera"], dict):
+        cfg_dict["camera"] = as_camera(cfg_dict["camera"])
+    if "recorder" in cfg_dict and isinstance(cfg_dict["recorder"], dict):
+        cfg_dict["recorder"] = as_recorder(cfg_dict["recorder"])
+    if "depth_obs" in cfg_dict and isinstance(cfg_dict["depth_obs"], dict):
+        cfg_dict["depth_obs"] = as_depth_obs(cfg_dict["depth_obs"])
+    if "occupancy" in cfg_dict and isinstance(cfg_dict["occupancy"], dict):
+        cfg_dict["occupancy"] = as_occupancy(cfg_dict["occupancy"])
+    if "proximity" in cfg_dict and isinstance(cfg_dict["proximity"], dict):
+        cfg_dict["proximity"] = as_proximity(cfg_dict["proximity"])
+    if "sharding" in cfg_dict and isinstance(cfg_dict["sharding"], dict):
+        cfg_dict["sharding"] = as_sharding(cfg_dict["sharding"])
+    if "instrumentation" in cfg_dict and isinstance(cfg_dict["instrumentation"], dict):
+        cfg_dict["instrumentation"] = as_instrumentation(cfg_dict["instrumentation"])
+    if "arenas" in cfg_dict and isinstance(cfg_dict["arenas"], list):
+        cfg_dict["arenas"] = [as_arena(a) if isinstance(a, dict) else a for a in cfg_dict["arenas"]]
 
     # 使用 dataclasses.replace 兼容未知字段
     base = EnvConfig()
@@ -145,4 +420,4 @@ def load_env_config(user_yaml_path: Optional[str] = None, cli_overrides: Optiona
     return dataclasses.replace(base, **filtered)
 
 
-__all__ = ["EnvConfig", "RewardWeights", "UERPCConfig", "load_env_config"]
\ No newline at end of file
+__all__ = ["EnvConfig", "RewardWeights", "UERPCConfig", "ClientPoolConfig", "DeadReckoningConfig", "CameraConfig", "RecorderConfig", "DepthObsConfig", "OccupancyConfig", "ProximityConfig", "ArenaConfig", "ShardEndpoint", "ShardingConfig", "InstrumentationConfig", "load_env_config"]
\ No newline at end of file
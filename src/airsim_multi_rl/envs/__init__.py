@@ -4,8 +4,15 @@ __all__ = [
     "airsim_client",
     "jammer",
     "observation",
+    "depth_features",
+    "occupancy",
+    "proximity",
     "reward",
     "termination",
     "actions",
     "multi_drone_parallel",
+    "async_client",
+    "async_parallel",
+    "arena",
+    "instrumentation",
 ]
\ No newline at end of file
@@ -1,11 +1,119 @@
 from __future__ import annotations
-from typing import List, TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
 import importlib
+import itertools
+import threading
+import time
+import warnings
+import numpy as np
+
+from .instrumentation import InstrumentedClient, RpcMetrics, make_metrics
 
 if TYPE_CHECKING:
     import airsim  # 仅用于类型检查，不在运行时强制依赖
+    from ..config import EnvConfig
+
+VelocityCmd = Sequence[float]  # [vx, vy, vz, yaw_rate_deg]
+ImageSpec = Tuple[str, str]  # (camera_name, image_type)，image_type 为 AirSim ImageType 名称
+# 以浮点像素返回的图像类型（其余类型按 uint8 三通道返回）
+FLOAT_IMAGE_TYPES = frozenset({"DepthPerspective", "DepthPlanar"})
+
+
+def decode_image(resp, as_float: bool) -> Optional[np.ndarray]:
+    """将未压缩的 AirSim ImageResponse 解码为数组。
+
+    - 浮点图（深度）：返回 (H, W) float32；
+    - 其余：`np.frombuffer` 直接视图原始字节（零拷贝），返回 (H, W, 3) uint8 视图。
+    """
+    h, w = int(resp.height), int(resp.width)
+    if h <= 0 or w <= 0:
+        return None
+    if as_float:
+        img = np.asarray(resp.image_data_float, dtype=np.float32)
+        return img.reshape(h, w) if img.size == h * w else None
+    img1d = np.frombuffer(resp.image_data_uint8, dtype=np.uint8)
+    if img1d.size == 0 or img1d.size % (h * w) != 0:
+        return None
+    img = img1d.reshape(h, w, img1d.size // (h * w))
+    # 部分版本返回 4 通道，取前 3 通道
+    return img[:, :, :3]
+
+
+def transport_errors() -> Tuple[type, ...]:
+    """连接层错误类型（断连、超时）。参数错误与服务端返回的 RPC 错误不在其中。"""
+    try:
+        err = importlib.import_module("msgpackrpc.error")
+    except ImportError:
+        return (OSError,)
+    return (OSError, err.TimeoutError, err.TransportError)
+
+
+class VehicleBatchMixin:
+    """多载具批量接口的默认实现（串行）。
+
+    环境粘合层只调用批量接口；连接池/分片适配层可覆盖为并发实现，
+    DummyClient 等离线客户端混入本类即可获得一致的接口。
+    """
+
+    # 是否允许多线程并发调用（单连接 RPC 客户端不允许）
+    thread_safe: bool = False
+    # 插桩统计（instrumentation.py）；None 表示未插桩
+    metrics: Optional[RpcMetrics] = None
+
+    def move_velocity_batch(self, commands: Dict[str, VelocityCmd], duration: float) -> None:
+        """先为全部载具下发速度指令，再统一 join，使各机在同一 dt 内同步推进。
+
+        Args:
+            commands: 载具名 -> [vx, vy, vz, yaw_rate_deg]。
+            duration: 指令持续时间（秒）。
+        """
+        futs = []
+        for name, (vx, vy, vz, yaw_rate) in commands.items():
+            try:
+                futs.append(self.move_velocity(vx, vy, vz, yaw_rate, duration, vehicle_name=name))
+            except Exception:
+                continue
+        for fut in futs:
+            try:
+                fut.join()
+            except Exception:
+                pass
+
+    def hover_batch(self, vehicle_names: Iterable[str]) -> None:
+        """为多个载具各下发一次悬停指令并等待 join（用于停放已结束的智能体）。"""
+        futs = []
+        for n in vehicle_names:
+            try:
+                futs.append(self.hover(vehicle_name=n))
+            except Exception:
+                continue
+        for fut in futs:
+            try:
+                fut.join()
+            except Exception:
+                pass
 
-class AirSimClient:
+    def get_states(self, vehicle_names: Iterable[str]) -> Dict[str, Any]:
+        """批量查询多旋翼状态。"""
+        return {n: self.get_state(vehicle_name=n) for n in vehicle_names}
+
+    def get_collisions(self, vehicle_names: Iterable[str]) -> Dict[str, Any]:
+        """批量查询碰撞信息。"""
+        return {n: self.get_collision(vehicle_name=n) for n in vehicle_names}
+
+    def get_images_batch(self, vehicle_names: Iterable[str], specs: Sequence[ImageSpec]) -> Dict[str, List[Optional[np.ndarray]]]:
+        """批量抓图：每个载具一次 `get_images` 请求（包含全部摄像头与图像类型）。"""
+        out: Dict[str, List[Optional[np.ndarray]]] = {}
+        for n in vehicle_names:
+            try:
+                out[n] = self.get_images(n, specs)
+            except Exception:
+                out[n] = [None] * len(specs)
+        return out
+
+
+class AirSimClient(VehicleBatchMixin):
     """AirSim 适配层：封装连接/控制/状态方法，便于 mock。
 
     注意：环境中严禁直接使用 airsim 原生 client，只能通过本适配层调用。
@@ -26,6 +134,11 @@ class AirSimClient:
     def get_object_pose(self, name: str):
         return self.client.simGetObjectPose(name)
 
+    def get_object_scale(self, name: str) -> Tuple[float, float, float]:
+        """返回场景物体的缩放 (sx, sy, sz)。"""
+        s = self.client.simGetObjectScale(name)
+        return float(s.x_val), float(s.y_val), float(s.z_val)
+
     # ---- 载具控制 ----
     def set_vehicle_pose(self, pose, ignore_collision: bool, vehicle_name: str):
         return self.client.simSetVehiclePose(pose, ignore_collision, vehicle_name=vehicle_name)
@@ -86,30 +199,449 @@ class AirSimClient:
         return self.client.simGetCollisionInfo(vehicle_name=vehicle_name)
 
     # ---- 图像渲染 ----
+    def get_images(self, vehicle_name: str, specs: Sequence[ImageSpec]) -> List[Optional[np.ndarray]]:
+        """单次 `simGetImages` 请求获取一个载具的多路未压缩图像。
+
+        Args:
+            vehicle_name: 载具名。
+            specs: [(camera_name, image_type), ...]，image_type 如 "Scene"/"Segmentation"/"DepthPerspective"。
+
+        Returns:
+            与 specs 一一对应的数组列表（uint8 为 (H, W, 3) 视图，深度为 (H, W) float32）；解码失败的项为 None。
+        """
+        ImageType = self._airsim.ImageType
+        reqs = [
+            self._airsim.ImageRequest(cam, getattr(ImageType, t), t in FLOAT_IMAGE_TYPES, False)
+            for cam, t in specs
+        ]
+        resp = self.client.simGetImages(reqs, vehicle_name=vehicle_name) or []
+        out: List[Optional[np.ndarray]] = [None] * len(specs)
+        for i, (r, (_, t)) in enumerate(zip(resp, specs)):
+            out[i] = decode_image(r, t in FLOAT_IMAGE_TYPES)
+        return out
+
     def get_rgb_image(self, vehicle_name: str, camera_name: str = "0"):
         """获取指定载具与摄像头的 RGB 图像（numpy 数组）。
 
         说明：
-        - 使用 AirSim 的 `simGetImages` 请求 `ImageType.Scene`，pixels_as_float=False, compress=True。
-        - 返回形状约为 (H, W, 3) 的 uint8 数组；若失败返回 None。
+        - 通过 `get_images` 请求未压缩的 `ImageType.Scene`，按原始像素直接解码。
+        - 返回形状为 (H, W, 3) 的 uint8 数组；若失败返回 None。
         """
         try:
-            req = [
-                self._airsim.ImageRequest(camera_name, self._airsim.ImageType.Scene, False, True)
-            ]
-            resp = self.client.simGetImages(req, vehicle_name=vehicle_name)
-            if not resp:
-                return None
-            r0 = resp[0]
-            # 将压缩的 PNG 数据解码为数组；AirSim 提供 image_data_uint8 与 width/height
-            import numpy as _np
-            img1d = _np.frombuffer(r0.image_data_uint8, dtype=_np.uint8)
-            if img1d.size == 0:
-                return None
-            img_rgba = img1d.reshape((r0.height, r0.width, -1))
-            # 若返回 RGBA，取前 3 通道；否则直接返回
-            if img_rgba.shape[2] >= 3:
-                return img_rgba[:, :, :3]
-            return img_rgba
+            return self.get_images(vehicle_name, [(camera_name, "Scene")])[0]
         except Exception:
-            return None
\ No newline at end of file
+            return None
+
+
+class _LockedFuture:
+    """在连接锁内 join 的 Future 包装：同一连接上的 RPC 不允许跨线程交错。"""
+
+    def __init__(self, fut, lock: threading.Lock):
+        self._fut = fut
+        self._lock = lock
+
+    def join(self):
+        with self._lock:
+            return self._fut.join()
+
+
+class AirSimClientPool(AirSimClient):
+    """多连接 AirSim 适配层：对同一服务端打开多条 `MultirotorClient` 连接。
+
+    AirSim 的 RPC 客户端在单连接上串行处理请求，因此并发线程对不同载具的
+    `get_state` 仍会排队。本类维护 `size` 条连接，每条连接配一把锁，并支持两种分配方式：
+
+    - `shard`：按载具分片，载具首次出现时轮询绑定到某条连接，批量接口按连接分组并发执行；
+    - `thread`：按线程分配，每个调用线程固定使用一条连接（线程数多于连接数时共享并加锁）。
+
+    批量接口（`get_states` 等）在两种模式下都按载具分片并发。场景类查询（枚举/物体姿态）
+    固定走 0 号连接。调用因连接层错误（断连/超时）失败时通过 `ping` 做健康检查并重建失效连接；
+    其余错误直接抛出，由周期性健康检查兜底。
+    """
+
+    thread_safe = True
+
+    def __init__(
+        self,
+        ip: str,
+        port: int,
+        size: int = 4,
+        mode: str = "shard",
+        vehicle_names: Optional[Sequence[str]] = None,
+        health_check_interval: float = 10.0,
+        connect: Optional[Callable[[], AirSimClient]] = None,
+    ):
+        if mode not in ("shard", "thread"):
+            raise ValueError(f"unknown pool mode: {mode!r}")
+        self.mode = mode
+        self.health_check_interval = float(health_check_interval)
+        # 允许注入连接工厂，便于测试与分片适配层复用
+        self._connect = connect or (lambda: AirSimClient(ip, port))
+        self._conns: List[AirSimClient] = [self._connect_index(i) for i in range(max(1, int(size)))]
+        self._locks = [threading.Lock() for _ in self._conns]
+        self._airsim = getattr(self._conns[0], "_airsim", None)
+        self.client = getattr(self._conns[0], "client", None)
+        self._executor = ThreadPoolExecutor(max_workers=len(self._conns), thread_name_prefix="airsim-pool")
+        self._assign: Dict[str, int] = {}
+        self._assign_lock = threading.Lock()
+        self._rr = itertools.count()
+        self._local = threading.local()
+        self._last_health_check = time.monotonic()
+        self._transport_errors = transport_errors()
+        for name in vehicle_names or []:
+            self._shard_of(name)
+
+    # ---- 连接分配 ----
+    def _connect_index(self, idx: int) -> AirSimClient:
+        """创建（或重建）第 idx 条连接。"""
+        return self._connect()
+
+    @property
+    def size(self) -> int:
+        return len(self._conns)
+
+    def _shard_of(self, vehicle_name: str) -> int:
+        idx = self._assign.get(vehicle_name)
+        if idx is None:
+            with self._assign_lock:
+                idx = self._assign.setdefault(vehicle_name, next(self._rr) % self.size)
+        return idx
+
+    def _thread_index(self) -> int:
+        idx = getattr(self._local, "idx", None)
+        if idx is None:
+            idx = self._local.idx = next(self._rr) % self.size
+        return idx
+
+    def _index_for(self, vehicle_name: Optional[str]) -> int:
+        if self.mode == "thread":
+            return self._thread_index()
+        return 0 if vehicle_name is None else self._shard_of(vehicle_name)
+
+    def _run(self, idx: int, fn: Callable[[AirSimClient], Any]) -> Any:
+        """在指定连接的锁内执行调用；连接层错误时做一次健康检查（必要时重连）后抛出原异常。"""
+        with self._locks[idx]:
+            conn = self._conns[idx]
+            try:
+                return fn(conn)
+            except self._transport_errors:
+                # 参数错误或普通 RPC 错误不 ping：服务端卡死时避免每次失败再等一个 RPC 超时
+                self._check_locked(idx)
+                raise
+
+    def _call(self, vehicle_name: Optional[str], fn: Callable[[AirSimClient], Any]) -> Any:
+        return self._run(self._index_for(vehicle_name), fn)
+
+    # ---- 线程安全的 Future 接口 ----
+    def submit(self, method: str, *args, vehicle_name: str, **kwargs) -> Future:
+        """在线程池中异步调用适配层方法，返回 `concurrent.futures.Future`。"""
+        idx = self._index_for(vehicle_name)
+        return self._executor.submit(
+            self._run, idx, lambda c: getattr(c, method)(*args, vehicle_name=vehicle_name, **kwargs)
+        )
+
+    def map_vehicles(self, method: str, vehicle_names: Iterable[str], **kwargs) -> Dict[str, Any]:
+        """对多个载具并发调用同一方法；同一连接上的载具在一个任务内串行执行。"""
+        return self._fan_out(
+            vehicle_names, lambda conn, names: {n: getattr(conn, method)(vehicle_name=n, **kwargs) for n in names}
+        )
+
+    def _fan_out(self, vehicle_names: Iterable[str], task: Callable[[AirSimClient, List[str]], Any]) -> Dict[str, Any]:
+        self._maybe_health_check()
+        groups: Dict[int, List[str]] = {}
+        for n in vehicle_names:
+            groups.setdefault(self._shard_of(n), []).append(n)
+        if len(groups) <= 1:
+            out: Dict[str, Any] = {}
+            for idx, names in groups.items():
+                out.update(self._run(idx, lambda c: task(c, names)) or {})
+            return out
+        futs = [self._executor.submit(self._run, idx, lambda c, ns=names: task(c, ns)) for idx, names in groups.items()]
+        out = {}
+        for f in futs:
+            out.update(f.result() or {})
+        return out
+
+    # ---- 健康检查 ----
+    def _check_locked(self, idx: int) -> bool:
+        """在已持有 idx 连接锁的前提下 ping；失败则重建该连接。"""
+        try:
+            self._conns[idx].client.ping()
+            return True
+        except Exception:
+            pass
+        try:
+            self._conns[idx] = self._connect_index(idx)
+        except Exception:
+            pass
+        return False
+
+    def health_check(self) -> Dict[int, bool]:
+        """逐条连接 ping，返回 {连接序号: 是否健康}；不健康的连接会被重建。"""
+        status = {}
+        for idx in range(self.size):
+            with self._locks[idx]:
+                status[idx] = self._check_locked(idx)
+        self._last_health_check = time.monotonic()
+        return status
+
+    def _maybe_health_check(self) -> None:
+        if self.health_check_interval <= 0:
+            return
+        if time.monotonic() - self._last_health_check >= self.health_check_interval:
+            self.health_check()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    # ---- 场景/干扰源（固定走 0 号连接） ----
+    def list_scene_objects(self, pattern: str) -> List[str]:
+        return self._run(0, lambda c: c.list_scene_objects(pattern))
+
+    def get_object_pose(self, name: str):
+        return self._run(0, lambda c: c.get_object_pose(name))
+
+    def get_object_scale(self, name: str) -> Tuple[float, float, float]:
+        return self._run(0, lambda c: c.get_object_scale(name))
+
+    # ---- 载具控制 ----
+    def set_vehicle_pose(self, pose, ignore_collision: bool, vehicle_name: str):
+        return self._call(vehicle_name, lambda c: c.set_vehicle_pose(pose, ignore_collision, vehicle_name))
+
+    def set_vehicle_pose_xyz(self, x: float, y: float, z: float, ignore_collision: bool, vehicle_name: str):
+        return self._call(vehicle_name, lambda c: c.set_vehicle_pose_xyz(x, y, z, ignore_collision, vehicle_name))
+
+    def enable_api(self, enabled: bool, vehicle_name: str):
+        return self._call(vehicle_name, lambda c: c.enable_api(enabled, vehicle_name=vehicle_name))
+
+    def arm(self, armed: bool, vehicle_name: str):
+        return self._call(vehicle_name, lambda c: c.arm(armed, vehicle_name=vehicle_name))
+
+    def takeoff(self, vehicle_name: str):
+        idx = self._index_for(vehicle_name)
+        return _LockedFuture(self._run(idx, lambda c: c.takeoff(vehicle_name=vehicle_name)), self._locks[idx])
+
+    def hover(self, vehicle_name: str):
+        idx = self._index_for(vehicle_name)
+        return _LockedFuture(self._run(idx, lambda c: c.hover(vehicle_name=vehicle_name)), self._locks[idx])
+
+    def land(self, vehicle_name: str):
+        idx = self._index_for(vehicle_name)
+        return _LockedFuture(self._run(idx, lambda c: c.land(vehicle_name=vehicle_name)), self._locks[idx])
+
+    def spawn_and_takeoff(self, x: float, y: float, z: float, vehicle_name: str, ignore_collision: bool = True):
+        return self._call(vehicle_name, lambda c: c.spawn_and_takeoff(x, y, z, vehicle_name, ignore_collision))
+
+    def move_velocity(self, vx: float, vy: float, vz: float, yaw_rate_deg: float, duration: float, vehicle_name: str):
+        idx = self._index_for(vehicle_name)
+        fut = self._run(idx, lambda c: c.move_velocity(vx, vy, vz, yaw_rate_deg, duration, vehicle_name=vehicle_name))
+        return _LockedFuture(fut, self._locks[idx])
+
+    def get_state(self, vehicle_name: str):
+        return self._call(vehicle_name, lambda c: c.get_state(vehicle_name=vehicle_name))
+
+    def get_collision(self, vehicle_name: str):
+        return self._call(vehicle_name, lambda c: c.get_collision(vehicle_name=vehicle_name))
+
+    def get_images(self, vehicle_name: str, specs: Sequence[ImageSpec]) -> List[Optional[np.ndarray]]:
+        return self._call(vehicle_name, lambda c: c.get_images(vehicle_name, specs))
+
+    def get_rgb_image(self, vehicle_name: str, camera_name: str = "0"):
+        return self._call(vehicle_name, lambda c: c.get_rgb_image(vehicle_name=vehicle_name, camera_name=camera_name))
+
+    # ---- 批量接口（按连接分组并发） ----
+    def move_velocity_batch(self, commands: Dict[str, VelocityCmd], duration: float) -> None:
+        self._fan_out(commands.keys(), lambda c, names: c.move_velocity_batch({n: commands[n] for n in names}, duration))
+
+    def hover_batch(self, vehicle_names: Iterable[str]) -> None:
+        self._fan_out(vehicle_names, lambda c, names: c.hover_batch(names))
+
+    def get_states(self, vehicle_names: Iterable[str]) -> Dict[str, Any]:
+        return self._fan_out(vehicle_names, lambda c, names: c.get_states(names))
+
+    def get_collisions(self, vehicle_names: Iterable[str]) -> Dict[str, Any]:
+        return self._fan_out(vehicle_names, lambda c, names: c.get_collisions(names))
+
+    def get_images_batch(self, vehicle_names: Iterable[str], specs: Sequence[ImageSpec]) -> Dict[str, List[Optional[np.ndarray]]]:
+        return self._fan_out(vehicle_names, lambda c, names: c.get_images_batch(names, specs))
+
+
+class ShardedAirSimClient(AirSimClientPool):
+    """多服务端分片适配层：把 agent_names 的子集映射到不同的 AirSim 服务端。
+
+    每个端点打开 `connections_per_endpoint` 条连接，端点内的载具轮询绑定到这些连接；
+    载具只存在于其所属服务端，因此分配固定为 shard 模式。批量接口沿用连接池的按连接分组并发，
+    对环境呈现为单个适配层。场景类查询（枚举/物体位姿，即 Jammer 位置）固定走主分片
+    （第一个端点），保证各分片载具看到一致的 Jammer 坐标；`check_jammers` 用于核对各服务端场景是否一致。
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Tuple[str, int, Sequence[str]]],
+        connections_per_endpoint: int = 1,
+        health_check_interval: float = 10.0,
+        connect: Optional[Callable[[str, int], AirSimClient]] = None,
+        vehicle_names: Optional[Sequence[str]] = None,
+    ):
+        if not endpoints:
+            raise ValueError("ShardedAirSimClient requires at least one endpoint")
+        per = max(1, int(connections_per_endpoint))
+        self._endpoints = [(str(ip), int(port)) for ip, port, _ in endpoints]
+        self._endpoint_connect = connect or (lambda ip, port: AirSimClient(ip, port))
+        # 连接序号 -> 端点序号；载具 -> 连接序号（固定映射）
+        self._conn_endpoint = [e for e in range(len(self._endpoints)) for _ in range(per)]
+        fixed: Dict[str, int] = {}
+        for e, (_, _, agents) in enumerate(endpoints):
+            for j, a in enumerate(agents):
+                if a in fixed:
+                    raise ValueError(f"vehicle {a!r} assigned to more than one endpoint")
+                fixed[a] = e * per + j % per
+        # 建立连接前核对覆盖：缺失的载具否则要到 reset 中途的首次 RPC 才以 KeyError 暴露
+        missing = [a for a in vehicle_names or [] if a not in fixed]
+        if missing:
+            raise ValueError(f"vehicles not assigned to any endpoint: {missing}")
+        ip0, port0 = self._endpoints[0]
+        super().__init__(ip0, port0, size=len(self._conn_endpoint), mode="shard", health_check_interval=health_check_interval)
+        self._assign = fixed
+
+    def _connect_index(self, idx: int) -> AirSimClient:
+        ip, port = self._endpoints[self._conn_endpoint[idx]]
+        return self._endpoint_connect(ip, port)
+
+    def _shard_of(self, vehicle_name: str) -> int:
+        try:
+            return self._assign[vehicle_name]
+        except KeyError:
+            raise KeyError(f"vehicle {vehicle_name!r} is not assigned to any endpoint") from None
+
+    def endpoint_of(self, vehicle_name: str) -> Tuple[str, int]:
+        return self._endpoints[self._conn_endpoint[self._shard_of(vehicle_name)]]
+
+    def check_jammers(self, patterns: Sequence[str], tolerance: float = 0.5) -> List[str]:
+        """核对各服务端的 Jammer 名单与位置是否与主分片一致，返回不一致项的描述（一致时为空）。"""
+        first_conn = [self._conn_endpoint.index(e) for e in range(len(self._endpoints))]
+
+        def scan(conn: AirSimClient) -> Dict[str, np.ndarray]:
+            names = set()
+            for p in patterns:
+                try:
+                    names.update(conn.list_scene_objects(p))
+                except Exception:
+                    pass
+            out = {}
+            for n in sorted(names):
+                try:
+                    v = conn.get_object_pose(n).position
+                    out[n] = np.array([v.x_val, v.y_val, v.z_val], dtype=np.float32)
+                except Exception:
+                    continue
+            return out
+
+        futs = [self._executor.submit(self._run, idx, scan) for idx in first_conn]
+        scenes = [f.result() for f in futs]
+        ref = scenes[0]
+        issues: List[str] = []
+        for e, scene in enumerate(scenes[1:], start=1):
+            ep = "%s:%d" % self._endpoints[e]
+            for n in sorted(set(ref) ^ set(scene)):
+                issues.append(f"{ep}: jammer {n!r} {'missing' if n in ref else 'not on primary'}")
+            for n in sorted(set(ref) & set(scene)):
+                d = float(np.linalg.norm(ref[n] - scene[n]))
+                if d > float(tolerance):
+                    issues.append(f"{ep}: jammer {n!r} offset {d:.2f} m from primary")
+        return issues
+
+
+class ArenaClient:
+    """竞技场坐标适配层：把共享适配层包装为以竞技场原点为零点的局部坐标系。
+
+    同一 UE 实例中的多个竞技场各持有一个 ArenaClient，共享底层连接。
+    位置相关的调用（起飞/设置位姿/状态/物体位姿）在局部与世界坐标间平移换算，
+    速度、图像、碰撞等其余调用原样转发。返回的状态与位姿对象就地平移（每次 RPC 均为新对象）。
+    `set_vehicle_pose` 接收原生 Pose，仍按世界坐标处理。
+    """
+
+    def __init__(self, base: AirSimClient, origin: Sequence[float]):
+        self.base = base
+        self.origin = np.asarray(origin, dtype=np.float32)
+        self.thread_safe = bool(getattr(base, "thread_safe", False))
+
+    def __getattr__(self, name: str):
+        # 仅在常规属性查找失败时调用：未覆盖的方法直接转发到底层适配层
+        return getattr(self.base, name)
+
+    def localize(self, obj):
+        """把带 `position`（或 `kinematics_estimated.position`）的对象就地平移到局部坐标。"""
+        kin = getattr(obj, "kinematics_estimated", None)
+        p = kin.position if kin is not None else getattr(obj, "position", None)
+        if p is not None:
+            ox, oy, oz = (float(v) for v in self.origin)
+            p.x_val, p.y_val, p.z_val = p.x_val - ox, p.y_val - oy, p.z_val - oz
+        return obj
+
+    def localize_states(self, states: Dict[str, Any]) -> Dict[str, Any]:
+        for st in states.values():
+            self.localize(st)
+        return states
+
+    def _world(self, x: float, y: float, z: float) -> Tuple[float, float, float]:
+        ox, oy, oz = (float(v) for v in self.origin)
+        return float(x) + ox, float(y) + oy, float(z) + oz
+
+    # ---- 位置相关（局部 <-> 世界） ----
+    def get_object_pose(self, name: str):
+        return self.localize(self.base.get_object_pose(name))
+
+    def set_vehicle_pose_xyz(self, x: float, y: float, z: float, ignore_collision: bool, vehicle_name: str):
+        return self.base.set_vehicle_pose_xyz(*self._world(x, y, z), ignore_collision, vehicle_name)
+
+    def spawn_and_takeoff(self, x: float, y: float, z: float, vehicle_name: str, ignore_collision: bool = True):
+        return self.base.spawn_and_takeoff(*self._world(x, y, z), vehicle_name=vehicle_name, ignore_collision=ignore_collision)
+
+    def get_state(self, vehicle_name: str):
+        return self.localize(self.base.get_state(vehicle_name=vehicle_name))
+
+    def get_states(self, vehicle_names: Iterable[str]) -> Dict[str, Any]:
+        return self.localize_states(self.base.get_states(vehicle_names))
+
+
+def make_client(cfg: "EnvConfig") -> AirSimClient:
+    """根据配置创建适配层：启用多服务端分片时返回 `ShardedAirSimClient`，
+    启用连接池时返回 `AirSimClientPool`，否则返回单连接客户端。
+
+    启用插桩（`cfg.instrumentation`）时每条连接各包装一个 `InstrumentedClient`，
+    共享同一 `RpcMetrics`，并挂在返回的适配层的 `metrics` 属性上。"""
+    metrics = make_metrics(cfg.instrumentation)
+
+    def connect(ip: str, port: int) -> AirSimClient:
+        conn = AirSimClient(ip, port)
+        return conn if metrics is None else InstrumentedClient(conn, metrics)
+
+    shard = cfg.sharding
+    if shard.enabled:
+        client = ShardedAirSimClient(
+            [(ep.ip, ep.port, ep.agents) for ep in shard.endpoints],
+            connections_per_endpoint=shard.connections_per_endpoint,
+            health_check_interval=cfg.client_pool.health_check_interval,
+            connect=connect,
+            vehicle_names=cfg.agent_names,
+        )
+        client.metrics = metrics
+        if shard.check_jammers:
+            for issue in client.check_jammers(cfg.jammer_patterns, shard.jammer_tolerance):
+                warnings.warn(f"inconsistent jammer scene across shards: {issue}")
+        return client
+    pool = cfg.client_pool
+    if pool.enabled:
+        client = AirSimClientPool(
+            cfg.ip,
+            cfg.port,
+            size=pool.size,
+            mode=pool.mode,
+            vehicle_names=cfg.agent_names,
+            health_check_interval=pool.health_check_interval,
+            connect=lambda: connect(cfg.ip, cfg.port),
+        )
+        client.metrics = metrics
+        return client
+    return connect(cfg.ip, cfg.port)
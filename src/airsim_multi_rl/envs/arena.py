@@ -0,0 +1,154 @@
+from __future__ import annotations
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from ..config import ArenaConfig, EnvConfig
+from .airsim_client import AirSimClient, ArenaClient, make_client
+from .multi_drone_parallel import AirSimMultiDroneParallelEnv, IOPlan
+
+
+def arena_env_config(cfg: EnvConfig, arena: ArenaConfig) -> EnvConfig:
+    """由全局配置派生单个竞技场子环境的配置（局部坐标）。"""
+    agents = list(arena.agents)
+    occupancy = cfg.occupancy
+    if occupancy.map_name:
+        # 障碍物按竞技场局部坐标体素化，缓存需按竞技场区分
+        occupancy = replace(occupancy, map_name=f"{occupancy.map_name}_{arena.name}")
+    return replace(
+        cfg,
+        agent_names=agents,
+        spawn_points={a: cfg.spawn_points[a] for a in agents},
+        goal_points={a: cfg.goal_points[a] for a in agents},
+        occupancy=occupancy,
+        arenas=[],
+        # 插桩统计由共享适配层汇总，快照由 ArenaBatchEnv.close 统一写出
+        instrumentation=replace(cfg.instrumentation, export_path=""),
+    )
+
+
+class ArenaBatchEnv:
+    """多竞技场批量环境：一个 UE 实例中的 K 个竞技场作为 K 个独立子环境。
+
+    - 每个竞技场是一个 `AirSimMultiDroneParallelEnv`，通过 `ArenaClient` 以局部坐标访问共享适配层，
+      拥有独立的回合、终止与 reset 生命周期；
+    - `reset`/`step` 以锁步方式推进全部子环境的 I/O 计划，同一轮的 move/park/snapshot/depth
+      请求合并为一次批量调用（连接池下按载具并发）；
+    - `autoreset=True` 时，全部载具结束的竞技场在同一次 `step` 内自动 reset：返回的观测为新回合
+      初始观测，结束时的观测保存在该竞技场各载具 info 的 `final_observation` 中。
+    """
+
+    # 可跨竞技场合并为一次批量调用的 I/O 请求
+    _MERGED_OPS = ("move", "park", "snapshot", "depth")
+
+    def __init__(self, cfg: Optional[EnvConfig] = None, client: Optional[AirSimClient] = None, autoreset: bool = True):
+        self.cfg = cfg or EnvConfig()
+        if not self.cfg.arenas:
+            raise ValueError("ArenaBatchEnv requires at least one entry in cfg.arenas")
+        all_agents = [a for arena in self.cfg.arenas for a in arena.agents]
+        if len(set(all_agents)) != len(all_agents):
+            raise ValueError("arena agent groups must be disjoint")
+        self.client = client or make_client(replace(self.cfg, agent_names=all_agents))
+        self.arena_clients = [ArenaClient(self.client, arena.origin) for arena in self.cfg.arenas]
+        self.envs = [
+            AirSimMultiDroneParallelEnv(arena_env_config(self.cfg, arena), client=ac)
+            for arena, ac in zip(self.cfg.arenas, self.arena_clients)
+        ]
+        self.autoreset = bool(autoreset)
+        self.num_envs = len(self.envs)
+        self.episodes = [0] * self.num_envs
+
+    # ---- 批量 API ----
+    def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        """重置全部竞技场，返回 (obs_list, infos_list)。"""
+        plans = [env._reset_plan(None if seed is None else seed + k, options) for k, env in enumerate(self.envs)]
+        out = self._drive_all(plans)
+        return [o for o, _ in out], [i for _, i in out]
+
+    def step(self, actions: Sequence[Dict[str, np.ndarray]]):
+        """推进全部竞技场一步，返回按竞技场排列的 (obs, rews, terms, truncs, infos) 列表。"""
+        out = self._drive_all([env._step_plan(act) for env, act in zip(self.envs, actions)])
+        obs, rews, terms, truncs, infos = (list(x) for x in zip(*out))
+        if self.autoreset:
+            finished = [k for k, env in enumerate(self.envs) if not env.agents]
+            if finished:
+                resets = self._drive_all([self.envs[k]._reset_plan(None, None) for k in finished])
+                for k, (o, _) in zip(finished, resets):
+                    for a, info in infos[k].items():
+                        info["final_observation"] = obs[k][a]
+                    obs[k] = o
+                    self.episodes[k] += 1
+        return obs, rews, terms, truncs, infos
+
+    def active_masks(self) -> List[np.ndarray]:
+        return [env.active_mask() for env in self.envs]
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+        metrics, inst = getattr(self.client, "metrics", None), self.cfg.instrumentation
+        if metrics is not None and inst.export_path:
+            metrics.write(inst.export_path, inst.export_format)
+
+    # ---- 锁步驱动 ----
+    def _drive_all(self, plans: List[IOPlan]) -> List[Any]:
+        """锁步执行多个子环境的计划：每轮把可合并的同类请求合成一次批量调用。"""
+        results: List[Any] = [None] * len(plans)
+        pending: Dict[int, Tuple[Any, ...]] = {}
+
+        def advance(k: int, value: Any = None, first: bool = False) -> None:
+            try:
+                pending[k] = next(plans[k]) if first else plans[k].send(value)
+            except StopIteration as stop:
+                results[k] = stop.value
+
+        for k in range(len(plans)):
+            advance(k, first=True)
+        while pending:
+            batch, pending = pending, {}
+            # 分组键：可合并请求为 (op, 时长)，其余为 (op, 子环境序号) 单独执行
+            groups: Dict[Tuple[str, Any], List[int]] = {}
+            for k, req in batch.items():
+                op = req[0]
+                if op in self._MERGED_OPS:
+                    key = (op, req[2] if op == "move" else None)
+                else:
+                    key = (op, k)
+                groups.setdefault(key, []).append(k)
+            replies: Dict[int, Any] = {}
+            for (op, _), ks in groups.items():
+                if op in self._MERGED_OPS:
+                    replies.update(getattr(self, "_merged_" + op)(ks, [batch[k] for k in ks]))
+                else:
+                    k = ks[0]
+                    replies[k] = getattr(self.envs[k], "_io_" + op)(*batch[k][1:])
+            for k, value in replies.items():
+                advance(k, value)
+        return results
+
+    def _merged_move(self, ks: List[int], reqs: List[tuple]) -> Dict[int, Any]:
+        commands: Dict[str, list] = {}
+        for _, cmds, _ in reqs:
+            commands.update(cmds)
+        self.client.move_velocity_batch(commands, reqs[0][2])
+        return {k: None for k in ks}
+
+    def _merged_park(self, ks: List[int], reqs: List[tuple]) -> Dict[int, Any]:
+        self.client.hover_batch([n for _, names in reqs for n in names])
+        return {k: None for k in ks}
+
+    def _merged_snapshot(self, ks: List[int], reqs: List[tuple]) -> Dict[int, Any]:
+        state_names = [n for _, s, _ in reqs for n in s]
+        collision_names = [n for _, _, c in reqs for n in c]
+        states = self.client.get_states(state_names) if state_names else {}
+        collisions = self.client.get_collisions(collision_names) if collision_names else {}
+        out = {}
+        for k, (_, s, c) in zip(ks, reqs):
+            local = self.arena_clients[k].localize_states({n: states[n] for n in s})
+            out[k] = (local, {n: collisions[n] for n in c})
+        return out
+
+    def _merged_depth(self, ks: List[int], reqs: List[tuple]) -> Dict[int, Any]:
+        names = [n for _, ns in reqs for n in ns]
+        frames = self.client.get_images_batch(names, self.envs[ks[0]].depth_sensor.specs)
+        return {k: self.envs[k].depth_sensor.features({n: frames[n] for n in ns}) for k, (_, ns) in zip(ks, reqs)}
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import numpy as np
+
+from .airsim_client import AirSimClient, VelocityCmd
+from .jammer import JammerLocator
+
+
+class _ExecutorRunner:
+    """在线程池中执行阻塞调用并返回可 await 的结果。
+
+    对非线程安全的底层对象（单连接 AirSim 客户端）用一把锁串行化，
+    线程安全的对象（连接池）则允许调用真正并发。
+    """
+
+    def __init__(self, thread_safe: bool, executor: Optional[Executor] = None):
+        self._executor = executor
+        self._lock = None if thread_safe else threading.Lock()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        if self._lock is not None:
+            call = functools.partial(self._locked, call)
+        return await loop.run_in_executor(self._executor, call)
+
+    def _locked(self, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            return call()
+
+
+class AsyncAirSimClient:
+    """AirSim 适配层的 asyncio 包装。
+
+    AirSim 的 Python 客户端没有原生 asyncio 接口，这里把同步适配层的调用放到线程池执行。
+    底层为 `AirSimClientPool` 时各载具调用并发执行；否则退化为单连接上的串行调用，
+    但仍不阻塞事件循环，多个环境可以共享同一个事件循环。
+    """
+
+    def __init__(self, client: AirSimClient, executor: Optional[Executor] = None):
+        self.client = client
+        self.concurrent = bool(getattr(client, "thread_safe", False))
+        self._runner = _ExecutorRunner(self.concurrent, executor)
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """异步调用同步适配层的任意方法。"""
+        return await self._runner.run(getattr(self.client, method), *args, **kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """在线程池中执行以同步客户端为首个参数的阻塞函数（如场景导出）。"""
+        return await self._runner.run(fn, self.client, *args, **kwargs)
+
+    async def spawn_and_takeoff(self, x: float, y: float, z: float, vehicle_name: str, ignore_collision: bool = True):
+        return await self.call("spawn_and_takeoff", x, y, z, vehicle_name=vehicle_name, ignore_collision=ignore_collision)
+
+    async def spawn_many(self, spawns: Dict[str, Tuple[float, float, float]]) -> None:
+        await asyncio.gather(*(self.spawn_and_takeoff(x, y, z, vehicle_name=a) for a, (x, y, z) in spawns.items()))
+
+    async def move_velocity_batch(self, commands: Dict[str, VelocityCmd], duration: float) -> None:
+        # 批量接口本身先全部下发再统一 join，保证各机同步推进 dt
+        await self.call("move_velocity_batch", commands, duration)
+
+    async def get_states(self, vehicle_names: Iterable[str]) -> Dict[str, Any]:
+        return await self._per_vehicle("get_state", "get_states", list(vehicle_names))
+
+    async def get_collisions(self, vehicle_names: Iterable[str]) -> Dict[str, Any]:
+        return await self._per_vehicle("get_collision", "get_collisions", list(vehicle_names))
+
+    async def _per_vehicle(self, single: str, batch: str, names: list) -> Dict[str, Any]:
+        if not names:
+            return {}
+        if not self.concurrent:
+            return await self.call(batch, names)
+        results = await asyncio.gather(*(self.call(single, vehicle_name=n) for n in names))
+        return dict(zip(names, results))
+
+
+class AsyncJammerLocator:
+    """JammerLocator 的 asyncio 包装：HTTP 查询在线程池执行，多机功率查询并发发起。"""
+
+    def __init__(self, locator: JammerLocator, executor: Optional[Executor] = None):
+        self.locator = locator
+        # urllib 请求彼此独立，可并发执行
+        self._runner = _ExecutorRunner(True, executor)
+
+    async def refresh_positions(self) -> None:
+        await self._runner.run(self.locator.refresh_positions)
+
+    async def nearest_power(self, pos_xyz: np.ndarray, step: Optional[int] = None) -> float:
+        return float(await self._runner.run(self.locator.nearest_power, pos_xyz, step=step))
+
+    async def nearest_powers(self, positions: Dict[str, np.ndarray], step: Optional[int] = None) -> Dict[str, float]:
+        names = list(positions.keys())
+        results = await asyncio.gather(*(self.nearest_power(positions[a], step=step) for a in names))
+        return dict(zip(names, results))
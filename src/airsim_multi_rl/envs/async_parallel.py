@@ -0,0 +1,74 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+import numpy as np
+
+from ..config import EnvConfig
+from .airsim_client import AirSimClient
+from .async_client import AsyncAirSimClient, AsyncJammerLocator
+from .multi_drone_parallel import AirSimMultiDroneParallelEnv, IOPlan
+from .occupancy import OccupancyGrid, build_occupancy
+
+
+class AsyncAirSimMultiDroneParallelEnv(AirSimMultiDroneParallelEnv):
+    """asyncio 版本的多机并行环境：`await env.reset()` / `await env.step(actions)`。
+
+    与同步环境共用同一份 reset/step 计划，仅把 I/O 请求换成异步适配层与 Jammer 客户端，
+    并对各载具的调用使用 `asyncio.gather` 并发发起。环境不持有事件循环，
+    多个实例可在同一事件循环中交替推进，与策略推理等协程重叠执行。
+    """
+
+    def __init__(
+        self,
+        cfg: Optional[EnvConfig] = None,
+        client: Optional[AirSimClient] = None,
+        executor: Optional[Executor] = None,
+    ):
+        super().__init__(cfg, client=client)
+        self.aclient = AsyncAirSimClient(self.client, executor=executor)
+        self.ajammers = AsyncJammerLocator(self.jammers, executor=executor)
+
+    async def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        return await self._adrive(self._reset_plan(seed, options))
+
+    async def step(self, actions: Dict[str, np.ndarray]):
+        return await self._adrive(self._step_plan(actions))
+
+    # ---- 异步 I/O 驱动 ----
+    async def _adrive(self, plan: IOPlan):
+        """异步执行计划：逐个 await I/O 请求并回送结果。"""
+        try:
+            req = next(plan)
+            while True:
+                req = plan.send(await getattr(self, "_aio_" + req[0])(*req[1:]))
+        except StopIteration as stop:
+            return stop.value
+
+    async def _aio_refresh_jammers(self):
+        await self.ajammers.refresh_positions()
+
+    async def _aio_spawn(self, spawns: Dict[str, tuple]):
+        await self.aclient.spawn_many(spawns)
+
+    async def _aio_move(self, commands: Dict[str, list], duration: float):
+        await self.aclient.move_velocity_batch(commands, duration)
+
+    async def _aio_park(self, names: List[str]):
+        await self.aclient.call("hover_batch", names)
+
+    async def _aio_snapshot(self, state_names: List[str], collision_names: List[str]):
+        states, collisions = await asyncio.gather(
+            self.aclient.get_states(state_names), self.aclient.get_collisions(collision_names)
+        )
+        return states, collisions
+
+    async def _aio_depth(self, names: List[str]) -> Dict[str, np.ndarray]:
+        frames = await self.aclient.call("get_images_batch", names, self.depth_sensor.specs)
+        return self.depth_sensor.features(frames)
+
+    async def _aio_scene_export(self) -> OccupancyGrid:
+        return await self.aclient.run(build_occupancy, self.cfg.occupancy, self.cfg.world_bounds)
+
+    async def _aio_powers(self, positions: Dict[str, np.ndarray], step: int) -> Dict[str, float]:
+        return await self.ajammers.nearest_powers(positions, step=step)
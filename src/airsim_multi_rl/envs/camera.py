@@ -0,0 +1,120 @@
+from __future__ import annotations
+import itertools
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from ..config import CameraConfig
+from .airsim_client import FLOAT_IMAGE_TYPES, AirSimClient, ImageSpec
+
+
+class ImageFrameBuffer:
+    """预分配的多机多摄像头帧环形缓冲。
+
+    - 彩色类（Scene/Segmentation 等）：`color` 形状 (capacity, A, C, H, W, 3)，uint8；
+    - 深度类（DepthPerspective/DepthPlanar）：`depth` 形状 (capacity, A, Cd, H, W)，float32；
+    - `valid` 记录每个槽位/载具/通道是否写入成功。
+
+    写入时对解码视图按 `downscale` 步长抽样后直接拷入槽位，不产生中间数组。
+    """
+
+    def __init__(
+        self,
+        agent_names: Sequence[str],
+        specs: Sequence[ImageSpec],
+        height: int,
+        width: int,
+        downscale: int = 1,
+        capacity: int = 4,
+    ):
+        self.agent_names = list(agent_names)
+        self._agent_idx = {a: i for i, a in enumerate(self.agent_names)}
+        self.specs = list(specs)
+        self.downscale = max(1, int(downscale))
+        self.capacity = max(1, int(capacity))
+        self.height = -(-int(height) // self.downscale)
+        self.width = -(-int(width) // self.downscale)
+        # 每个 spec 写入哪个数组的哪个通道
+        self._route: List[tuple] = []
+        n_color = n_depth = 0
+        for _, t in self.specs:
+            if t in FLOAT_IMAGE_TYPES:
+                self._route.append(("depth", n_depth))
+                n_depth += 1
+            else:
+                self._route.append(("color", n_color))
+                n_color += 1
+        A, H, W = len(self.agent_names), self.height, self.width
+        self.color = np.zeros((self.capacity, A, n_color, H, W, 3), dtype=np.uint8)
+        self.depth = np.zeros((self.capacity, A, n_depth, H, W), dtype=np.float32)
+        self.valid = np.zeros((self.capacity, A, len(self.specs)), dtype=bool)
+        self.seq = -1
+
+    @property
+    def slot(self) -> int:
+        """最近一次写入的槽位（尚未写入时为 -1）。"""
+        return self.seq % self.capacity if self.seq >= 0 else -1
+
+    def write(self, frames: Dict[str, List[Optional[np.ndarray]]]) -> int:
+        """写入一帧（各载具的多路图像），返回所用槽位。"""
+        slot = (self.seq + 1) % self.capacity
+        self.valid[slot] = False
+        k = self.downscale
+        for a, imgs in frames.items():
+            ai = self._agent_idx.get(a)
+            if ai is None or not imgs:
+                continue
+            for si, img in enumerate(imgs):
+                if img is None or si >= len(self._route):
+                    continue
+                kind, ci = self._route[si]
+                dst = self.color[slot, ai, ci] if kind == "color" else self.depth[slot, ai, ci]
+                src = img[::k, ::k]
+                h = min(src.shape[0], dst.shape[0])
+                w = min(src.shape[1], dst.shape[1])
+                dst[:h, :w] = src[:h, :w]
+                self.valid[slot, ai, si] = True
+        self.seq += 1
+        return slot
+
+    def channel(self, spec_index: int) -> tuple:
+        """返回某路图像在缓冲中的位置：("color" | "depth", 通道序号)。"""
+        return self._route[spec_index]
+
+    def latest(self):
+        """返回最近一帧的 (color, depth, valid) 视图；环形缓冲会在 capacity 次写入后覆盖该视图。"""
+        s = self.slot
+        return self.color[s], self.depth[s], self.valid[s]
+
+    def latest_image(self, agent: str, spec_index: int) -> Optional[np.ndarray]:
+        """返回最近一帧中某载具某路图像的视图；未写入成功时返回 None。"""
+        s, ai = self.slot, self._agent_idx.get(agent)
+        if s < 0 or ai is None or not self.valid[s, ai, spec_index]:
+            return None
+        kind, ci = self._route[spec_index]
+        return self.color[s, ai, ci] if kind == "color" else self.depth[s, ai, ci]
+
+
+class CameraRig:
+    """多机多摄像头批量抓图：每个载具一次请求，结果写入 `ImageFrameBuffer`。"""
+
+    def __init__(self, client: AirSimClient, agent_names: Sequence[str], cfg: CameraConfig):
+        self.client = client
+        self.cfg = cfg
+        self.specs: List[ImageSpec] = [(c, t) for c, t in itertools.product(cfg.cameras, cfg.image_types)]
+        self.buffer = ImageFrameBuffer(agent_names, self.specs, cfg.height, cfg.width, cfg.downscale, cfg.ring_size)
+
+    def capture(self, agents: Optional[Sequence[str]] = None) -> int:
+        """对指定载具（默认全部）抓取一帧，返回写入的槽位。"""
+        names = list(agents) if agents is not None else self.buffer.agent_names
+        return self.buffer.write(self.client.get_images_batch(names, self.specs))
+
+    def spec_index(self, camera_name: str, image_type: str) -> Optional[int]:
+        try:
+            return self.specs.index((camera_name, image_type))
+        except ValueError:
+            return None
+
+    def latest_image(self, agent: str, camera_name: str, image_type: str) -> Optional[np.ndarray]:
+        """最近一帧中指定载具/摄像头/类型的图像视图（不存在或未写入时为 None）。"""
+        si = self.spec_index(camera_name, image_type)
+        return None if si is None else self.buffer.latest_image(agent, si)
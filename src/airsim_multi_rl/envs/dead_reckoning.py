@@ -0,0 +1,103 @@
+from __future__ import annotations
+import math
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+
+from ..config import DeadReckoningConfig
+from ..utils.geometry import normalize_yaw_rad
+
+
+class DeadReckoner:
+    """航位推算：在两次状态同步之间用指令速度外推位置与偏航。
+
+    说明：
+    - 动作以 MaxDegreeOfFreedom + 偏航角速率下发，速度指令即世界系目标速度，
+      外推采用梯形积分：pos += 0.5 * (v_last + v_cmd) * dt，yaw += yaw_rate * dt。
+    - 每个载具维护预测误差上界：随外推时长与速度突变增长，超过阈值即要求同步。
+    - 同步时记录预测值与真实值的偏差，用于漂移统计。
+    """
+
+    def __init__(self, cfg: DeadReckoningConfig):
+        self.cfg = cfg
+        self._pos: Dict[str, np.ndarray] = {}
+        self._vel: Dict[str, np.ndarray] = {}
+        self._yaw: Dict[str, float] = {}
+        self._since_sync: Dict[str, int] = {}
+        self._err_bound: Dict[str, float] = {}
+        self._predicted: Dict[str, bool] = {}
+        self.last_drift: Dict[str, float] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self._n_sync = 0
+        self._n_predicted = 0
+        self._n_drift = 0
+        self._drift_sum = 0.0
+        self._drift_max = 0.0
+
+    # ---- 同步/外推 ----
+    def sync(self, a: str, pos: np.ndarray, vel: np.ndarray, yaw: float) -> None:
+        """用真实状态覆盖推算状态，并在之前有外推时累计漂移统计。"""
+        if self._predicted.get(a, False):
+            drift = float(np.linalg.norm(self._pos[a] - pos))
+            self.last_drift[a] = drift
+            self._n_drift += 1
+            self._drift_sum += drift
+            self._drift_max = max(self._drift_max, drift)
+        self._pos[a] = np.asarray(pos, dtype=np.float32).copy()
+        self._vel[a] = np.asarray(vel, dtype=np.float32).copy()
+        self._yaw[a] = float(yaw)
+        self._since_sync[a] = 0
+        self._err_bound[a] = 0.0
+        self._predicted[a] = False
+        self._n_sync += 1
+
+    def forget(self, a: str) -> None:
+        """丢弃载具的推算状态（回合重置时调用），避免把上回合的外推位置与新出生点比较计为漂移。"""
+        for d in (self._pos, self._vel, self._yaw, self._since_sync, self._err_bound, self._predicted, self.last_drift):
+            d.pop(a, None)
+
+    def predict(self, a: str, cmd: Optional[Iterable[float]], dt: float) -> None:
+        """按速度指令外推一步；cmd 为 None 时按悬停（零速度）处理。"""
+        if a not in self._pos:
+            return
+        vx, vy, vz, yaw_rate_deg = (0.0, 0.0, 0.0, 0.0) if cmd is None else [float(c) for c in cmd]
+        v_cmd = np.array([vx, vy, vz], dtype=np.float32)
+        v_last = self._vel[a]
+        self._pos[a] = self._pos[a] + 0.5 * (v_last + v_cmd) * float(dt)
+        self._yaw[a] = normalize_yaw_rad(self._yaw[a] + math.radians(yaw_rate_deg) * float(dt))
+        # 误差上界：模型漂移随时间线性增长，速度突变时额外计入一半的速度差位移
+        self._err_bound[a] += float(self.cfg.error_growth) * float(dt) + 0.5 * float(np.linalg.norm(v_cmd - v_last)) * float(dt)
+        self._vel[a] = v_cmd
+        self._since_sync[a] += 1
+        self._predicted[a] = True
+        self._n_predicted += 1
+
+    def needs_sync(self, a: str) -> bool:
+        """达到同步周期或误差上界超过阈值时需要拉取真实状态。"""
+        if a not in self._pos:
+            return True
+        return self._since_sync[a] >= int(self.cfg.sync_every) or self._err_bound[a] > float(self.cfg.max_error)
+
+    def near_termination(self, a: str, goal: np.ndarray, goal_radius: float, bounds) -> bool:
+        """推算位置接近目标或越界边界时返回 True，用于在终止判定前强制同步。"""
+        pos = self._pos[a]
+        margin = float(self.cfg.termination_margin) + self._err_bound[a]
+        if float(np.linalg.norm(goal - pos)) <= float(goal_radius) + margin:
+            return True
+        for k, (lo, hi) in enumerate(bounds):
+            if pos[k] - lo <= margin or hi - pos[k] <= margin:
+                return True
+        return False
+
+    def state(self, a: str) -> Tuple[np.ndarray, np.ndarray, float]:
+        return self._pos[a].copy(), self._vel[a].copy(), float(self._yaw[a])
+
+    def stats(self) -> dict:
+        """漂移统计：同步/外推次数、平均与最大漂移（米）。"""
+        return {
+            "syncs": int(self._n_sync),
+            "predicted_steps": int(self._n_predicted),
+            "mean_drift": float(self._drift_sum / self._n_drift) if self._n_drift else 0.0,
+            "max_drift": float(self._drift_max),
+        }
@@ -0,0 +1,83 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from ..config import CameraConfig, DepthObsConfig
+from .airsim_client import ImageSpec
+
+
+def sector_min_pool(depth: np.ndarray, sectors_v: int, sectors_h: int, max_range: float) -> np.ndarray:
+    """把深度图按 `sectors_v × sectors_h` 网格做最小池化。
+
+    Args:
+        depth: (H, W) 或 (A, H, W) 浮点深度（米）；非有限值与超量程值按 `max_range` 处理。
+        sectors_v: 垂直扇区数。
+        sectors_h: 水平扇区数。
+        max_range: 量程（米）。
+
+    Returns:
+        (sectors_v * sectors_h,) 或 (A, sectors_v * sectors_h) float32，行优先展开。
+        图像尺寸不能整除扇区数时，丢弃右侧/底部余下的像素。
+    """
+    d = np.asarray(depth, dtype=np.float32)
+    single = d.ndim == 2
+    if single:
+        d = d[None]
+    A, H, W = d.shape
+    hs, ws = H // int(sectors_v), W // int(sectors_h)
+    if hs <= 0 or ws <= 0:
+        raise ValueError(f"depth image {H}x{W} too small for {sectors_v}x{sectors_h} sectors")
+    blocks = d[:, : hs * sectors_v, : ws * sectors_h].reshape(A, sectors_v, hs, sectors_h, ws)
+    # NaN 在 min 中会传染，先换成量程
+    feats = np.nan_to_num(blocks, nan=max_range, posinf=max_range, neginf=max_range).min(axis=(2, 4))
+    np.minimum(feats, max_range, out=feats)
+    feats = feats.reshape(A, sectors_v * sectors_h)
+    return feats[0] if single else feats
+
+
+class DepthSectorSensor:
+    """深度扇区传感器：把各载具的深度图压缩为几十个浮点数的伪激光雷达特征。
+
+    深度图按 `downscale` 抽样后拷入预分配的 (A, H, W) 缓冲，再对全部载具一次性做向量化最小池化；
+    抓图失败的载具整幅按量程处理（视为无障碍）。
+    """
+
+    def __init__(self, agent_names: Sequence[str], cfg: DepthObsConfig, camera: CameraConfig):
+        self.cfg = cfg
+        self.agent_names = list(agent_names)
+        self._agent_idx = {a: i for i, a in enumerate(self.agent_names)}
+        self.specs: List[ImageSpec] = [(cfg.camera, cfg.image_type)]
+        self.dim = int(cfg.sectors_v) * int(cfg.sectors_h)
+        self._k = max(1, int(cfg.downscale))
+        h = -(-int(camera.height) // self._k)
+        w = -(-int(camera.width) // self._k)
+        self._frame = np.full((len(self.agent_names), h, w), float(cfg.max_range), dtype=np.float32)
+
+    def features(self, frames: Dict[str, List[Optional[np.ndarray]]]) -> Dict[str, np.ndarray]:
+        """由 `get_images_batch` 的结果计算各载具特征，返回 {agent: (dim,) float32}。"""
+        max_range = float(self.cfg.max_range)
+        names = [a for a in frames if a in self._agent_idx]
+        rows = np.array([self._agent_idx[a] for a in names], dtype=np.intp)
+        for a, r in zip(names, rows):
+            imgs = frames[a]
+            img = imgs[0] if imgs else None
+            dst = self._frame[r]
+            if img is None:
+                dst.fill(max_range)
+                continue
+            src = img[:: self._k, :: self._k]
+            h, w = min(src.shape[0], dst.shape[0]), min(src.shape[1], dst.shape[1])
+            dst[:h, :w] = src[:h, :w]
+            # 分辨率不一致时未覆盖区域按量程处理
+            dst[h:, :] = max_range
+            dst[:h, w:] = max_range
+        if not names:
+            return {}
+        feats = sector_min_pool(self._frame[rows], int(self.cfg.sectors_v), int(self.cfg.sectors_h), max_range)
+        if self.cfg.normalize:
+            feats /= max_range
+        return dict(zip(names, feats))
+
+    def high(self) -> np.ndarray:
+        """特征上界：归一化时为 1，否则为量程。"""
+        return np.full((self.dim,), 1.0 if self.cfg.normalize else float(self.cfg.max_range), dtype=np.float32)
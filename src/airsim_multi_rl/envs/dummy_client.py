@@ -1,12 +1,13 @@
 from __future__ import annotations
 import math
 from typing import Dict, Tuple
+from .airsim_client import VehicleBatchMixin
 
 class DummyFuture:
     def join(self):
         return None
 
-class DummyClient:
+class DummyClient(VehicleBatchMixin):
     """无 AirSim 的模拟适配层，支持基本接口以离线运行与单测。
 
     - 维护简单的位置/速度状态
@@ -32,6 +33,9 @@ class DummyClient:
                 self.position = _Vec(0.0, 0.0, 0.0)
         return _Pose()
 
+    def get_object_scale(self, name: str):
+        return (1.0, 1.0, 1.0)
+
     def set_vehicle_pose_xyz(self, x: float, y: float, z: float, ignore_collision: bool, vehicle_name: str):
         self.pos[vehicle_name] = (float(x), float(y), float(z))
 
@@ -81,6 +85,17 @@ class DummyClient:
                 self.kinematics_estimated = _Kin(p, v)
         return _State(self.pos[vehicle_name], self.vel[vehicle_name])
 
+    def get_images(self, vehicle_name: str, specs, height: int = 144, width: int = 256):
+        # 返回固定尺寸的空白帧：深度类为常数远距离，其余为黑色 RGB
+        import numpy as np
+        out = []
+        for _, t in specs:
+            if t.startswith("Depth"):
+                out.append(np.full((height, width), 100.0, dtype=np.float32))
+            else:
+                out.append(np.zeros((height, width, 3), dtype=np.uint8))
+        return out
+
     def get_collision(self, vehicle_name: str):
         class _Col:
             def __init__(self, c):
@@ -0,0 +1,252 @@
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+import csv
+import functools
+import inspect
+import io
+import json
+import threading
+import time
+
+if TYPE_CHECKING:
+    from ..config import InstrumentationConfig
+
+# 未关联具体载具的调用（场景查询、HTTP、不按载具拆分的批量调用）使用的载具标签
+ALL_VEHICLES = "*"
+# 默认延迟分桶上界（毫秒），最后隐含 +Inf 桶
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+# VehicleBatchMixin 的批量接口：底层为默认串行实现时改为经代理逐载具调用，以便按载具统计
+_SERIAL_BATCH_METHODS = ("move_velocity_batch", "hover_batch", "get_states", "get_collisions", "get_images_batch")
+# 返回数组（图像）的方法：按返回数组的 nbytes 统计字节数
+_IMAGE_METHODS = frozenset({"get_images", "get_rgb_image"})
+# stats 列表布局：count, errors, bytes, sum_s, max_s, hist...
+_COUNT, _ERRORS, _BYTES, _SUM, _MAX, _HIST = range(6)
+
+
+def _payload_bytes(obj: Any) -> int:
+    """图像返回值的字节数（ndarray 或其列表，None 计 0）。"""
+    if obj is None:
+        return 0
+    if isinstance(obj, (list, tuple)):
+        return sum(_payload_bytes(o) for o in obj)
+    return int(getattr(obj, "nbytes", 0))
+
+
+class RpcMetrics:
+    """按 (方法, 载具) 聚合的调用计数、字节数与固定分桶延迟直方图。
+
+    记录路径只做一次二分查找与几次整数累加（持锁，可被连接池多线程并发调用）；
+    分位数、导出格式等均在 `snapshot`/`export` 时计算。`enabled=False` 时 `record` 立即返回。
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS, enabled: bool = True):
+        self.buckets_ms = tuple(sorted(float(b) for b in buckets_ms))
+        self._bounds = tuple(b / 1e3 for b in self.buckets_ms)
+        self.enabled = bool(enabled)
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], List[float]] = {}
+        self._since = time.time()
+
+    def record(self, method: str, vehicle: str, seconds: float, nbytes: int = 0, error: bool = False) -> None:
+        if not self.enabled:
+            return
+        i = bisect_left(self._bounds, seconds)
+        key = (method, vehicle or ALL_VEHICLES)
+        with self._lock:
+            s = self._stats.get(key)
+            if s is None:
+                s = self._stats[key] = [0, 0, 0, 0.0, 0.0] + [0] * (len(self._bounds) + 1)
+            s[_COUNT] += 1
+            s[_ERRORS] += bool(error)
+            s[_BYTES] += nbytes
+            s[_SUM] += seconds
+            if seconds > s[_MAX]:
+                s[_MAX] = seconds
+            s[_HIST + i] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._since = time.time()
+
+    def _quantile_ms(self, hist: List[int], count: int, q: float, max_ms: float) -> float:
+        """分位数估计：取累计计数首次达到 q*count 的桶上界（+Inf 桶取最大值）。"""
+        target, acc = q * count, 0
+        for b, n in zip(self.buckets_ms, hist):
+            acc += n
+            if acc >= target:
+                return min(b, max_ms)
+        return max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前统计的快照：每个 (method, vehicle) 一行，按 method、vehicle 排序。"""
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._stats.items())
+            since = self._since
+        rows = []
+        for (method, vehicle), s in items:
+            count, hist = int(s[_COUNT]), [int(n) for n in s[_HIST:]]
+            max_ms = 1e3 * s[_MAX]
+            rows.append({
+                "method": method,
+                "vehicle": vehicle,
+                "count": count,
+                "errors": int(s[_ERRORS]),
+                "bytes": int(s[_BYTES]),
+                "sum_ms": 1e3 * s[_SUM],
+                "mean_ms": 1e3 * s[_SUM] / max(count, 1),
+                "p50_ms": self._quantile_ms(hist, count, 0.5, max_ms),
+                "p90_ms": self._quantile_ms(hist, count, 0.9, max_ms),
+                "p99_ms": self._quantile_ms(hist, count, 0.99, max_ms),
+                "max_ms": max_ms,
+                "hist": hist,
+            })
+        return {"since": since, "elapsed_s": time.time() - since, "buckets_ms": list(self.buckets_ms), "calls": rows}
+
+    # ---- 导出 ----
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix: str = "airsim_rpc") -> str:
+        """Prometheus 文本格式：计数/错误/字节为 counter，延迟为 histogram（秒，累计桶）。"""
+        snap = self.snapshot()
+
+        def esc(v: str) -> str:
+            return v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+        lines = [
+            f"# HELP {prefix}_calls_total AirSim adapter / UE HTTP calls.",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        labels = [f'method="{esc(r["method"])}",vehicle="{esc(r["vehicle"])}"' for r in snap["calls"]]
+        lines += [f"{prefix}_calls_total{{{l}}} {r['count']}" for l, r in zip(labels, snap["calls"])]
+        lines += [f"# HELP {prefix}_errors_total Calls that raised.", f"# TYPE {prefix}_errors_total counter"]
+        lines += [f"{prefix}_errors_total{{{l}}} {r['errors']}" for l, r in zip(labels, snap["calls"])]
+        lines += [f"# HELP {prefix}_bytes_total Response payload bytes (images, HTTP).", f"# TYPE {prefix}_bytes_total counter"]
+        lines += [f"{prefix}_bytes_total{{{l}}} {r['bytes']}" for l, r in zip(labels, snap["calls"])]
+        lines += [f"# HELP {prefix}_latency_seconds Call latency.", f"# TYPE {prefix}_latency_seconds histogram"]
+        for l, r in zip(labels, snap["calls"]):
+            acc = 0
+            for b, n in zip(snap["buckets_ms"] + ["+Inf"], r["hist"]):
+                acc += n
+                le = b if b == "+Inf" else repr(b / 1e3)
+                lines.append(f'{prefix}_latency_seconds_bucket{{{l},le="{le}"}} {acc}')
+            lines.append(f"{prefix}_latency_seconds_sum{{{l}}} {r['sum_ms'] / 1e3!r}")
+            lines.append(f"{prefix}_latency_seconds_count{{{l}}} {r['count']}")
+        return "\n".join(lines) + "\n"
+
+    def to_csv(self) -> str:
+        """CSV：每个 (method, vehicle) 一行，末尾为各桶（非累计）计数。"""
+        snap = self.snapshot()
+        buf = io.StringIO()
+        w = csv.writer(buf, lineterminator="\n")
+        cols = ["method", "vehicle", "count", "errors", "bytes", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+        w.writerow(cols + [f"le_{b:g}ms" for b in snap["buckets_ms"]] + ["le_inf"])
+        for r in snap["calls"]:
+            w.writerow([r[c] if isinstance(r[c], (str, int)) else f"{r[c]:.4f}" for c in cols] + r["hist"])
+        return buf.getvalue()
+
+    def export(self, fmt: str = "json") -> str:
+        if fmt == "json":
+            return self.to_json()
+        if fmt == "prometheus":
+            return self.to_prometheus()
+        if fmt == "csv":
+            return self.to_csv()
+        raise ValueError(f"unknown metrics format: {fmt!r}")
+
+    def write(self, path: str, fmt: str = "json") -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.export(fmt))
+
+
+class _TimedFuture:
+    """Async 指令（move_velocity/hover/...）返回的 Future 包装：`join` 耗时记为 `<method>.join`。"""
+
+    def __init__(self, fut, metrics: RpcMetrics, name: str, vehicle: str):
+        self._fut = fut
+        self._metrics = metrics
+        self._name = name
+        self._vehicle = vehicle
+
+    def join(self):
+        m = self._metrics
+        if not m.enabled:
+            return self._fut.join()
+        t0 = time.perf_counter()
+        try:
+            out = self._fut.join()
+        except Exception:
+            m.record(self._name, self._vehicle, time.perf_counter() - t0, error=True)
+            raise
+        m.record(self._name, self._vehicle, time.perf_counter() - t0)
+        return out
+
+
+class InstrumentedClient:
+    """适配层插桩代理：转发全部调用，并按 (方法, 载具) 记录耗时、字节数与失败次数。
+
+    - 载具取自 `vehicle_name` 参数（关键字或位置），无该参数的调用记为 `ALL_VEHICLES`；
+    - 返回 Future 的 Async 指令另外记录 `join` 耗时（`move_velocity.join` 等）；
+    - 底层批量接口为 `VehicleBatchMixin` 的串行默认实现时，经本代理逐载具调用，
+      单连接与连接池/分片的每条连接（由 `make_client` 逐连接包装）都能得到按载具的统计；
+    - `metrics.enabled=False` 时只多一次函数调用与标志判断（直接转发）。
+
+    包装后的方法首次访问时生成并缓存在实例上，之后的属性查找不再经过 `__getattr__`。
+    """
+
+    def __init__(self, base: Any, metrics: RpcMetrics):
+        from .airsim_client import VehicleBatchMixin
+        self.base = base
+        self.metrics = metrics
+        self.thread_safe = bool(getattr(base, "thread_safe", False))
+        self._mixin = VehicleBatchMixin
+
+    def __getattr__(self, name: str):
+        # 仅在常规属性查找失败时调用；私有属性与非方法属性原样转发
+        attr = getattr(self.base, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        if name in _SERIAL_BATCH_METHODS and getattr(type(self.base), name, None) is getattr(self._mixin, name):
+            attr = functools.partial(getattr(self._mixin, name), self)
+        wrapped = self._wrap(name, attr)
+        self.__dict__[name] = wrapped
+        return wrapped
+
+    def _wrap(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        m = self.metrics
+        try:
+            params = list(inspect.signature(fn).parameters)
+            vidx: Optional[int] = params.index("vehicle_name")
+        except (TypeError, ValueError):
+            vidx = None
+        images = name in _IMAGE_METHODS
+
+        def call(*args, **kwargs):
+            if not m.enabled:
+                return fn(*args, **kwargs)
+            vehicle = kwargs.get("vehicle_name")
+            if vehicle is None:
+                vehicle = args[vidx] if vidx is not None and vidx < len(args) else ALL_VEHICLES
+            t0 = time.perf_counter()
+            try:
+                out = fn(*args, **kwargs)
+            except Exception:
+                m.record(name, vehicle, time.perf_counter() - t0, error=True)
+                raise
+            m.record(name, vehicle, time.perf_counter() - t0, _payload_bytes(out) if images else 0)
+            if out is not None and hasattr(out, "join"):
+                return _TimedFuture(out, m, name + ".join", vehicle)
+            return out
+
+        call.__name__ = name
+        return call
+
+
+def make_metrics(cfg: "InstrumentationConfig") -> Optional[RpcMetrics]:
+    """按配置创建统计对象；未启用时返回 None（不插桩，零开销）。"""
+    if not cfg.enabled:
+        return None
+    return RpcMetrics(cfg.buckets_ms)
+
@@ -2,8 +2,11 @@ from __future__ import annotations
 from typing import Dict, List, Tuple, Optional
 import numpy as np
 from .airsim_client import AirSimClient
+from .instrumentation import ALL_VEHICLES, RpcMetrics
 from ..config import UERPCConfig
+from ..utils import in_bounds
 import json
+import time
 import urllib.request
 import urllib.error
 import urllib.parse
@@ -14,12 +17,30 @@ class JammerLocator:
     """Jammer 发现与位置刷新模块。
 
     仅在 reset 阶段枚举场景对象并缓存位置，满足性能约束。
+
+    多竞技场布局下：`origin` 为竞技场原点的世界坐标，UE HTTP 返回的世界坐标减去该原点
+    转为局部坐标（经适配层查询的位姿已由 `ArenaClient` 转换）；给定 `bounds` 时只保留
+    局部坐标落在边界内的 Jammer。
+
+    给定 `metrics`（启用插桩时为适配层的 `RpcMetrics`）时，HTTP 请求按端点计入
+    `http:<endpoint>` 的次数、响应字节数与延迟。
     """
 
-    def __init__(self, client: AirSimClient, patterns: List[str], rpc: Optional[UERPCConfig] = None):
+    def __init__(
+        self,
+        client: AirSimClient,
+        patterns: List[str],
+        rpc: Optional[UERPCConfig] = None,
+        origin: Optional[Vec3] = None,
+        bounds=None,
+        metrics: Optional[RpcMetrics] = None,
+    ):
         self.client = client
+        self.metrics = metrics
         self.patterns = patterns
         self.rpc = rpc or UERPCConfig()
+        self.origin = np.asarray(origin if origin is not None else (0.0, 0.0, 0.0), dtype=np.float32)
+        self.bounds = bounds
         self.names: List[str] = []
         self.positions: Dict[str, np.ndarray] = {}
         self.powers: Dict[str, float] = {}
@@ -52,7 +73,7 @@ class JammerLocator:
                     y_cm = float(loc.get("Y", 0.0))
                     z_cm = float(loc.get("Z", 0.0))
                     m_per_cm = 1.0 / float(max(self.rpc.cm_per_m, 1e-6))
-                    pos_m = np.array([x_cm * m_per_cm, y_cm * m_per_cm, z_cm * m_per_cm], dtype=np.float32)
+                    pos_m = np.array([x_cm * m_per_cm, y_cm * m_per_cm, z_cm * m_per_cm], dtype=np.float32) - self.origin
                     if name:
                         self.names.append(name)
                         self.positions[name] = pos_m
@@ -125,6 +146,16 @@ class JammerLocator:
                     except Exception:
                         self.powers[n] = 0.0
 
+        if self.bounds is not None:
+            self._filter_bounds()
+
+    def _filter_bounds(self) -> None:
+        """剔除局部坐标不在 `bounds` 内的 Jammer（其他竞技场的干扰源）。"""
+        keep = [n for n in self.names if n in self.positions and in_bounds(self.positions[n], self.bounds)]
+        self.names = keep
+        self.positions = {n: self.positions[n] for n in keep}
+        self.powers = {n: p for n, p in self.powers.items() if n in self.positions}
+
     def nearest_vec(self, pos_xyz: np.ndarray) -> Tuple[np.ndarray, float]:
         if not self.positions:
             return np.zeros(3, dtype=np.float32), float(1e6)
@@ -179,14 +210,12 @@ class JammerLocator:
         base = self.rpc.http_base.rstrip("/")
         path = self.rpc.jammers_endpoint
         url = f"{base}{path}"
-        req = urllib.request.Request(url)
-        with urllib.request.urlopen(req, timeout=float(self.rpc.timeout)) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            jammers = data.get("jammers", [])
-            # 兼容非标准返回
-            if isinstance(jammers, list):
-                return jammers
-            return []
+        data = self._http_get_json(url, path)
+        jammers = data.get("jammers", [])
+        # 兼容非标准返回
+        if isinstance(jammers, list):
+            return jammers
+        return []
 
     def _get_power_via_http(self, name: str, pos_m: Optional[np.ndarray] = None) -> float:
         """查询 UE 端 Jammer 功率。
@@ -205,7 +234,8 @@ class JammerLocator:
         # 构造查询参数：优先使用 GET 以便调试
         params = {"name": name}
         if pos_m is not None and len(pos_m) >= 3:
-            # m -> cm
+            # 局部坐标 -> 世界坐标，m -> cm
+            pos_m = np.asarray(pos_m, dtype=np.float32) + self.origin
             k = float(self.rpc.cm_per_m)
             x_cm = float(pos_m[0]) * k
             y_cm = float(pos_m[1]) * k
@@ -218,10 +248,24 @@ class JammerLocator:
             url_with_qs = f"{base_url}{sep}{qs}"
 
         # 发起 GET 请求
-        req = urllib.request.Request(url_with_qs)
-        with urllib.request.urlopen(req, timeout=float(self.rpc.timeout)) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            # 兼容错误返回
-            if isinstance(data, dict) and "error" in data:
-                return 0.0
-            return float(data.get("power", 0.0))
+        data = self._http_get_json(url_with_qs, self.rpc.power_endpoint)
+        # 兼容错误返回
+        if isinstance(data, dict) and "error" in data:
+            return 0.0
+        return float(data.get("power", 0.0))
+
+    def _http_get_json(self, url: str, endpoint: str):
+        """GET 并解析 JSON；启用插桩时记录 `http:<endpoint>` 的耗时与响应字节数。"""
+        m = self.metrics
+        t0 = time.perf_counter()
+        try:
+            req = urllib.request.Request(url)
+            with urllib.request.urlopen(req, timeout=float(self.rpc.timeout)) as resp:
+                body = resp.read()
+        except Exception:
+            if m is not None:
+                m.record("http:" + endpoint, ALL_VEHICLES, time.perf_counter() - t0, error=True)
+            raise
+        if m is not None:
+            m.record("http:" + endpoint, ALL_VEHICLES, time.perf_counter() - t0, len(body))
+        return json.loads(body.decode("utf-8"))
@@ -1,18 +1,26 @@
 from __future__ import annotations
-from typing import Dict, List, Optional
+from typing import Any, Dict, Generator, List, Optional, Tuple
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
 from pettingzoo.utils.env import ParallelEnv
 
 from ..config import EnvConfig
-from ..utils import clip, in_bounds
-from .airsim_client import AirSimClient
+from ..utils import clip, in_bounds, quat_to_yaw
+from .airsim_client import AirSimClient, ArenaClient, make_client
 from .jammer import JammerLocator
 from .observation import ObservationBuilder
 from .reward import RewardComposer
 from .termination import TerminationChecker
 from .actions import ActionExecutor
+from .dead_reckoning import DeadReckoner
+from .camera import CameraRig
+from .depth_features import DepthSectorSensor
+from .occupancy import OccupancyGrid, RangeFinder, build_occupancy
+from .proximity import ProximityMonitor
+
+# reset/step 计划类型：产出 I/O 请求元组，接收其结果，最终返回 reset/step 的输出
+IOPlan = Generator[Tuple[Any, ...], Any, Any]
 
 
 class AirSimMultiDroneParallelEnv(ParallelEnv):
@@ -21,6 +29,9 @@ class AirSimMultiDroneParallelEnv(ParallelEnv):
     遵循项目规则：
     - 不直接引用 AirSim 原生 client；通过适配层访问。
     - 观测/奖励/终止/动作均为独立模块。
+    - reset/step 的逻辑写成不含 I/O 的计划（`_reset_plan`/`_step_plan`），
+      同步接口由 `_drive` 逐个完成 I/O 请求，异步环境复用同一计划。
+    - 智能体结束（终止/截断）后从 `self.agents` 移除并悬停待命，后续步不再查询其状态。
     """
 
     metadata = {"name": "airsim_multi_drone_parallel_v1"}
@@ -28,31 +39,67 @@ class AirSimMultiDroneParallelEnv(ParallelEnv):
     def __init__(self, cfg: Optional[EnvConfig] = None, client: Optional[AirSimClient] = None):
         # 配置
         self.cfg = cfg or EnvConfig()
+        if self.cfg.action_repeat_mode not in ("single", "substeps"):
+            raise ValueError(f"unknown action repeat mode: {self.cfg.action_repeat_mode!r}")
         self.agents: List[str] = list(self.cfg.agent_names)
         self.possible_agents = list(self.agents)
 
         # 适配层与世界对象
-        # 允许外部注入适配层客户端，便于测试 mock
-        self.client = client or AirSimClient(self.cfg.ip, self.cfg.port)
-        self.jammers = JammerLocator(self.client, self.cfg.jammer_patterns, rpc=self.cfg.ue_rpc)
-        self.obs_builder = ObservationBuilder()
+        # 允许外部注入适配层客户端，便于测试 mock；启用连接池时由 make_client 创建多连接适配层
+        self.client = client or make_client(self.cfg)
+        if isinstance(self.client, ArenaClient):
+            # 竞技场子环境：Jammer 换算到局部坐标，并只保留本竞技场边界内的
+            self.jammers = JammerLocator(
+                self.client, self.cfg.jammer_patterns, rpc=self.cfg.ue_rpc, origin=self.client.origin, bounds=self.cfg.world_bounds,
+                metrics=self.rpc_metrics,
+            )
+        else:
+            self.jammers = JammerLocator(self.client, self.cfg.jammer_patterns, rpc=self.cfg.ue_rpc, metrics=self.rpc_metrics)
+        # 可选：深度扇区观测（追加在基础 17 维之后）
+        self.depth_sensor = (
+            DepthSectorSensor(self.possible_agents, self.cfg.depth_obs, self.cfg.camera) if self.cfg.depth_obs.enabled else None
+        )
+        # 可选：占据栅格射线测距（栅格在首次 reset 时导出/加载，之后每步本地计算）
+        self.rangefinder = RangeFinder(self.cfg.occupancy) if self.cfg.occupancy.enabled else None
+        extras: Dict[str, int] = {}
+        if self.depth_sensor is not None:
+            extras["depth"] = self.depth_sensor.dim
+        if self.rangefinder is not None:
+            extras["range"] = self.rangefinder.dim
+        self.obs_builder = ObservationBuilder(extras)
         self.rew = RewardComposer(self.cfg.reward, self.cfg.jammer_radius, self.cfg.goal_radius, mode=self.cfg.jammer_penalty_mode)
-        self.term = TerminationChecker(self.cfg.max_steps)
+        self.term = TerminationChecker(
+            self.cfg.max_steps, terminate_on_near_miss=self.cfg.proximity.enabled and self.cfg.proximity.terminate_on_near_miss
+        )
         self.action_exec = ActionExecutor(self.cfg.v_max, self.cfg.yaw_rate_max_deg)
+        # 可选：航位推算（中间步不拉取状态）
+        self.dead_reckoning = DeadReckoner(self.cfg.dead_reckoning) if self.cfg.dead_reckoning.enabled else None
+        # 可选：本地机间接近检测（碰撞 RPC 仅对接近的载具查询）
+        self.proximity = ProximityMonitor(self.cfg.proximity) if self.cfg.proximity.enabled else None
+        # 摄像头与帧缓冲按需创建（首次 render 时分配）
+        self._cameras: Optional[CameraRig] = None
 
         # 空间定义
         self.v_max = float(self.cfg.v_max)
         self.yaw_rate_max_deg = float(self.cfg.yaw_rate_max_deg)
         act_high = np.array([self.v_max, self.v_max, self.v_max, self.yaw_rate_max_deg], dtype=np.float32)
         self._action_spaces = {a: spaces.Box(low=-act_high, high=act_high, shape=(4,), dtype=np.float32) for a in self.agents}
-        obs_high = self.obs_builder.high()
-        self._observation_spaces = {a: spaces.Box(low=-obs_high, high=obs_high, shape=(17,), dtype=np.float32) for a in self.agents}
+        bounds: Dict[str, np.ndarray] = {}
+        if self.depth_sensor is not None:
+            bounds["depth"] = self.depth_sensor.high()
+        if self.rangefinder is not None:
+            bounds["range"] = self.rangefinder.high()
+        obs_high = self.obs_builder.high(bounds)
+        self._observation_spaces = {a: spaces.Box(low=-obs_high, high=obs_high, shape=(self.obs_builder.dim,), dtype=np.float32) for a in self.agents}
 
         # 运行时状态
         self._steps = 0
         self._terminated = {a: False for a in self.agents}
         self._truncated = {a: False for a in self.agents}
         self._prev_goal_dist = {a: None for a in self.agents}
+        # 最近一次的深度扇区特征（用于组装观测）
+        self._depth_feats: Dict[str, np.ndarray] = {}
+        self._range_feats: Dict[str, np.ndarray] = {}
 
     # ---- PettingZoo API ----
     def observation_space(self, agent):
@@ -62,64 +109,52 @@ class AirSimMultiDroneParallelEnv(ParallelEnv):
         return self._action_spaces[agent]
 
     def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
-        # 仅在 reset 阶段刷新 Jammer，满足性能约束
-        self.jammers.refresh_positions()
-
-        # 无人机起飞（通过适配层封装）
-        for a in self.agents:
-            x, y, z = self.cfg.spawn_points[a]
-            self.client.spawn_and_takeoff(x, y, z, vehicle_name=a, ignore_collision=True)
-
-        self._steps = 0
-        self._terminated = {a: False for a in self.agents}
-        self._truncated = {a: False for a in self.agents}
-        self._prev_goal_dist = {a: None for a in self.agents}
-
-        obs = {a: self._get_obs(a) for a in self.agents}
-        infos = {a: {} for a in self.agents}
-        return obs, infos
+        return self._drive(self._reset_plan(seed, options))
 
     def step(self, actions: Dict[str, np.ndarray]):
-        # 下发动作（裁剪并等待 join 保证 dt 一致）
-        for a, act in actions.items():
-            if self._terminated[a] or self._truncated[a]:
-                continue
-            # 使用动作执行器统一裁剪动作范围
-            vx, vy, vz, yaw_rate = [float(x) for x in self.action_exec.clip(np.asarray(act, dtype=np.float32))]
-            try:
-                self.client.move_velocity(vx, vy, vz, yaw_rate, self.cfg.dt, vehicle_name=a).join()
-            except Exception:
-                pass
+        return self._drive(self._step_plan(actions))
 
-        self._steps += 1
-
-        obs, rews, terms, truncs, infos = {}, {}, {}, {}, {}
-        for a in self.agents:
-            ob = self._get_obs(a)
-            r, info = self._reward_and_info(a, ob)
-            done, trunc = self.term.done_trunc(self._steps, info["collided"], info["out_of_bounds"], info["reached_goal"])
-            obs[a], rews[a], terms[a], truncs[a], infos[a] = ob, r, done, trunc, info
-            self._terminated[a], self._truncated[a] = done, trunc
-
-        return obs, rews, terms, truncs, infos
+    def active_mask(self) -> np.ndarray:
+        """按 `possible_agents` 顺序返回存活掩码（bool 数组），便于批量消费方对齐。"""
+        live = set(self.agents)
+        return np.array([a in live for a in self.possible_agents], dtype=bool)
 
     def render(self):
         """返回当前帧的渲染信息。
 
         为对齐渲染管线，提供两类输出：
-        - obs：17维观测（兼容既有流程）
-        - rgb：来自 AirSim 摄像头的 RGB 图像（若不可用则为 None）
+        - obs：观测向量（基础 17 维，启用深度观测时追加扇区特征）
+        - rgb：首个摄像头的 Scene 图像（(H, W, 3) uint8，若不可用则为 None）
+
+        图像通过 `CameraRig` 对每个载具发起一次未压缩请求并写入环形缓冲；
+        返回的 rgb 为缓冲视图，`camera.ring_size` 次 render 后会被覆盖，需长期保存时请自行拷贝。
         """
         frames: Dict[str, dict] = {}
+        states = self.client.get_states(self.agents)
+        rig = self.cameras
+        rig.capture(self.agents)
+        cam0 = rig.cfg.cameras[0] if rig.cfg.cameras else "0"
         for a in self.agents:
             frames[a] = {
-                "obs": self._get_obs(a),
-                "rgb": self.client.get_rgb_image(vehicle_name=a, camera_name="0") if hasattr(self.client, "get_rgb_image") else None,
+                "obs": self._get_obs(a, states[a]),
+                "rgb": rig.latest_image(a, cam0, "Scene"),
             }
         return frames
 
+    @property
+    def cameras(self) -> CameraRig:
+        """多机摄像头批量抓图器（按需创建）。"""
+        if self._cameras is None:
+            self._cameras = CameraRig(self.client, self.possible_agents, self.cfg.camera)
+        return self._cameras
+
+    @property
+    def rpc_metrics(self):
+        """适配层插桩统计（`RpcMetrics`）；未启用插桩时为 None。"""
+        return getattr(self.client, "metrics", None)
+
     def close(self):
-        for a in self.agents:
+        for a in self.possible_agents:
             try:
                 self.client.hover(vehicle_name=a).join()
                 self.client.land(vehicle_name=a).join()
@@ -127,44 +162,265 @@ class AirSimMultiDroneParallelEnv(ParallelEnv):
                 self.client.enable_api(False, vehicle_name=a)
             except Exception:
                 pass
+        inst = self.cfg.instrumentation
+        if self.rpc_metrics is not None and inst.export_path:
+            self.rpc_metrics.write(inst.export_path, inst.export_format)
+
+    # ---- reset/step 计划（不含 I/O，同步与异步环境共用） ----
+    # 计划为生成器：以 (op, *args) 形式产出 I/O 请求，由驱动方完成后把结果 send 回来。
+    def _reset_plan(self, seed: Optional[int], options: Optional[dict]) -> IOPlan:
+        self.agents = list(self.possible_agents)
+
+        # 仅在 reset 阶段刷新 Jammer，满足性能约束
+        yield ("refresh_jammers",)
+        # 静态障碍只导出一次（或从地图缓存加载）
+        if self.rangefinder is not None and self.rangefinder.grid is None:
+            self.rangefinder.grid = yield ("scene_export",)
+
+        # 无人机起飞（通过适配层封装）
+        yield ("spawn", {a: self.cfg.spawn_points[a] for a in self.agents})
+
+        self._steps = 0
+        self._terminated = {a: False for a in self.agents}
+        self._truncated = {a: False for a in self.agents}
+        self._prev_goal_dist = {a: None for a in self.agents}
+
+        states, _ = yield ("snapshot", list(self.agents), [])
+        if self.depth_sensor is not None:
+            self._depth_feats = dict((yield ("depth", list(self.agents))))
+        kins = {a: self._kinematics(states[a]) for a in self.agents}
+        if self.dead_reckoning is not None:
+            for a, kin in kins.items():
+                self.dead_reckoning.forget(a)
+                self.dead_reckoning.sync(a, *kin)
+        self._scan_ranges(kins)
+        if self.proximity is not None:
+            self.proximity.reset()
+            self.proximity.update(self.agents, {a: kins[a][0] for a in self.agents})
+        obs = {a: self._build_obs(a, *kins[a]) for a in self.agents}
+        infos = {a: {} for a in self.agents}
+        return obs, infos
+
+    def _step_plan(self, actions: Dict[str, np.ndarray]) -> IOPlan:
+        # 裁剪动作（使用动作执行器统一裁剪范围）；仅存活智能体的动作生效
+        live = list(self.agents)
+        commands = {}
+        for a in live:
+            if a in actions:
+                commands[a] = [float(x) for x in self.action_exec.clip(np.asarray(actions[a], dtype=np.float32))]
+
+        repeat = max(1, int(self.cfg.action_repeat))
+        if repeat == 1 or self.cfg.action_repeat_mode == "single":
+            # 单条长指令：一次下发 repeat*dt，仅在末尾做一次观测/奖励/终止判定
+            out = yield from self._advance_plan(commands, live, self.cfg.dt * repeat, repeat)
+        else:
+            out = yield from self._substeps_plan(commands, live, repeat)
+
+        # 结束的智能体移出 self.agents，并各下发一次悬停指令待命
+        _, _, terms, truncs, _ = out
+        finished = [a for a in live if terms[a] or truncs[a]]
+        if finished:
+            self.agents = [a for a in self.agents if a not in finished]
+            yield ("park", finished)
+        return out
+
+    def _substeps_plan(self, commands: Dict[str, list], names: List[str], repeat: int) -> IOPlan:
+        """子步模式：repeat 个 dt 子步锁步推进，奖励逐子步累加，终止按子步判定。"""
+        obs, rews, terms, truncs, infos = {}, {}, {}, {}, {}
+        for _ in range(repeat):
+            o, r, te, tr, inf = yield from self._advance_plan(commands, names, self.cfg.dt, 1)
+            for a in names:
+                rews[a] = rews.get(a, 0.0) + r[a]
+            obs.update(o)
+            terms.update(te)
+            truncs.update(tr)
+            infos.update(inf)
+            # 子步内结束的智能体停止下发指令与累计奖励
+            names = [a for a in names if not (te[a] or tr[a])]
+            commands = {a: c for a, c in commands.items() if a in names}
+            if not names:
+                break
+        return obs, rews, terms, truncs, infos
+
+    def _advance_plan(self, commands: Dict[str, list], names: List[str], duration: float, n_steps: int) -> IOPlan:
+        """下发一次速度指令并推进 n_steps 个 dt，返回 names 中各智能体的观测/奖励/终止/信息。"""
+        # 批量下发，统一等待 join 保证 dt 一致
+        yield ("move", commands, duration)
+
+        self._steps += n_steps
+
+        # 批量拉取状态与碰撞信息（连接池/异步模式下按载具并发）
+        dr = self.dead_reckoning
+        prox = self.proximity
+        state_names = list(names)
+        if dr is not None:
+            # 航位推算：先外推全部载具，仅对到期/误差超限/接近终止条件的载具拉取真实状态；
+            # 截断步全部同步，训练侧由该步的真实观测自举
+            for a in names:
+                dr.predict(a, commands.get(a), duration)
+            truncating = self._steps >= self.cfg.max_steps
+            state_names = [a for a in names if truncating or dr.needs_sync(a) or self._dr_near_termination(a)]
+        # 启用接近检测时，碰撞 RPC 推迟到位置已知后按需查询
+        states, collisions = yield ("snapshot", state_names, [] if prox is not None else list(names))
+        kins = self._collect_kinematics(names, states)
+        self._scan_ranges(kins)
+        nearest: Dict[str, float] = {}
+        if prox is not None:
+            positions = {a: kins[a][0] for a in names}
+            nearest = prox.update(names, positions)
+            poll = prox.poll_set(names, positions, nearest, self.cfg.world_bounds, self._obstacle_dists(names))
+            if poll:
+                _, collisions = yield ("snapshot", [], poll)
+        collided = {a: bool(collisions[a].has_collided) if a in collisions else False for a in names}
+        if dr is not None:
+            # 发生碰撞的外推载具在终止判定前强制同步
+            forced = [a for a in names if a not in states and collided[a]]
+            if forced:
+                extra, _ = yield ("snapshot", forced, [])
+                states.update(extra)
+                forced_kins = self._collect_kinematics(forced, extra)
+                kins.update(forced_kins)
+                self._scan_ranges(forced_kins)
+                if prox is not None:
+                    nearest.update(prox.update(forced, {a: forced_kins[a][0] for a in forced}))
+        if self.depth_sensor is not None:
+            self._depth_feats.update((yield ("depth", list(names))))
+        ob_all = {a: self._build_obs(a, *kins[a]) for a in names}
+        powers: Dict[str, float] = {}
+        if self.cfg.jammer_penalty_mode == "power":
+            # 传入当前步数以实现步频控制
+            powers = yield ("powers", {a: ob_all[a][0:3] for a in names}, self._steps)
+
+        pc = self.cfg.proximity
+        obs, rews, terms, truncs, infos = {}, {}, {}, {}, {}
+        for a in names:
+            ob = ob_all[a]
+            r, info = self._reward_and_info(a, ob, collided[a], powers.get(a), n_steps)
+            if prox is not None:
+                pr, pinfo = self.rew.proximity(nearest[a], pc.near_miss_radius, pc.separation_radius, n_steps)
+                r += pr
+                info.update(pinfo)
+                info["collision_polled"] = a in collisions
+            done, trunc = self.term.done_trunc(self._steps, info["collided"], info["out_of_bounds"], info["reached_goal"], info.get("near_miss", False))
+            if dr is not None:
+                info["state_synced"] = a in states
+                info["drift"] = float(dr.last_drift.get(a, 0.0))
+            obs[a], rews[a], terms[a], truncs[a], infos[a] = ob, r, done, trunc, info
+            self._terminated[a], self._truncated[a] = done, trunc
+
+        return obs, rews, terms, truncs, infos
+
+    # ---- 同步 I/O 驱动 ----
+    def _drive(self, plan: IOPlan):
+        """同步执行计划：逐个完成 I/O 请求并回送结果，返回计划的返回值。"""
+        try:
+            req = next(plan)
+            while True:
+                req = plan.send(getattr(self, "_io_" + req[0])(*req[1:]))
+        except StopIteration as stop:
+            return stop.value
+
+    def _io_refresh_jammers(self):
+        self.jammers.refresh_positions()
+
+    def _io_spawn(self, spawns: Dict[str, tuple]):
+        for a, (x, y, z) in spawns.items():
+            self.client.spawn_and_takeoff(x, y, z, vehicle_name=a, ignore_collision=True)
+
+    def _io_move(self, commands: Dict[str, list], duration: float):
+        self.client.move_velocity_batch(commands, duration)
+
+    def _io_park(self, names: List[str]):
+        self.client.hover_batch(names)
+
+    def _io_snapshot(self, state_names: List[str], collision_names: List[str]):
+        states = self.client.get_states(state_names) if state_names else {}
+        collisions = self.client.get_collisions(collision_names) if collision_names else {}
+        return states, collisions
+
+    def _io_depth(self, names: List[str]) -> Dict[str, np.ndarray]:
+        return self.depth_sensor.features(self.client.get_images_batch(names, self.depth_sensor.specs))
+
+    def _io_scene_export(self) -> OccupancyGrid:
+        return build_occupancy(self.client, self.cfg.occupancy, self.cfg.world_bounds)
+
+    def _io_powers(self, positions: Dict[str, np.ndarray], step: int) -> Dict[str, float]:
+        return {a: float(self.jammers.nearest_power(p, step=step)) for a, p in positions.items()}
 
     # ---- internals ----
-    def _get_obs(self, a: str) -> np.ndarray:
-        st = self.client.get_state(vehicle_name=a)
+    def _get_obs(self, a: str, st) -> np.ndarray:
+        return self._build_obs(a, *self._kinematics(st))
+
+    @staticmethod
+    def _kinematics(st):
+        """从多旋翼状态中提取 (pos, vel, yaw)。"""
         pos = st.kinematics_estimated.position
         vel = st.kinematics_estimated.linear_velocity
         ori = st.kinematics_estimated.orientation
         # 计算 yaw
-        from ..utils import quat_to_yaw
         yaw = quat_to_yaw(ori.w_val, ori.x_val, ori.y_val, ori.z_val)
-
         pos_np = np.array([pos.x_val, pos.y_val, pos.z_val], dtype=np.float32)
         vel_np = np.array([vel.x_val, vel.y_val, vel.z_val], dtype=np.float32)
+        return pos_np, vel_np, float(yaw)
+
+    def _collect_kinematics(self, names: List[str], states: Dict[str, Any]) -> Dict[str, tuple]:
+        """已拉取状态的载具取真实运动学（并同步航位推算），其余取推算值。"""
+        kins = {}
+        for a in names:
+            if a in states:
+                kins[a] = self._kinematics(states[a])
+                if self.dead_reckoning is not None:
+                    self.dead_reckoning.sync(a, *kins[a])
+            else:
+                kins[a] = self.dead_reckoning.state(a)
+        return kins
+
+    def _obstacle_dists(self, names: List[str]) -> Optional[Dict[str, float]]:
+        """由测距特征得到各载具到最近静态障碍的距离（米）；未启用测距时为 None。"""
+        if self.rangefinder is None or not self._range_feats:
+            return None
+        oc = self.cfg.occupancy
+        scale = float(oc.max_range) if oc.normalize else 1.0
+        return {a: float(self._range_feats[a].min()) * scale for a in names if a in self._range_feats}
+
+    def _scan_ranges(self, kins: Dict[str, tuple]) -> None:
+        """对给定载具批量射线测距并缓存结果（纯本地计算）。"""
+        if self.rangefinder is None or self.rangefinder.grid is None or not kins:
+            return
+        names = list(kins)
+        ranges = self.rangefinder.scan(np.stack([kins[a][0] for a in names]), np.array([kins[a][2] for a in names], dtype=np.float32))
+        self._range_feats.update(zip(names, ranges))
+
+    def _dr_near_termination(self, a: str) -> bool:
+        goal = np.array(self.cfg.goal_points[a], dtype=np.float32)
+        return self.dead_reckoning.near_termination(a, goal, self.cfg.goal_radius, self.cfg.world_bounds)
+
+    def _build_obs(self, a: str, pos_np: np.ndarray, vel_np: np.ndarray, yaw: float) -> np.ndarray:
         goal = np.array(self.cfg.goal_points[a], dtype=np.float32)
         jam_vec, d_jam = self.jammers.nearest_vec(pos_np)
         # last_action 由 client 不维护，这里置 0 以满足形状；真实实现可在更高层维护
         last_action = np.zeros(4, dtype=np.float32)
 
-        ob = self.obs_builder.build(pos_np, vel_np, float(yaw), goal, jam_vec, last_action)
+        extras = {"depth": self._depth_feats.get(a), "range": self._range_feats.get(a)}
+        ob = self.obs_builder.build(pos_np, vel_np, float(yaw), goal, jam_vec, last_action, extras)
         # 缓存用于进步奖励
         self._prev_goal_dist[a] = float(np.linalg.norm(goal - pos_np)) if self._prev_goal_dist[a] is None else self._prev_goal_dist[a]
         return ob
 
-    def _reward_and_info(self, a: str, ob: np.ndarray):
+    def _reward_and_info(self, a: str, ob: np.ndarray, collided: bool, power: Optional[float] = None, n_steps: int = 1):
         pos = ob[0:3]
         goal_delta = ob[7:10]
         jam_vec = ob[10:13]
         dist_to_goal = float(np.linalg.norm(goal_delta))
         d_jam = float(np.linalg.norm(jam_vec))
 
-        # 终止信号相关标志（通过适配层查询）
-        collided = bool(self.client.get_collision(vehicle_name=a).has_collided)
+        # 终止信号相关标志（碰撞由 step 批量查询后传入）
         oob = not in_bounds(pos, self.cfg.world_bounds)
         reached = dist_to_goal <= self.cfg.goal_radius
 
-        # 根据模式选择距离或功率作为第三参数（传入当前步数以实现步频控制）
-        d_or_power = d_jam if self.cfg.jammer_penalty_mode != "power" else float(self.jammers.nearest_power(pos, step=self._steps))
-        r, info = self.rew.compute(self._prev_goal_dist[a], dist_to_goal, d_or_power, collided, oob, reached)
+        # 根据模式选择距离或功率作为第三参数（功率由 step 计划批量查询后传入）
+        d_or_power = d_jam if self.cfg.jammer_penalty_mode != "power" else float(power or 0.0)
+        r, info = self.rew.compute(self._prev_goal_dist[a], dist_to_goal, d_or_power, collided, oob, reached, n_steps=n_steps)
         if self.cfg.jammer_penalty_mode == "power":
             info["nearest_jammer_dist"] = d_jam
         # 更新 prev_goal_dist
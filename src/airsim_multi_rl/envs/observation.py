@@ -1,17 +1,55 @@
 from __future__ import annotations
-from typing import Dict
+from typing import Dict, Optional
 import numpy as np
 
+BASE_OBS_DIM = 17
+
+
 class ObservationBuilder:
     """集中式观测构建器。
 
     默认 17 维：pos(3), vel(3), yaw(1), goal_delta(3), nearest_jammer_delta(3), last_action(4)
+
+    可通过 `extras` 按顺序追加命名特征块（如深度扇区 {"depth": 32}），
+    各块在观测中的位置见 `layout()`。
     """
 
-    def build(self, pos: np.ndarray, vel: np.ndarray, yaw: float, goal: np.ndarray, jam_vec: np.ndarray, last_action: np.ndarray) -> np.ndarray:
+    def __init__(self, extras: Optional[Dict[str, int]] = None):
+        self.extras: Dict[str, int] = dict(extras or {})
+        self.dim = BASE_OBS_DIM + sum(int(n) for n in self.extras.values())
+
+    def build(
+        self,
+        pos: np.ndarray,
+        vel: np.ndarray,
+        yaw: float,
+        goal: np.ndarray,
+        jam_vec: np.ndarray,
+        last_action: np.ndarray,
+        extras: Optional[Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
         yaw_arr = np.array([yaw], dtype=np.float32)
         goal_delta = (goal.astype(np.float32) - pos.astype(np.float32))
-        return np.concatenate([pos.astype(np.float32), vel.astype(np.float32), yaw_arr, goal_delta, jam_vec.astype(np.float32), last_action.astype(np.float32)], axis=0)
+        parts = [pos.astype(np.float32), vel.astype(np.float32), yaw_arr, goal_delta, jam_vec.astype(np.float32), last_action.astype(np.float32)]
+        for name, n in self.extras.items():
+            # 缺失的特征块以 0 填充，保证维度固定
+            v = (extras or {}).get(name)
+            parts.append(np.zeros(n, dtype=np.float32) if v is None else np.asarray(v, dtype=np.float32).reshape(n))
+        return np.concatenate(parts, axis=0)
+
+    def layout(self) -> Dict[str, slice]:
+        """各追加特征块在观测向量中的切片。"""
+        out: Dict[str, slice] = {}
+        start = BASE_OBS_DIM
+        for name, n in self.extras.items():
+            out[name] = slice(start, start + int(n))
+            start += int(n)
+        return out
 
-    def high(self) -> np.ndarray:
-        return np.full((17,), np.inf, dtype=np.float32)
\ No newline at end of file
+    def high(self, bounds: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """观测上界：默认无界；`bounds` 可为追加特征块给出已知上界（如深度扇区的量程）。"""
+        out = np.full((self.dim,), np.inf, dtype=np.float32)
+        layout = self.layout()
+        for name, b in (bounds or {}).items():
+            out[layout[name]] = b
+        return out
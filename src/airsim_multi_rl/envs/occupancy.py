@@ -0,0 +1,181 @@
+from __future__ import annotations
+import hashlib
+import json
+import math
+import os
+from typing import List, Optional, Tuple
+import numpy as np
+
+from ..config import OccupancyConfig
+from .airsim_client import AirSimClient
+
+Bounds = Tuple[Tuple[float, float], Tuple[float, float], Tuple[float, float]]
+
+
+def _quat_abs_rot(w: float, x: float, y: float, z: float) -> np.ndarray:
+    """四元数对应旋转矩阵的逐元素绝对值，用于求旋转包围盒的轴对齐半边长。"""
+    n = math.sqrt(w * w + x * x + y * y + z * z) or 1.0
+    w, x, y, z = w / n, x / n, y / n, z / n
+    r = np.array(
+        [
+            [1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+            [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+            [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)],
+        ],
+        dtype=np.float32,
+    )
+    return np.abs(r)
+
+
+def export_scene_boxes(client: AirSimClient, patterns: List[str], base_size: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """通过适配层导出场景静态物体的轴对齐包围盒。
+
+    每个物体按边长 `base_size × scale` 的立方体近似，旋转后取轴对齐包围盒。
+    查询失败或位姿为 NaN（物体不存在）的条目被忽略。
+
+    Returns:
+        (centers, half_extents)，形状均为 (N, 3) float32。
+    """
+    names: List[str] = []
+    for p in patterns:
+        try:
+            names += client.list_scene_objects(p)
+        except Exception:
+            pass
+    centers, halves = [], []
+    for name in sorted(set(names)):
+        try:
+            pose = client.get_object_pose(name)
+            scale = client.get_object_scale(name)
+        except Exception:
+            continue
+        c = np.array([pose.position.x_val, pose.position.y_val, pose.position.z_val], dtype=np.float32)
+        if not np.all(np.isfinite(c)):
+            continue
+        ori = getattr(pose, "orientation", None)
+        rot = _quat_abs_rot(ori.w_val, ori.x_val, ori.y_val, ori.z_val) if ori is not None else np.eye(3, dtype=np.float32)
+        h = 0.5 * float(base_size) * np.abs(np.asarray(scale, dtype=np.float32))
+        centers.append(c)
+        halves.append(rot @ h)
+    if not centers:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32)
+    return np.stack(centers).astype(np.float32), np.stack(halves).astype(np.float32)
+
+
+class OccupancyGrid:
+    """均匀体素占据栅格（世界系，NED）。
+
+    `occ[i, j, k]` 表示体素 [origin + (i, j, k) * res, origin + (i+1, j+1, k+1) * res) 是否被占据；
+    栅格外视为空闲（越界由终止条件处理）。
+    """
+
+    def __init__(self, origin: np.ndarray, resolution: float, occ: np.ndarray):
+        self.origin = np.asarray(origin, dtype=np.float32)
+        self.resolution = float(resolution)
+        self.occ = np.asarray(occ, dtype=bool)
+
+    @classmethod
+    def from_boxes(cls, centers: np.ndarray, half_extents: np.ndarray, bounds: Bounds, resolution: float) -> "OccupancyGrid":
+        """把轴对齐包围盒体素化：与包围盒有重叠的体素均标记为占据。"""
+        lo = np.array([b[0] for b in bounds], dtype=np.float32)
+        hi = np.array([b[1] for b in bounds], dtype=np.float32)
+        shape = np.maximum(np.ceil((hi - lo) / resolution).astype(int), 1)
+        occ = np.zeros(tuple(shape), dtype=bool)
+        for c, h in zip(np.asarray(centers, dtype=np.float32), np.asarray(half_extents, dtype=np.float32)):
+            i0 = np.clip(np.floor((c - h - lo) / resolution).astype(int), 0, shape)
+            i1 = np.clip(np.ceil((c + h - lo) / resolution).astype(int), 0, shape)
+            if np.all(i1 > i0):
+                occ[i0[0]:i1[0], i0[1]:i1[1], i0[2]:i1[2]] = True
+        return cls(lo, resolution, occ)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 栅格按位打包存储
+        np.savez_compressed(path, origin=self.origin, resolution=self.resolution, shape=np.array(self.occ.shape), bits=np.packbits(self.occ))
+
+    @classmethod
+    def load(cls, path: str) -> "OccupancyGrid":
+        with np.load(path) as z:
+            shape = tuple(int(v) for v in z["shape"])
+            occ = np.unpackbits(z["bits"], count=int(np.prod(shape))).reshape(shape).astype(bool)
+            return cls(z["origin"], float(z["resolution"]), occ)
+
+    def occupied(self, points: np.ndarray) -> np.ndarray:
+        """批量查询点是否落在占据体素内，points 形状 (..., 3)。"""
+        idx = np.floor((points - self.origin) / self.resolution).astype(np.intp)
+        inside = np.all((idx >= 0) & (idx < np.array(self.occ.shape)), axis=-1)
+        out = np.zeros(inside.shape, dtype=bool)
+        ii = idx[inside]
+        out[inside] = self.occ[ii[:, 0], ii[:, 1], ii[:, 2]]
+        return out
+
+    def raycast(self, origins: np.ndarray, dirs: np.ndarray, max_range: float) -> np.ndarray:
+        """批量射线求交（固定步长步进，步长为半个体素）。
+
+        Args:
+            origins: (A, 3) 射线起点。
+            dirs: (A, R, 3) 单位方向。
+            max_range: 量程（米）。
+
+        Returns:
+            (A, R) float32，首个占据采样点的距离；未命中为 max_range。
+        """
+        step = 0.5 * self.resolution
+        t = np.arange(step, float(max_range) + 1e-6, step, dtype=np.float32)
+        pts = origins[:, None, None, :] + dirs[:, :, None, :] * t[None, None, :, None]
+        hit = self.occupied(pts)
+        first = hit.argmax(axis=-1)
+        return np.where(hit.any(axis=-1), t[first], np.float32(max_range)).astype(np.float32)
+
+
+class RangeFinder:
+    """基于占据栅格的批量测距传感器：机体系射线按偏航旋转后对全部载具一次求交。
+
+    栅格可在构造后再设置（环境在首次 reset 时导出场景）。
+    """
+
+    def __init__(self, cfg: OccupancyConfig, grid: Optional[OccupancyGrid] = None):
+        self.grid = grid
+        self.cfg = cfg
+        az = np.arange(int(cfg.n_rays), dtype=np.float32) * (2.0 * np.pi / max(int(cfg.n_rays), 1))
+        el = np.radians(np.asarray(cfg.elevations_deg or [0.0], dtype=np.float32))
+        az_g, el_g = np.meshgrid(az, el)
+        # NED：z 轴向下，仰角为正时 z 分量为负
+        self._az = az_g.ravel()
+        self._cos_el = np.cos(el_g).ravel()
+        self._dz = -np.sin(el_g).ravel()
+        self.dim = int(self._az.size)
+
+    def scan(self, positions: np.ndarray, yaws: np.ndarray) -> np.ndarray:
+        """返回 (A, dim) 测距特征（按配置归一化）。"""
+        ang = self._az[None, :] + np.asarray(yaws, dtype=np.float32)[:, None]
+        dirs = np.stack([self._cos_el * np.cos(ang), self._cos_el * np.sin(ang), np.broadcast_to(self._dz, ang.shape)], axis=-1)
+        ranges = self.grid.raycast(np.asarray(positions, dtype=np.float32), dirs, float(self.cfg.max_range))
+        if self.cfg.normalize:
+            ranges /= float(self.cfg.max_range)
+        return ranges
+
+    def high(self) -> np.ndarray:
+        """特征上界：归一化时为 1，否则为量程。"""
+        return np.full((self.dim,), 1.0 if self.cfg.normalize else float(self.cfg.max_range), dtype=np.float32)
+
+
+def cache_path(cfg: OccupancyConfig, bounds: Bounds) -> Optional[str]:
+    """按地图名与栅格参数生成缓存文件路径；未设置地图名时返回 None（不缓存）。"""
+    if not cfg.map_name:
+        return None
+    key = json.dumps([list(cfg.patterns), cfg.base_size, cfg.resolution, [list(b) for b in bounds]])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(cfg.cache_dir, f"{cfg.map_name}_{digest}.npz")
+
+
+def build_occupancy(client: AirSimClient, cfg: OccupancyConfig, bounds: Bounds) -> OccupancyGrid:
+    """加载缓存的占据栅格；无缓存时导出场景并体素化（有地图名时写入缓存）。"""
+    path = cache_path(cfg, bounds)
+    if path is not None and os.path.exists(path):
+        return OccupancyGrid.load(path)
+    centers, halves = export_scene_boxes(client, cfg.patterns, cfg.base_size)
+    grid = OccupancyGrid.from_boxes(centers, halves, bounds, cfg.resolution)
+    if path is not None:
+        grid.save(path)
+    return grid
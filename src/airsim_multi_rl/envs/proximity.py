@@ -0,0 +1,105 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+from ..config import ProximityConfig
+
+
+def pairwise_distances(positions: np.ndarray) -> np.ndarray:
+    """(A, 3) 位置的两两欧氏距离矩阵 (A, A)，对角线为 inf。"""
+    p = np.asarray(positions, dtype=np.float32)
+    diff = p[:, None, :] - p[None, :, :]
+    d = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+    np.fill_diagonal(d, np.inf)
+    return d
+
+
+def nearest_by_hash(positions: np.ndarray, radius: float) -> np.ndarray:
+    """空间哈希求各点最近邻距离，仅考虑 `radius` 内的邻居（超出为 inf）。
+
+    以边长 radius 的立方体划分网格，每个点只与相邻 27 个格子中的点比较，
+    复杂度约为 O(A)，适合大规模机群。
+    """
+    p = np.asarray(positions, dtype=np.float32)
+    n = p.shape[0]
+    out = np.full(n, np.inf, dtype=np.float32)
+    if n < 2:
+        return out
+    cells = np.floor(p / float(radius)).astype(np.int64)
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for i, c in enumerate(map(tuple, cells)):
+        buckets[c].append(i)
+    offsets = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)], dtype=np.int64)
+    for i in range(n):
+        cand = [j for off in map(tuple, cells[i] + offsets) for j in buckets.get(off, ()) if j != i]
+        if cand:
+            d = np.linalg.norm(p[cand] - p[i], axis=1).min()
+            if d <= radius:
+                out[i] = d
+    return out
+
+
+class ProximityMonitor:
+    """本地机间接近检测：由步快照的位置计算最近邻距离，不产生仿真 I/O。
+
+    - 载具数不超过 `hash_threshold` 时用 (A, A) 距离矩阵，否则用空间哈希；
+    - 已结束（悬停待命）的载具保留最后位置，仍参与其他载具的接近判定；
+    - `poll_set` 给出需要查询碰撞 RPC 的载具：与其他载具/边界/障碍物接近，
+      或每 `poll_all_every` 步一次的全量兜底查询（用于发现未建模障碍物的碰撞）。
+    """
+
+    def __init__(self, cfg: ProximityConfig):
+        self.cfg = cfg
+        self._last_pos: Dict[str, np.ndarray] = {}
+        self._ticks = 0
+
+    def reset(self) -> None:
+        self._last_pos.clear()
+        self._ticks = 0
+
+    def update(self, names: Iterable[str], positions: Dict[str, np.ndarray]) -> Dict[str, float]:
+        """记录位置并返回 names 中各载具到最近其他载具的距离（米；无邻居为 inf）。"""
+        names = list(names)
+        for a in names:
+            self._last_pos[a] = np.asarray(positions[a], dtype=np.float32)
+        if not names:
+            return {}
+        known = list(self._last_pos)
+        p = np.stack([self._last_pos[a] for a in known])
+        if len(known) <= int(self.cfg.hash_threshold):
+            nearest = pairwise_distances(p).min(axis=1)
+        else:
+            radius = max(float(self.cfg.separation_radius), float(self.cfg.collision_poll_radius), float(self.cfg.near_miss_radius))
+            nearest = nearest_by_hash(p, radius)
+        idx = {a: i for i, a in enumerate(known)}
+        return {a: float(nearest[idx[a]]) for a in names}
+
+    def poll_set(
+        self,
+        names: Iterable[str],
+        positions: Dict[str, np.ndarray],
+        nearest: Dict[str, float],
+        bounds,
+        obstacle_dist: Optional[Dict[str, float]] = None,
+    ) -> List[str]:
+        """返回本步需要查询碰撞 RPC 的载具。"""
+        names = list(names)
+        self._ticks += 1
+        every = int(self.cfg.poll_all_every)
+        if every > 0 and self._ticks % every == 0:
+            return names
+        r = float(self.cfg.collision_poll_radius)
+        margin = float(self.cfg.bounds_margin)
+        lo = np.array([b[0] for b in bounds], dtype=np.float32)
+        hi = np.array([b[1] for b in bounds], dtype=np.float32)
+        out = []
+        for a in names:
+            pos = positions[a]
+            if nearest.get(a, np.inf) <= r:
+                out.append(a)
+            elif np.any(pos - lo <= margin) or np.any(hi - pos <= margin):
+                out.append(a)
+            elif obstacle_dist is not None and obstacle_dist.get(a, np.inf) <= r:
+                out.append(a)
+        return out
@@ -9,6 +9,9 @@ class RewardComposer:
     支持两种干扰惩罚模式：
     - distance：进入半径内线性扣分
     - power：按UE提供的功率做线性或比例扣分
+
+    `n_steps` 为本次结算覆盖的 dt 步数（动作重复的单条长指令模式），
+    按时间累计的项（干扰惩罚、步惩罚）乘以该步数。
     """
 
     def __init__(self, weights: RewardWeights, jammer_radius: float, goal_radius: float, mode: str = "distance"):
@@ -17,12 +20,12 @@ class RewardComposer:
         self.goal_radius = float(goal_radius)
         self.mode = str(mode)
 
-    def compute_distance(self, prev_goal_dist: float | None, dist_to_goal: float, d_jam: float, collided: bool, oob: bool, reached: bool) -> Tuple[float, dict]:
+    def compute_distance(self, prev_goal_dist: float | None, dist_to_goal: float, d_jam: float, collided: bool, oob: bool, reached: bool, n_steps: int = 1) -> Tuple[float, dict]:
         progress = 0.0 if prev_goal_dist is None else (prev_goal_dist - dist_to_goal)
         r = self.w.progress * progress
         if d_jam < self.jammer_radius:
-            r -= self.w.jammer_penalty * (self.jammer_radius - d_jam)
-        r -= self.w.step_penalty
+            r -= self.w.jammer_penalty * (self.jammer_radius - d_jam) * n_steps
+        r -= self.w.step_penalty * n_steps
         if reached:
             r += self.w.success_bonus
         if collided:
@@ -38,12 +41,12 @@ class RewardComposer:
         }
         return float(r), info
 
-    def compute_power(self, prev_goal_dist: float | None, dist_to_goal: float, power: float, collided: bool, oob: bool, reached: bool) -> Tuple[float, dict]:
+    def compute_power(self, prev_goal_dist: float | None, dist_to_goal: float, power: float, collided: bool, oob: bool, reached: bool, n_steps: int = 1) -> Tuple[float, dict]:
         progress = 0.0 if prev_goal_dist is None else (prev_goal_dist - dist_to_goal)
         r = self.w.progress * progress
         # 简单线性扣分：功率越大惩罚越多，可按需替换为更真实的信道模型
-        r -= self.w.jammer_penalty * float(power)
-        r -= self.w.step_penalty
+        r -= self.w.jammer_penalty * float(power) * n_steps
+        r -= self.w.step_penalty * n_steps
         if reached:
             r += self.w.success_bonus
         if collided:
@@ -59,8 +62,18 @@ class RewardComposer:
         }
         return float(r), info
 
-    def compute(self, prev_goal_dist: float | None, dist_to_goal: float, d_or_power: float, collided: bool, oob: bool, reached: bool) -> Tuple[float, dict]:
+    def proximity(self, d_nearest: float, near_miss_radius: float, separation_radius: float, n_steps: int = 1) -> Tuple[float, dict]:
+        """机间接近奖励项：间隔不足按差值线性扣分（按步累计），近失一次性扣分。"""
+        r = 0.0
+        if d_nearest < separation_radius:
+            r -= self.w.separation_penalty * (separation_radius - d_nearest) * n_steps
+        near_miss = d_nearest < near_miss_radius
+        if near_miss:
+            r -= self.w.near_miss_penalty
+        return float(r), {"nearest_drone_dist": float(d_nearest), "near_miss": bool(near_miss)}
+
+    def compute(self, prev_goal_dist: float | None, dist_to_goal: float, d_or_power: float, collided: bool, oob: bool, reached: bool, n_steps: int = 1) -> Tuple[float, dict]:
         if self.mode == "power":
-            return self.compute_power(prev_goal_dist, dist_to_goal, d_or_power, collided, oob, reached)
+            return self.compute_power(prev_goal_dist, dist_to_goal, d_or_power, collided, oob, reached, n_steps)
         else:
-            return self.compute_distance(prev_goal_dist, dist_to_goal, d_or_power, collided, oob, reached)
\ No newline at end of file
+            return self.compute_distance(prev_goal_dist, dist_to_goal, d_or_power, collided, oob, reached, n_steps)
\ No newline at end of file
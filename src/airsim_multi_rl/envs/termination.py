@@ -4,10 +4,11 @@ from typing import Tuple
 class TerminationChecker:
     """终止/截断判定模块。"""
 
-    def __init__(self, max_steps: int):
+    def __init__(self, max_steps: int, terminate_on_near_miss: bool = False):
         self.max_steps = int(max_steps)
+        self.terminate_on_near_miss = bool(terminate_on_near_miss)
 
-    def done_trunc(self, steps: int, collided: bool, oob: bool, reached: bool) -> Tuple[bool, bool]:
-        done = bool(collided or oob or reached)
+    def done_trunc(self, steps: int, collided: bool, oob: bool, reached: bool, near_miss: bool = False) -> Tuple[bool, bool]:
+        done = bool(collided or oob or reached or (near_miss and self.terminate_on_near_miss))
         trunc = bool(steps >= self.max_steps)
-        return done, trunc
\ No newline at end of file
+        return done, trunc
@@ -0,0 +1,263 @@
+from __future__ import annotations
+import importlib
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence
+import numpy as np
+
+from ..config import CameraConfig, EnvConfig, RecorderConfig
+from ..envs.airsim_client import AirSimClient, make_client
+from ..envs.camera import ImageFrameBuffer
+
+
+class FrameRecorder:
+    """异步帧录制器：后台线程按固定频率抓帧，线程池编码并分块写盘。
+
+    线程划分：
+    - 抓帧线程：按 `rate_hz` 调用 `get_images_batch`，结果放入有界队列，队列满则丢帧计数；
+      适配层按未压缩格式取图，解码只是 `np.frombuffer` 零拷贝视图，抓帧线程上只剩 RPC 本身；
+    - 组装线程：把帧拷贝（及降采样）进预分配的块缓冲（`ImageFrameBuffer`，容量为 `chunk_frames`），写满即提交编码；
+    - 编码线程池：将块写为 `npz`（压缩数组）或按载具/摄像头写为 `mp4`（需要 imageio）。
+
+    块缓冲数量固定为 `max_pending_chunks + 1`，没有空闲缓冲时同样丢帧，内存占用有上界。
+    训练线程只需在 reset 时调用 `new_episode()`，不会等待任何渲染 I/O。
+
+    注意：AirSim 单连接客户端不支持多线程并发调用，请为录制器单独创建 `AirSimClient`，
+    或传入线程安全的 `AirSimClientPool`。
+    """
+
+    def __init__(
+        self,
+        client: AirSimClient,
+        agent_names: Sequence[str],
+        camera: CameraConfig,
+        cfg: Optional[RecorderConfig] = None,
+    ):
+        self.client = client
+        self.agent_names = list(agent_names)
+        self.camera = camera
+        self.cfg = cfg or RecorderConfig()
+        if self.cfg.fmt not in ("npz", "mp4"):
+            raise ValueError(f"unknown recorder format: {self.cfg.fmt!r}")
+        self.specs = [(c, t) for c, t in itertools.product(camera.cameras, camera.image_types)]
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(self.cfg.max_queue)))
+        self._free: "queue.Queue[ImageFrameBuffer]" = queue.Queue()
+        for _ in range(max(1, int(self.cfg.max_pending_chunks)) + 1):
+            self._free.put(self._new_buffer())
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: List[Future] = []
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._episode = 0
+        self._chunk_idx = 0
+        self._cur: Optional[ImageFrameBuffer] = None
+        self._cur_ts: Optional[np.ndarray] = None
+        self._cur_episode = 0
+        self.captured = 0
+        self.dropped = 0
+        self.chunks_written = 0
+        self.bytes_written = 0
+        self.errors = 0
+
+    # ---- 生命周期 ----
+    def start(self) -> "FrameRecorder":
+        if self._threads:
+            return self
+        os.makedirs(self.cfg.out_dir, exist_ok=True)
+        self._stop.clear()
+        # 编码线程池随每次 start 新建，stop 后可再次启动
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(self.cfg.workers)), thread_name_prefix="recorder-enc")
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="recorder-capture", daemon=True),
+            threading.Thread(target=self._assemble_loop, name="recorder-assemble", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def stop(self) -> None:
+        """停止抓帧，写出未满的块并等待全部编码完成；未启动或重复调用时直接返回。"""
+        if not self._threads:
+            return
+        self._stop.set()
+        self._threads[0].join()
+        self._queue.put(None)
+        self._threads[1].join()
+        self._threads = []
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def new_episode(self) -> int:
+        """开始新回合：之后抓到的帧写入新的回合目录，返回新回合序号。"""
+        with self._lock:
+            self._episode += 1
+            return self._episode
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            out = {
+                "captured": int(self.captured),
+                "dropped": int(self.dropped),
+                "chunks_written": int(self.chunks_written),
+                "bytes_written": int(self.bytes_written),
+                "errors": int(self.errors),
+            }
+        out["pending_chunks"] = int(sum(not f.done() for f in list(self._pending)))
+        return out
+
+    def _count(self, name: str) -> None:
+        # 计数器由抓帧、组装与编码线程共同更新，统一在 _stats_lock 下修改
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    # ---- 抓帧线程 ----
+    def _capture_loop(self) -> None:
+        period = 1.0 / max(float(self.cfg.rate_hz), 1e-6)
+        t_next = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                frames = self.client.get_images_batch(self.agent_names, self.specs)
+            except Exception:
+                self._count("errors")
+                frames = None
+            if frames is not None:
+                item = (self._episode, time.time(), frames)
+                try:
+                    self._queue.put_nowait(item)
+                    self._count("captured")
+                except queue.Full:
+                    self._count("dropped")
+            t_next += period
+            delay = t_next - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # 抓帧跟不上设定频率时不追帧
+                t_next = time.monotonic()
+
+    # ---- 组装线程 ----
+    def _assemble_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            episode, ts, frames = item
+            if self._cur is not None and episode != self._cur_episode:
+                self._flush()
+            if self._cur is None:
+                try:
+                    self._cur = self._free.get_nowait()
+                except queue.Empty:
+                    # 编码积压：无空闲块缓冲，丢弃该帧
+                    self._count("dropped")
+                    continue
+                self._cur_ts = np.zeros(self._cur.capacity, dtype=np.float64)
+                if episode != self._cur_episode:
+                    self._chunk_idx = 0
+                self._cur_episode = episode
+            slot = self._cur.write(frames)
+            self._cur_ts[slot] = ts
+            if self._cur.seq + 1 >= self._cur.capacity:
+                self._flush()
+        if self._cur is not None:
+            self._flush()
+
+    def _flush(self) -> None:
+        buf, ts, n = self._cur, self._cur_ts, self._cur.seq + 1
+        self._cur = None
+        path = os.path.join(self.cfg.out_dir, f"episode_{self._cur_episode:05d}", f"chunk_{self._chunk_idx:05d}")
+        self._chunk_idx += 1
+        self._pending = [f for f in self._pending if not f.done()]
+        self._pending.append(self._executor.submit(self._encode, buf, ts, n, path))
+
+    # ---- 编码线程池 ----
+    def _encode(self, buf: ImageFrameBuffer, ts: np.ndarray, n: int, path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.cfg.fmt == "npz":
+                written = self._write_npz(buf, ts, n, path)
+            else:
+                written = self._write_mp4(buf, n, path)
+            with self._stats_lock:
+                self.bytes_written += written
+                self.chunks_written += 1
+        except Exception:
+            self._count("errors")
+        finally:
+            buf.seq = -1
+            self._free.put(buf)
+
+    def _write_npz(self, buf: ImageFrameBuffer, ts: np.ndarray, n: int, path: str) -> int:
+        np.savez_compressed(
+            path + ".npz",
+            color=buf.color[:n],
+            depth=buf.depth[:n],
+            valid=buf.valid[:n],
+            timestamps=ts[:n],
+            agents=np.array(buf.agent_names),
+            specs=np.array([f"{c}:{t}" for c, t in buf.specs]),
+        )
+        return os.path.getsize(path + ".npz")
+
+    def _write_mp4(self, buf: ImageFrameBuffer, n: int, path: str) -> int:
+        imageio = importlib.import_module("imageio")
+        written = 0
+        for ai, a in enumerate(buf.agent_names):
+            for si, (cam, t) in enumerate(buf.specs):
+                kind, ci = buf.channel(si)
+                if kind != "color":
+                    continue
+                out = f"{path}_{a}_{cam}_{t}.mp4"
+                imageio.mimwrite(out, buf.color[:n, ai, ci], fps=float(self.cfg.rate_hz))
+                written += os.path.getsize(out)
+        return written
+
+    def _new_buffer(self) -> ImageFrameBuffer:
+        c = self.camera
+        return ImageFrameBuffer(self.agent_names, self.specs, c.height, c.width, c.downscale, self.cfg.chunk_frames)
+
+
+class RecordedEnv:
+    """训练侧的录制包装：持有 `FrameRecorder` 及其专用客户端，环境本身不创建任何线程。
+
+    首次 `reset` 启动录制，之后每次 `reset` 切换回合目录；`close` 停止录制并释放专用连接。
+    未传入 `client` 时按环境配置由 `make_client` 新建连接（启用连接池时为独立的连接池），
+    抓图请求不会占用环境的连接，训练步不等待渲染 I/O。其余属性与方法透传给被包装的环境。
+    """
+
+    def __init__(self, env: Any, client: Optional[AirSimClient] = None, cfg: Optional[EnvConfig] = None):
+        self.env = env
+        cfg = cfg or env.cfg
+        self._owns_client = client is None
+        self.recorder = FrameRecorder(client or make_client(cfg), env.possible_agents, cfg.camera, cfg.recorder)
+
+    def __getattr__(self, name: str):
+        return getattr(self.env, name)
+
+    def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        out = self.env.reset(seed=seed, options=options)
+        if self.recorder.running:
+            self.recorder.new_episode()
+        else:
+            self.recorder.start()
+        return out
+
+    def step(self, actions):
+        return self.env.step(actions)
+
+    def close(self) -> None:
+        self.recorder.stop()
+        close = getattr(self.recorder.client, "close", None)
+        if self._owns_client and close is not None:
+            close()
+        self.env.close()
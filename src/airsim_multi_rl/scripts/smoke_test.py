@@ -4,6 +4,7 @@ import numpy as np
 from airsim_multi_rl.config import load_env_config
 from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
 from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.runners.recorder import RecordedEnv
 
 def main():
     # 读取默认配置（可通过环境变量 SMOKE_YAML 指定用户 YAML）
@@ -14,6 +15,9 @@ def main():
     offline = os.environ.get("SMOKE_OFFLINE") == "1"
     client = DummyClient(cfg.agent_names) if offline else None
     env = AirSimMultiDroneParallelEnv(cfg, client=client)
+    if cfg.recorder.enabled:
+        # 录制器使用专用连接（离线时为独立的 DummyClient）
+        env = RecordedEnv(env, client=DummyClient(cfg.agent_names) if offline else None)
     obs, infos = env.reset()
     print("agents:", env.agents)
 
@@ -23,7 +27,8 @@ def main():
             actions[a] = np.array([0.5, 0.0, 0.0, 0.0], dtype=np.float32)
         obs, rew, term, trunc, info = env.step(actions)
         print(f"t={t:02d}  reward_sum={sum(rew.values()):.3f}")
-        if all(term.values()) or all(trunc.values()):
+        # 结束的智能体会从 env.agents 中移除，全部结束后退出
+        if not env.agents:
             break
     env.close()
 
@@ -0,0 +1,9 @@
+from __future__ import annotations
+import os
+import sys
+
+# 新包位于 src/，旧训练脚本包位于 airsim/（airsim_marl）
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (os.path.join(ROOT, "src"), os.path.join(ROOT, "airsim")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import os
+import numpy as np
+import pytest
+import torch
+
+from airsim_marl.config import ActorLearnerConfig
+from airsim_marl.train.actor_learner import ActorLearner, vtrace
+from airsim_marl.train.rollout import MARLRolloutBuffer
+
+
+def test_vtrace_on_policy_matches_lambda_one_returns():
+    rng = np.random.default_rng(2)
+    T, A = 7, 2
+    rews, vals, boot = rng.normal(size=(3, T, A)).astype(np.float32)
+    terms = np.zeros((T, A), dtype=np.float32)
+    truncs = np.zeros((T, A), dtype=np.float32)
+    terms[2, 0] = 1.0
+    truncs[4, 1] = 1.0
+    last = np.array([0.5, -0.1], dtype=np.float32)
+    buf = MARLRolloutBuffer(1, 1, T, A)
+    for t in range(T):
+        buf.add([0, 1], np.zeros((2, 1)), np.zeros((2, 1)), rews[t], vals[t], np.zeros(2), terms[t], truncs[t], boot[t])
+    buf.compute_returns_advantages(0.9, 1.0, last)
+
+    logp = torch.from_numpy(rng.normal(size=(T, A)).astype(np.float32))
+    t_ = torch.from_numpy
+    vs, pg_adv = vtrace(logp, logp, t_(rews), t_(vals), t_(terms), t_(truncs), torch.ones(T, A), t_(boot), t_(last), gamma=0.9)
+    np.testing.assert_allclose(vs.numpy(), buf.rets, rtol=1e-5, atol=1e-5)
+    # 同策略时 pg 优势为 r + γ·v_{s+1} − V
+    assert pg_adv.shape == (T, A)
+
+    # 行为策略概率更高时，截断权重使目标向 V 收缩
+    _, off_adv = vtrace(logp + 1.0, logp, t_(rews), t_(vals), t_(terms), t_(truncs), torch.ones(T, A), t_(boot), t_(last), gamma=0.9)
+    assert off_adv.abs().sum() < pg_adv.abs().sum()
+
+
+class _ToyEnv:
+    """两个智能体的一维玩具环境，8 步截断。"""
+    possible_agents = ["a", "b"]
+
+    def __init__(self, rank: int):
+        self.rank = rank
+
+    def reset(self, seed=None, options=None):
+        self.t = 0
+        self.agents = list(self.possible_agents)
+        return {a: np.full(3, self.rank, dtype=np.float32) for a in self.agents}, {}
+
+    def step(self, actions):
+        self.t += 1
+        obs = {a: np.full(3, self.t, dtype=np.float32) for a in self.agents}
+        rews = {a: -float(np.abs(actions[a]).sum()) for a in self.agents}
+        done = self.t >= 8
+        terms = {a: False for a in self.agents}
+        truncs = {a: done for a in self.agents}
+        if done:
+            self.agents = []
+        return obs, rews, terms, truncs, {}
+
+    def close(self):
+        pass
+
+
+def test_actor_learner_runs_with_workers_and_tracks_lag():
+    torch.manual_seed(0)
+    cfg = ActorLearnerConfig(num_workers=2, chunk_len=12, queue_size=2, chunks_per_update=2, total_updates=4)
+    learner = ActorLearner(_ToyEnv, 3, 2, cfg, hidden=8, mp_context="fork")
+    history = learner.run(log_every=0)
+    assert len(history) == 4 and learner.updates == 4
+    assert learner.store.version.value == 4
+    assert all(np.isfinite(h["v_loss"]) and h["policy_lag_max"] >= 0 for h in history)
+    assert all(h["steps"] == 2 * 12 * 2 for h in history)
+    assert not learner.workers
+
+
+class _CrashingEnv(_ToyEnv):
+    """第 3 步抛出异常，模拟仿真器断开。"""
+    def step(self, actions):
+        if self.t == 2:
+            raise ConnectionError("simulator down")
+        return super().step(actions)
+
+
+def test_actor_learner_raises_when_a_worker_dies():
+    cfg = ActorLearnerConfig(num_workers=2, chunk_len=12, queue_size=2, chunks_per_update=2, total_updates=4)
+    learner = ActorLearner(_CrashingEnv, 3, 2, cfg, hidden=8, mp_context="fork")
+    # 工作进程的异常经队列传回学习器，而不是让学习器永远等待
+    with pytest.raises(RuntimeError, match="simulator down"):
+        learner.run(log_every=0)
+    assert not learner.workers
+
+
+class _KilledEnv(_ToyEnv):
+    """工作进程被直接杀死，来不及上报异常。"""
+    def step(self, actions):
+        os._exit(3)
+
+
+def test_actor_learner_raises_when_a_worker_is_killed():
+    cfg = ActorLearnerConfig(num_workers=1, chunk_len=12, queue_size=2, chunks_per_update=1, total_updates=2)
+    learner = ActorLearner(_KilledEnv, 3, 2, cfg, hidden=8, mp_context="fork")
+    with pytest.raises(RuntimeError, match="exited"):
+        learner.run(log_every=0)
+
+
+def test_inference_server_batches_and_hot_swaps():
+    import threading
+    import torch.multiprocessing as mp
+    from airsim_marl.train.actor_learner import PolicyStore
+    from airsim_marl.train.inference_server import InferenceServer
+    from airsim_marl.train.ppo import ActorCritic
+
+    torch.manual_seed(0)
+    ctx = mp.get_context("fork")
+    model = ActorCritic(3, 2, hidden=8)
+    store = PolicyStore(model, ctx)
+    server = InferenceServer(store, 3, 3, 2, ctx, max_rows=4, max_batch=12, max_wait_ms=50.0)
+    server.start()
+    try:
+        clients = [server.client(i) for i in range(3)]
+        obs = [np.full((4, 3), i, dtype=np.float32) for i in range(3)]
+        results = [None] * 3
+
+        def call(i):
+            results[i] = clients[i].act(obs[i])
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for i, (acts, logps, vals) in enumerate(results):
+            assert acts.shape == (4, 2)
+            np.testing.assert_allclose(vals, model.predict_values(obs[i]), rtol=1e-5, atol=1e-6)
+        stats = server.stats()
+        assert stats["batches"] < 3 and stats["batch_rows_mean"] > 4
+
+        # 发布新权重后，下一次请求即由新版本服务
+        with torch.no_grad():
+            model.v[-1].bias.add_(1.0)
+        store.publish(model, 7)
+        _, _, vals = clients[0].act(obs[0])
+        assert clients[0].version == 7
+        np.testing.assert_allclose(vals, model.predict_values(obs[0]), rtol=1e-5, atol=1e-6)
+        assert clients[0].stats()["calls"] == 2
+    finally:
+        server.stop()
+
+
+def test_actor_learner_with_inference_server():
+    cfg = ActorLearnerConfig(num_workers=2, chunk_len=8, queue_size=2, chunks_per_update=2, total_updates=2,
+                             inference_server=True, server_max_rows=4, server_max_wait_ms=5.0)
+    learner = ActorLearner(_ToyEnv, 3, 2, cfg, hidden=8, mp_context="fork")
+    history = learner.run(log_every=0)
+    assert len(history) == 2
+    assert learner.server.stats()["batches"] > 0
@@ -0,0 +1,84 @@
+from __future__ import annotations
+import numpy as np
+from airsim_multi_rl.config import ArenaConfig, EnvConfig
+from airsim_multi_rl.envs.arena import ArenaBatchEnv
+from airsim_multi_rl.envs.dummy_client import DummyClient
+
+
+class _Vec:
+    def __init__(self, x, y, z):
+        self.x_val, self.y_val, self.z_val = x, y, z
+
+
+class _Pose:
+    def __init__(self, x, y, z):
+        self.position = _Vec(x, y, z)
+
+
+class ArenaDummyClient(DummyClient):
+    """每个竞技场中各有一个 Jammer，并统计批量调用次数。"""
+
+    JAMMERS = {"JammerA": (5.0, 0.0, -5.0), "JammerB": (205.0, 0.0, -5.0)}
+
+    def __init__(self, agent_names):
+        super().__init__(agent_names)
+        self.batch_calls = {"move": 0, "states": 0}
+
+    def list_scene_objects(self, pattern):
+        return list(self.JAMMERS) if pattern.startswith("Jammer") else []
+
+    def get_object_pose(self, name):
+        return _Pose(*self.JAMMERS[name])
+
+    def move_velocity_batch(self, commands, duration):
+        self.batch_calls["move"] += 1
+        return super().move_velocity_batch(commands, duration)
+
+    def get_states(self, vehicle_names):
+        self.batch_calls["states"] += 1
+        return super().get_states(vehicle_names)
+
+
+def _cfg(max_steps=50):
+    names = ["Drone1", "Drone2", "Drone3", "Drone4"]
+    return EnvConfig(
+        agent_names=names,
+        max_steps=max_steps,
+        spawn_points={n: (0.0, 0.0, -3.0) for n in names},
+        goal_points={n: (20.0, 0.0, -3.0) for n in names},
+        arenas=[
+            ArenaConfig(name="A", agents=["Drone1", "Drone2"], origin=(0.0, 0.0, 0.0)),
+            ArenaConfig(name="B", agents=["Drone3", "Drone4"], origin=(200.0, 0.0, 0.0)),
+        ],
+    )
+
+
+def test_arenas_use_local_coordinates_and_merge_io():
+    cfg = _cfg()
+    client = ArenaDummyClient(cfg.agent_names)
+    benv = ArenaBatchEnv(cfg, client=client)
+    obs, _ = benv.reset()
+    # 世界坐标分离，局部观测一致；每个竞技场只看到自己的 Jammer
+    assert client.pos["Drone3"][0] == 200.0
+    np.testing.assert_allclose(obs[0]["Drone1"], obs[1]["Drone3"])
+    assert benv.envs[0].jammers.names == ["JammerA"] and benv.envs[1].jammers.names == ["JammerB"]
+    client.batch_calls = {"move": 0, "states": 0}
+    act = {"Drone1": np.array([1.0, 0, 0, 0], dtype=np.float32), "Drone2": np.zeros(4, dtype=np.float32)}
+    obs, rews, *_ = benv.step([act, {"Drone3": act["Drone1"], "Drone4": act["Drone2"]}])
+    assert client.batch_calls == {"move": 1, "states": 1}
+    np.testing.assert_allclose(obs[0]["Drone1"], obs[1]["Drone3"])
+
+
+def test_arena_autoreset_is_independent():
+    cfg = _cfg(max_steps=2)
+    benv = ArenaBatchEnv(cfg, client=ArenaDummyClient(cfg.agent_names))
+    benv.reset()
+    zero = np.zeros(4, dtype=np.float32)
+    benv.step([{"Drone1": zero, "Drone2": zero}, {"Drone3": zero, "Drone4": zero}])
+    # 竞技场 B 的载具越界提前结束，A 继续
+    benv.client.pos["Drone3"] = (500.0, 0.0, -3.0)
+    benv.client.pos["Drone4"] = (500.0, 0.0, -3.0)
+    obs, _, terms, _, infos = benv.step([{"Drone1": zero, "Drone2": zero}, {"Drone3": zero, "Drone4": zero}])
+    assert terms[1]["Drone3"] and "final_observation" in infos[1]["Drone3"]
+    assert benv.episodes == [1, 1]
+    assert benv.envs[1].agents == ["Drone3", "Drone4"]
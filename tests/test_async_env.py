@@ -0,0 +1,27 @@
+from __future__ import annotations
+import asyncio
+import numpy as np
+from airsim_multi_rl.config import EnvConfig
+from airsim_multi_rl.envs.async_parallel import AsyncAirSimMultiDroneParallelEnv
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+
+
+def test_async_env_matches_sync_and_shares_loop():
+    cfg = EnvConfig()
+    actions = {a: np.array([1.0, 0.5, 0.0, 10.0], dtype=np.float32) for a in cfg.agent_names}
+
+    sync_env = AirSimMultiDroneParallelEnv(cfg, client=DummyClient(cfg.agent_names))
+    sync_env.reset()
+    sync_out = sync_env.step(actions)
+
+    async def run():
+        envs = [AsyncAirSimMultiDroneParallelEnv(cfg, client=DummyClient(cfg.agent_names)) for _ in range(2)]
+        await asyncio.gather(*(e.reset() for e in envs))
+        return await asyncio.gather(*(e.step(actions) for e in envs))
+
+    for obs, rews, terms, truncs, infos in asyncio.run(run()):
+        for a in cfg.agent_names:
+            np.testing.assert_allclose(obs[a], sync_out[0][a])
+            assert rews[a] == sync_out[1][a]
+            assert terms[a] == sync_out[2][a] and truncs[a] == sync_out[3][a]
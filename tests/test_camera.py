@@ -0,0 +1,36 @@
+from __future__ import annotations
+import numpy as np
+from airsim_multi_rl.envs.airsim_client import decode_image
+from airsim_multi_rl.envs.camera import ImageFrameBuffer
+
+
+class _Resp:
+    def __init__(self, h, w, data_uint8=b"", data_float=()):
+        self.height, self.width = h, w
+        self.image_data_uint8 = data_uint8
+        self.image_data_float = list(data_float)
+
+
+def test_decode_uncompressed_rgba_and_depth():
+    raw = np.arange(4 * 6 * 4, dtype=np.uint8).reshape(4, 6, 4)
+    img = decode_image(_Resp(4, 6, raw.tobytes()), as_float=False)
+    assert img.shape == (4, 6, 3)
+    np.testing.assert_array_equal(img, raw[:, :, :3])
+    depth = decode_image(_Resp(2, 3, data_float=range(6)), as_float=True)
+    assert depth.dtype == np.float32 and depth.shape == (2, 3)
+    assert decode_image(_Resp(4, 6, b"\x89PNG"), as_float=False) is None
+
+
+def test_frame_buffer_routes_specs_and_downscales():
+    specs = [("0", "Scene"), ("0", "DepthPerspective"), ("1", "Segmentation")]
+    buf = ImageFrameBuffer(["A", "B"], specs, height=8, width=8, downscale=2, capacity=2)
+    assert buf.color.shape == (2, 2, 2, 4, 4, 3)
+    assert buf.depth.shape == (2, 2, 1, 4, 4)
+    scene = np.full((8, 8, 3), 7, dtype=np.uint8)
+    depth = np.arange(64, dtype=np.float32).reshape(8, 8)
+    slot = buf.write({"B": [scene, depth, None]})
+    assert slot == 0
+    np.testing.assert_array_equal(buf.latest_image("B", 0), scene[::2, ::2])
+    np.testing.assert_array_equal(buf.latest_image("B", 1), depth[::2, ::2])
+    assert buf.latest_image("B", 2) is None and buf.latest_image("A", 0) is None
+    assert buf.write({}) == 1 and buf.write({}) == 0
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import threading
+import time
+import pytest
+from airsim_multi_rl.envs.airsim_client import AirSimClient, AirSimClientPool
+
+
+class SlowConn(AirSimClient):
+    """模拟单连接串行 RPC：每次 get_state 固定耗时，并记录并发度。"""
+
+    active = 0
+    peak = 0
+    _lock = threading.Lock()
+
+    def __init__(self, healthy: bool = True):
+        class _C:
+            def ping(self_inner):
+                if not healthy:
+                    raise ConnectionError("down")
+                return True
+        self.client = _C()
+
+    def get_state(self, vehicle_name: str):
+        with SlowConn._lock:
+            SlowConn.active += 1
+            SlowConn.peak = max(SlowConn.peak, SlowConn.active)
+        time.sleep(0.05)
+        with SlowConn._lock:
+            SlowConn.active -= 1
+        return vehicle_name
+
+
+def test_pool_shards_vehicles_and_runs_in_parallel():
+    names = [f"Drone{i}" for i in range(4)]
+    pool = AirSimClientPool("127.0.0.1", 0, size=4, vehicle_names=names, connect=SlowConn)
+    SlowConn.peak = 0
+    t0 = time.perf_counter()
+    states = pool.get_states(names)
+    elapsed = time.perf_counter() - t0
+    pool.close()
+    assert states == {n: n for n in names}
+    assert SlowConn.peak > 1
+    # 4 个载具分布在 4 条连接上，耗时应明显小于串行的 4 * 50ms
+    assert elapsed < 0.15
+
+
+def test_health_check_reconnects_broken_connection():
+    made = []
+
+    def connect():
+        conn = SlowConn(healthy=len(made) != 0)
+        made.append(conn)
+        return conn
+
+    pool = AirSimClientPool("127.0.0.1", 0, size=1, connect=connect, health_check_interval=0)
+    status = pool.health_check()
+    pool.close()
+    assert status == {0: False}
+    assert len(made) == 2 and pool._conns[0] is made[1]
+
+
+def test_only_transport_errors_trigger_reconnect():
+    made = []
+
+    class FailingConn(SlowConn):
+        def get_state(self, vehicle_name: str):
+            raise {"bad_arg": ValueError, "down": ConnectionError}[vehicle_name](vehicle_name)
+
+    def connect():
+        conn = FailingConn(healthy=False)
+        made.append(conn)
+        return conn
+
+    pool = AirSimClientPool("127.0.0.1", 0, size=1, connect=connect, health_check_interval=0)
+    with pytest.raises(ValueError):
+        pool.get_state("bad_arg")
+    # 普通错误不触发 ping/重连
+    assert len(made) == 1
+    with pytest.raises(ConnectionError):
+        pool.get_state("down")
+    assert len(made) == 2
+    pool.close()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+import numpy as np
+from airsim_multi_rl.config import EnvConfig
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+
+
+class CountingClient(DummyClient):
+    def __init__(self, agent_names):
+        super().__init__(agent_names)
+        self.state_calls = 0
+
+    def get_state(self, vehicle_name: str):
+        self.state_calls += 1
+        return super().get_state(vehicle_name)
+
+
+def test_dead_reckoning_skips_state_rpcs_and_reports_drift():
+    cfg = EnvConfig()
+    cfg.dead_reckoning.enabled = True
+    cfg.dead_reckoning.sync_every = 3
+    client = CountingClient(cfg.agent_names)
+    env = AirSimMultiDroneParallelEnv(cfg, client=client)
+    env.reset()
+    client.state_calls = 0
+    actions = {a: np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32) for a in env.agents}
+    synced = []
+    for _ in range(6):
+        obs, rews, terms, truncs, infos = env.step(actions)
+        synced.append(all(infos[a]["state_synced"] for a in env.agents))
+    # 每 3 步同步一次：6 步共 2 次同步
+    assert synced == [False, False, True, False, False, True]
+    assert client.state_calls == 2 * len(env.agents)
+    stats = env.dead_reckoning.stats()
+    assert stats["predicted_steps"] == 6 * len(env.agents)
+    assert stats["max_drift"] < 0.5
+    # 外推观测与真实位置误差受控
+    for a in env.agents:
+        np.testing.assert_allclose(obs[a][0:3], client.pos[a], atol=0.5)
+
+
+
+def _dr_env(**kw):
+    cfg = EnvConfig(**kw)
+    cfg.dead_reckoning.enabled = True
+    cfg.dead_reckoning.sync_every = 1000
+    env = AirSimMultiDroneParallelEnv(cfg, client=DummyClient(cfg.agent_names))
+    env.reset()
+    return env, {a: np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32) for a in env.agents}
+
+
+def test_truncation_step_forces_sync():
+    env, actions = _dr_env(max_steps=20)
+    while env.agents:
+        live = list(env.agents)
+        obs, rews, terms, truncs, infos = env.step({a: actions[a] for a in live})
+    # 截断步强制同步，自举用的末观测来自真实状态
+    assert all(truncs[a] and infos[a]["state_synced"] for a in live)
+
+
+def test_reset_does_not_count_drift():
+    env, actions = _dr_env()
+    for _ in range(5):
+        _, _, _, _, infos = env.step(actions)
+    assert not any(i["state_synced"] for i in infos.values())
+    drift = {k: v for k, v in env.dead_reckoning.stats().items() if k.endswith("drift")}
+    env.reset()
+    # 上回合的外推位置不与新出生点比较
+    assert {k: v for k, v in env.dead_reckoning.stats().items() if k.endswith("drift")} == drift
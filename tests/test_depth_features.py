@@ -0,0 +1,42 @@
+from __future__ import annotations
+import numpy as np
+from airsim_multi_rl.config import DepthObsConfig, EnvConfig
+from airsim_multi_rl.envs.depth_features import sector_min_pool
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+
+
+def test_sector_min_pool_handles_invalid_pixels():
+    depth = np.full((2, 8, 8), 50.0, dtype=np.float32)
+    depth[0, 1, 6] = 3.0          # 右上扇区的近障碍
+    depth[1, 5, 1] = np.nan       # 无效像素按量程处理
+    feats = sector_min_pool(depth, 2, 2, max_range=20.0)
+    assert feats.shape == (2, 4)
+    np.testing.assert_allclose(feats[0], [20.0, 3.0, 20.0, 20.0])
+    np.testing.assert_allclose(feats[1], [20.0] * 4)
+
+
+class WallClient(DummyClient):
+    """Drone1 正前方左半幅 5m 处有墙。"""
+
+    def get_images(self, vehicle_name, specs, height=144, width=256):
+        out = super().get_images(vehicle_name, specs, height, width)
+        if vehicle_name == "Drone1":
+            out[0][:, : width // 2] = 5.0
+        return out
+
+
+def test_env_appends_depth_sectors():
+    cfg = EnvConfig(depth_obs=DepthObsConfig(enabled=True, sectors_h=4, sectors_v=1, max_range=10.0))
+    env = AirSimMultiDroneParallelEnv(cfg, client=WallClient(cfg.agent_names))
+    assert env.observation_space("Drone1").shape == (21,)
+    # 深度块使用归一化上界 1，其余维度仍无界
+    space = env.observation_space("Drone1")
+    depth = env.obs_builder.layout()["depth"]
+    np.testing.assert_array_equal(space.high[depth], [1.0] * 4)
+    assert np.isinf(space.high[:17]).all()
+    obs, _ = env.reset()
+    np.testing.assert_allclose(obs["Drone1"][depth], [0.5, 0.5, 1.0, 1.0])
+    np.testing.assert_allclose(obs["Drone2"][depth], [1.0] * 4)
+    obs, *_ = env.step({a: np.zeros(4, dtype=np.float32) for a in env.agents})
+    assert obs["Drone1"].shape == (21,) and obs["Drone1"].dtype == np.float32
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import socket
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rank_main(rank, world, port, out):
+    import torch.distributed as dist
+    from airsim_marl.train import distributed as ddp
+    from airsim_marl.train.ppo import ActorCritic, ppo_update
+
+    torch.set_num_threads(1)
+    dist.init_process_group("gloo", init_method=f"tcp://127.0.0.1:{port}", rank=rank, world_size=world)
+    ddp.seed_everything(100 + rank)  # 各 rank 初始化不同，靠广播对齐
+    model = ActorCritic(5, 2, hidden=8)
+    ddp.broadcast_parameters(model)
+    opt = torch.optim.Adam(model.parameters(), lr=1e-2)
+    n = 40 if rank == 0 else 30  # 分片大小不等
+    g = torch.Generator().manual_seed(rank)
+    batch = {
+        "obs": torch.randn(n, 5, generator=g), "acts": torch.randn(n, 2, generator=g),
+        "rets": torch.randn(n, generator=g), "advs": torch.randn(n, generator=g) * 3 + rank,
+        "logps": torch.randn(n, generator=g) - 3.0,
+    }
+    batch["advs"] = ddp.normalize_advantages(batch["advs"])
+    k = ddp.global_num_minibatches(n, 16)
+    ppo_update(model, opt, batch, epochs=2, minibatch_size=16, num_minibatches=k, grad_hook=ddp.allreduce_gradients)
+    flat = torch.cat([p.detach().reshape(-1) for p in model.parameters()])
+    out.put((rank, k, batch["advs"].sum().item(), (batch["advs"] ** 2).sum().item(), flat.numpy()))
+    dist.destroy_process_group()
+
+
+def test_data_parallel_update_keeps_ranks_in_sync():
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    port = _free_port()
+    procs = [ctx.Process(target=_rank_main, args=(r, 2, port, out)) for r in range(2)]
+    for p in procs:
+        p.start()
+    res = sorted(out.get(timeout=60) for _ in procs)
+    for p in procs:
+        p.join(10)
+        assert p.exitcode == 0
+    (_, k0, s0, q0, w0), (_, k1, s1, q1, w1) = res
+    assert k0 == k1 == 3  # ceil(70 条样本 / (2 × 16))
+    # 全局归一化：合并后均值 0、方差 1
+    assert abs(s0 + s1) < 1e-3
+    assert abs((q0 + q1) / 69.0 - 1.0) < 1e-3
+    np.testing.assert_allclose(w0, w1, rtol=1e-6, atol=1e-6)
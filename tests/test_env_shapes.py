@@ -46,6 +46,9 @@ class DummyClient(AirSimClient):
         # 返回一个固定的 8x8 RGB 帧，便于验证渲染结构
         return np.zeros((8, 8, 3), dtype=np.uint8)
 
+    def get_images(self, vehicle_name: str, specs):
+        return [self.get_rgb_image(vehicle_name, cam) for cam, _ in specs]
+
 
 def test_spaces_and_reset():
     cfg = EnvConfig()
@@ -73,6 +76,7 @@ def test_render_contains_rgb_and_obs():
         # rgb 为 numpy 数组或 None，这里要求数组形状为 (H,W,3)
         rgb = frames[a]["rgb"]
         assert rgb is None or (rgb.ndim == 3 and rgb.shape[2] >= 3)
+        assert rgb is not None
     env.close()
 
 
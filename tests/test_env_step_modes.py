@@ -0,0 +1,96 @@
+from __future__ import annotations
+import numpy as np
+import pytest
+from airsim_multi_rl.config import EnvConfig
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+
+
+class CountingClient(DummyClient):
+    def __init__(self, agent_names):
+        super().__init__(agent_names)
+        self.moves = 0
+
+    def move_velocity_batch(self, commands, duration):
+        self.moves += 1
+        return super().move_velocity_batch(commands, duration)
+
+
+def _run(cfg, n_policy_steps):
+    client = CountingClient(cfg.agent_names)
+    env = AirSimMultiDroneParallelEnv(cfg, client=client)
+    env.reset()
+    actions = {a: np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32) for a in env.agents}
+    total = {a: 0.0 for a in env.agents}
+    for _ in range(n_policy_steps):
+        obs, rews, terms, truncs, infos = env.step(actions)
+        for a in env.agents:
+            total[a] += rews[a]
+    return env, client, obs, total
+
+
+def test_action_repeat_single_and_substeps_match_plain_stepping():
+    base_env, base_client, base_obs, base_total = _run(EnvConfig(), 8)
+
+    cfg = EnvConfig()
+    cfg.action_repeat = 4
+    single_env, single_client, single_obs, single_total = _run(cfg, 2)
+
+    cfg = EnvConfig()
+    cfg.action_repeat = 4
+    cfg.action_repeat_mode = "substeps"
+    sub_env, sub_client, sub_obs, sub_total = _run(cfg, 2)
+
+    assert single_client.moves == 2 and sub_client.moves == 8
+    assert single_env._steps == sub_env._steps == base_env._steps == 8
+    for a in base_obs:
+        np.testing.assert_allclose(single_obs[a], base_obs[a], atol=1e-5)
+        np.testing.assert_allclose(sub_obs[a], base_obs[a], atol=1e-5)
+        assert abs(single_total[a] - base_total[a]) < 1e-4
+        assert abs(sub_total[a] - base_total[a]) < 1e-4
+
+
+def test_unknown_action_repeat_mode_is_rejected():
+    cfg = EnvConfig()
+    cfg.action_repeat_mode = "substep"
+    with pytest.raises(ValueError):
+        AirSimMultiDroneParallelEnv(cfg, client=DummyClient(cfg.agent_names))
+
+
+class PollingClient(DummyClient):
+    def __init__(self, agent_names):
+        super().__init__(agent_names)
+        self.polled = []
+        self.parked = []
+
+    def get_state(self, vehicle_name: str):
+        self.polled.append(vehicle_name)
+        return super().get_state(vehicle_name)
+
+    def hover_batch(self, vehicle_names):
+        self.parked.extend(vehicle_names)
+        return super().hover_batch(vehicle_names)
+
+
+def test_finished_agents_are_dropped_and_parked():
+    cfg = EnvConfig()
+    # Drone1 出生即位于目标处，首步即终止
+    cfg.goal_points = dict(cfg.goal_points, Drone1=cfg.spawn_points["Drone1"])
+    client = PollingClient(cfg.agent_names)
+    env = AirSimMultiDroneParallelEnv(cfg, client=client)
+    env.reset()
+    zero = np.zeros(4, dtype=np.float32)
+    obs, rews, terms, truncs, infos = env.step({a: zero for a in env.agents})
+    assert terms["Drone1"] and infos["Drone1"]["reached_goal"]
+    assert env.agents == ["Drone2", "Drone3"]
+    assert env.active_mask().tolist() == [False, True, True]
+    assert client.parked == ["Drone1"]
+
+    client.polled.clear()
+    obs, rews, terms, truncs, infos = env.step({a: zero for a in env.possible_agents})
+    assert set(obs) == {"Drone2", "Drone3"}
+    assert "Drone1" not in client.polled
+    assert client.parked == ["Drone1"]
+
+    env.reset()
+    assert env.agents == env.possible_agents
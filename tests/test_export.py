@@ -0,0 +1,52 @@
+from __future__ import annotations
+import os
+import numpy as np
+import pytest
+import torch
+
+from airsim_marl.policy_runtime import load_policy
+from airsim_marl.train.export import benchmark, export_onnx, export_torchscript, main
+from airsim_marl.train.ppo import ActorCritic, save_checkpoint
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return ActorCritic(17, 4, hidden=32)
+
+
+def test_torchscript_actor_matches_eager_mean(model, tmp_path):
+    path = export_torchscript(model, str(tmp_path / "actor.pt"))
+    policy = load_policy(path)
+    assert policy.meta == {"obs_dim": 17, "act_dim": 4, "int8": False}
+    obs = np.random.default_rng(0).normal(size=(8, 17)).astype(np.float32)
+    with torch.no_grad():
+        ref = model.pi(torch.from_numpy(obs)).numpy()
+    np.testing.assert_allclose(policy(obs), ref, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(policy(obs[0]), ref[0], rtol=1e-5, atol=1e-6)
+
+
+def test_int8_export_and_benchmark(model, tmp_path):
+    paths = {"int8": export_torchscript(model, str(tmp_path / "actor_int8.pt"), quantize=True)}
+    rows = benchmark(model, paths, batch_sizes=(1, 16), iters=5, warmup=1)
+    assert {(r["variant"], r["batch"]) for r in rows} == {(v, b) for v in ("eager", "int8") for b in (1, 16)}
+    int8 = [r for r in rows if r["variant"] == "int8"]
+    # 动态量化只引入小的数值误差
+    assert all(0.0 <= r["max_abs_err"] < 0.1 for r in int8)
+
+
+def test_export_cli_from_checkpoint(model, tmp_path):
+    ckpt = str(tmp_path / "ckpt.pt")
+    save_checkpoint(ckpt, model)
+    main(["--ckpt", ckpt, "--out", str(tmp_path / "out")])
+    assert os.path.exists(tmp_path / "out" / "actor.pt")
+
+
+def test_onnx_export(model, tmp_path):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    path = export_onnx(model, str(tmp_path / "actor.onnx"))
+    obs = np.random.default_rng(1).normal(size=(3, 17)).astype(np.float32)
+    with torch.no_grad():
+        ref = model.pi(torch.from_numpy(obs)).numpy()
+    np.testing.assert_allclose(load_policy(path)(obs), ref, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import csv
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from airsim_multi_rl.config import EnvConfig, InstrumentationConfig, UERPCConfig
+from airsim_multi_rl.envs.airsim_client import AirSimClient, AirSimClientPool
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.instrumentation import InstrumentedClient, RpcMetrics
+from airsim_multi_rl.envs.jammer import JammerLocator
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+
+
+def _rows(metrics: RpcMetrics):
+    return {(r["method"], r["vehicle"]): r for r in metrics.snapshot()["calls"]}
+
+
+def test_histogram_buckets_and_exports():
+    m = RpcMetrics(buckets_ms=[1.0, 10.0])
+    for s in (0.0005, 0.001, 0.005, 0.5):
+        m.record("get_state", "Drone1", s)
+    m.record("get_state", "Drone1", 0.002, error=True)
+    r = _rows(m)[("get_state", "Drone1")]
+    # 桶上界包含在内：0.5ms、1ms 落入第一个桶，0.5s 落入 +Inf 桶
+    assert r["hist"] == [2, 2, 1] and r["count"] == 5 and r["errors"] == 1
+    assert r["p50_ms"] == 10.0 and r["max_ms"] == pytest.approx(500.0)
+
+    assert json.loads(m.to_json())["calls"][0]["count"] == 5
+    prom = m.to_prometheus()
+    assert 'airsim_rpc_latency_seconds_bucket{method="get_state",vehicle="Drone1",le="0.001"} 2' in prom
+    assert 'airsim_rpc_latency_seconds_bucket{method="get_state",vehicle="Drone1",le="+Inf"} 5' in prom
+    assert 'airsim_rpc_errors_total{method="get_state",vehicle="Drone1"} 1' in prom
+    rows = list(csv.DictReader(io.StringIO(m.to_csv())))
+    assert rows[0]["vehicle"] == "Drone1" and rows[0]["le_inf"] == "1"
+    m.enabled = False
+    m.record("get_state", "Drone1", 0.001)
+    assert _rows(m)[("get_state", "Drone1")]["count"] == 5
+
+
+def test_env_records_per_vehicle_calls_and_exports_on_close(tmp_path):
+    agents = ["Drone1", "Drone2"]
+    path = tmp_path / "rpc.prom"
+    cfg = EnvConfig(agent_names=agents, instrumentation=InstrumentationConfig(
+        enabled=True, export_path=str(path), export_format="prometheus"))
+    metrics = RpcMetrics(cfg.instrumentation.buckets_ms)
+    env = AirSimMultiDroneParallelEnv(cfg, client=InstrumentedClient(DummyClient(agents), metrics))
+    assert env.rpc_metrics is metrics and env.jammers.metrics is metrics
+    env.reset()
+    for _ in range(3):
+        env.step({a: [1.0, 0.0, 0.0, 0.0] for a in env.agents})
+    rows = _rows(metrics)
+    # 串行批量接口经代理逐载具调用：既有整批耗时，也有各载具的单次调用与 join 耗时
+    for a in agents:
+        assert rows[("move_velocity", a)]["count"] == 3
+        assert rows[("move_velocity.join", a)]["count"] == 3
+        assert rows[("get_state", a)]["count"] >= 4
+    assert rows[("move_velocity_batch", "*")]["count"] == 3
+    env.close()
+    assert "airsim_rpc_calls_total" in path.read_text()
+
+
+class _Conn(AirSimClient):
+    def __init__(self):
+        pass
+
+    def get_state(self, vehicle_name: str):
+        if vehicle_name == "bad":
+            raise ConnectionError("down")
+        time.sleep(0.002)
+        return vehicle_name
+
+
+def test_pool_connections_are_instrumented_per_vehicle():
+    metrics = RpcMetrics()
+    pool = AirSimClientPool("127.0.0.1", 0, size=2, vehicle_names=["Drone1", "Drone2"],
+                            connect=lambda: InstrumentedClient(_Conn(), metrics), health_check_interval=0)
+    pool.get_states(["Drone1", "Drone2"])
+    with pytest.raises(ConnectionError):
+        pool.get_state("bad")
+    pool.close()
+    rows = _rows(metrics)
+    assert rows[("get_state", "Drone1")]["count"] == 1 and rows[("get_state", "Drone2")]["count"] == 1
+    assert rows[("get_state", "Drone1")]["mean_ms"] >= 2.0
+    assert rows[("get_state", "bad")]["errors"] == 1
+
+
+def test_jammer_http_calls_are_recorded():
+    body = {"/jammers": {"jammers": [{"name": "J1", "location": {"X": 100.0, "Y": 0.0, "Z": 0.0}, "basePower": 2.0}]},
+            "/jammer_power": {"power": 3.5}}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            data = json.dumps(body[self.path.split("?")[0]]).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        metrics = RpcMetrics()
+        rpc = UERPCConfig(enabled=True, http_base=f"http://127.0.0.1:{server.server_port}", timeout=2.0)
+        loc = JammerLocator(DummyClient(["Drone1"]), ["J*"], rpc=rpc, metrics=metrics)
+        loc.refresh_positions()
+        assert loc.nearest_power(loc.positions["J1"]) == 3.5
+    finally:
+        server.shutdown()
+    rows = _rows(metrics)
+    assert rows[("http:/jammers", "*")]["count"] == 1
+    assert rows[("http:/jammers", "*")]["bytes"] == len(json.dumps(body["/jammers"]))
+    assert rows[("http:/jammer_power", "*")]["count"] == 1
+
+
+def test_disabled_proxy_overhead_is_small():
+    class Trivial:
+        def get_collision(self, vehicle_name: str):
+            return vehicle_name
+
+    base = Trivial()
+    metrics = RpcMetrics(enabled=False)
+    proxy = InstrumentedClient(base, metrics)
+    n = 20000
+
+    def per_call(fn):
+        best = float("inf")
+        for _ in range(5):
+            t0 = time.perf_counter()
+            for _ in range(n):
+                fn("Drone1")
+            best = min(best, (time.perf_counter() - t0) / n)
+        return best
+
+    direct = per_call(base.get_collision)
+    wrapped = per_call(proxy.get_collision)
+    assert not metrics.snapshot()["calls"]
+    # 关闭统计时代理只多一层转发（目标 < 1 µs/调用，这里留出共享 CI 机器的余量）
+    assert wrapped - direct < 2e-6
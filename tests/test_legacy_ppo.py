@@ -0,0 +1,116 @@
+from __future__ import annotations
+import numpy as np
+import torch
+from airsim_marl.train.ppo import ActorCritic
+
+
+def test_fused_act_matches_separate_heads():
+    torch.manual_seed(0)
+    model = ActorCritic(17, 4, hidden=32)
+    obs = np.random.default_rng(0).normal(size=(5, 17)).astype(np.float32)
+    actions, logps, vals = model.act(obs)
+    assert actions.shape == (5, 4) and logps.shape == (5,) and vals.shape == (5,)
+    with torch.no_grad():
+        x = torch.from_numpy(obs)
+        ref_logp = model.policy(x).log_prob(torch.from_numpy(actions)).sum(-1).numpy()
+        ref_v = model.value(x).numpy()
+    np.testing.assert_allclose(logps, ref_logp, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(vals, ref_v, rtol=1e-5, atol=1e-6)
+    det, _, _ = model.act(obs, deterministic=True)
+    np.testing.assert_allclose(det, model.pi(torch.from_numpy(obs)).detach().numpy(), rtol=1e-6)
+
+
+def _reference_gae(rews, vals, terms, truncs, boot, last_v, gamma, lam):
+    """单个智能体的逐步 GAE 参考实现。"""
+    adv, out = 0.0, np.zeros(len(rews), dtype=np.float64)
+    for t in reversed(range(len(rews))):
+        if terms[t]:
+            nv, cont = 0.0, 0.0
+        elif truncs[t]:
+            nv, cont = boot[t], 0.0
+        else:
+            nv, cont = (vals[t + 1] if t + 1 < len(rews) else last_v), 1.0
+        adv = rews[t] + gamma * nv - vals[t] + gamma * lam * cont * adv
+        out[t] = adv
+    return out
+
+
+def test_time_major_gae_per_agent_with_truncation():
+    from airsim_marl.train.rollout import MARLRolloutBuffer
+
+    rng = np.random.default_rng(1)
+    T, A = 6, 2
+    buf = MARLRolloutBuffer(3, 4, T, A)
+    rews, vals, boot = rng.normal(size=(3, T, A)).astype(np.float32)
+    terms = np.zeros((T, A), dtype=np.float32)
+    truncs = np.zeros((T, A), dtype=np.float32)
+    terms[2, 0] = 1.0   # 智能体 0 在 t=2 终止，t=3 等待（无效），t=4 新回合
+    truncs[3, 1] = 1.0  # 智能体 1 在 t=3 截断
+    for t in range(T):
+        rows = [1] if t == 3 else [0, 1]
+        buf.add(rows, np.zeros((len(rows), 3)), np.zeros((len(rows), 4)), rews[t, rows], vals[t, rows],
+                np.zeros(len(rows)), terms[t, rows], truncs[t, rows], boot[t, rows])
+    last = np.array([0.3, -0.2], dtype=np.float32)
+    buf.compute_returns_advantages(0.9, 0.8, last)
+    ref1 = _reference_gae(rews[:, 1], vals[:, 1], terms[:, 1], truncs[:, 1], boot[:, 1], last[1], 0.9, 0.8)
+    np.testing.assert_allclose(buf.advs[:, 1], ref1, rtol=1e-5, atol=1e-6)
+    valid0 = [0, 1, 2, 4, 5]
+    ref0 = _reference_gae(rews[valid0, 0], vals[valid0, 0], terms[valid0, 0], truncs[valid0, 0], boot[valid0, 0], last[0], 0.9, 0.8)
+    np.testing.assert_allclose(buf.advs[valid0, 0], ref0, rtol=1e-5, atol=1e-6)
+    assert buf.advs[3, 0] == 0.0
+    assert sum(len(mb[0]) for mb in buf.get(minibatch=4)) == 11
+
+
+def test_device_resident_update_reduces_value_loss():
+    from airsim_marl.train.ppo import ppo_update
+    from airsim_marl.train.rollout import MARLRolloutBuffer
+
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    T, A = 32, 3
+    model = ActorCritic(5, 2, hidden=16)
+    buf = MARLRolloutBuffer(5, 2, T, A)
+    for _ in range(T):
+        o = rng.normal(size=(A, 5)).astype(np.float32)
+        acts, logps, vals = model.act(o)
+        buf.add([0, 1, 2], o, acts, o[:, 0], vals, logps, np.zeros(A), np.zeros(A))
+    buf.compute_returns_advantages(0.0, 0.0)
+    batch = buf.as_tensors("cpu")
+    assert batch["obs"].shape == (T * A, 5)
+    assert abs(float(batch["advs"].mean())) < 1e-5
+    opt = torch.optim.Adam(model.parameters(), lr=1e-2)
+    first = ppo_update(model, opt, batch, epochs=1, minibatch_size=32)
+    last = ppo_update(model, opt, batch, epochs=10, minibatch_size=32)
+    assert set(first) == {"pg_loss", "v_loss", "entropy", "approx_kl", "clip_frac"}
+    assert last["v_loss"] < first["v_loss"]
+
+
+def test_compact_storage_matches_float32_buffer():
+    from airsim_marl.train.rollout import MARLRolloutBuffer
+
+    rng = np.random.default_rng(3)
+    T, A, O = 12, 10, 20
+    ref = MARLRolloutBuffer(O, 4, T, A)
+    small = MARLRolloutBuffer(O, 4, T, A, obs_dtype=np.float16, pack_flags=True, uint8_obs=(17, 20))
+    for t in range(T):
+        rows = list(range(A)) if t % 4 else list(range(0, A, 2))
+        n = len(rows)
+        o = rng.normal(size=(n, O)).astype(np.float32)
+        o[:, 17:] = rng.uniform(size=(n, 3))  # 归一化到 [0, 1] 的图像/深度特征
+        args = (o, rng.normal(size=(n, 4)), rng.normal(size=n), rng.normal(size=n), rng.normal(size=n),
+                (rng.uniform(size=n) < 0.1).astype(np.float32), (rng.uniform(size=n) < 0.1).astype(np.float32))
+        ref.add(rows, *args)
+        small.add(rows, *args)
+    np.testing.assert_array_equal(small.valid, ref.valid)
+    np.testing.assert_array_equal(small.terms, ref.terms)
+    ref.compute_returns_advantages(0.9, 0.95)
+    small.compute_returns_advantages(0.9, 0.95)
+    np.testing.assert_allclose(small.advs, ref.advs, rtol=1e-6)
+    a, b = ref.as_tensors(), small.as_tensors()
+    assert b["obs"].dtype == torch.float32
+    torch.testing.assert_close(b["obs"][:, :17], a["obs"][:, :17], rtol=1e-3, atol=1e-3)
+    torch.testing.assert_close(b["obs"][:, 17:], a["obs"][:, 17:], rtol=0, atol=0.5 / 255 + 1e-6)
+    mem_ref, mem_small = ref.memory_bytes(), small.memory_bytes()
+    assert mem_small["valid"] * 5 == mem_ref["valid"]  # 10 个智能体：10 字节 → 2 字节
+    assert mem_small["total"] < mem_ref["total"]
+    assert "MiB" in small.footprint()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import numpy as np
+import torch
+
+from airsim_marl.train.mappo import (AGENT_STATE_DIM, MAPPOActorCritic, MAPPORolloutBuffer, ValueNormalizer,
+                                     critic_inputs, global_state_dim)
+from airsim_marl.train.ppo import load_checkpoint, ppo_update, save_checkpoint
+
+
+def test_critic_inputs_share_global_state_with_agent_id():
+    rng = np.random.default_rng(0)
+    obs = rng.normal(size=(3, 17)).astype(np.float32)
+    alive = np.array([True, False, True])
+    x = critic_inputs(obs, alive)
+    assert x.shape == (3, global_state_dim(3))
+    g = 3 * AGENT_STATE_DIM
+    # 全局状态部分对所有智能体相同，末尾为各自的 one-hot 编号
+    np.testing.assert_array_equal(x[0, :g], x[2, :g])
+    np.testing.assert_array_equal(x[:, g:], np.eye(3))
+    block1 = x[0, AGENT_STATE_DIM:2 * AGENT_STATE_DIM]
+    np.testing.assert_allclose(block1[6:9], obs[1, 0:3] + obs[1, 7:10])
+    assert block1[10] == 0.0 and x[0, 10] == 1.0
+
+
+def test_value_normalizer_roundtrip():
+    vn = ValueNormalizer()
+    x = torch.randn(1000) * 5.0 + 20.0
+    vn.update(x)
+    z = vn.normalize(x)
+    assert abs(float(z.mean())) < 0.05 and abs(float(z.std()) - 1.0) < 0.05
+    torch.testing.assert_close(vn.denormalize(z), x)
+
+
+def test_mappo_update_and_checkpoint(tmp_path):
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    T, A = 16, 3
+    S = global_state_dim(A)
+    model = MAPPOActorCritic(17, 4, S, hidden=16)
+    buf = MAPPORolloutBuffer(17, 4, S, T, A)
+    for _ in range(T):
+        o = rng.normal(size=(A, 17)).astype(np.float32)
+        s = critic_inputs(o, np.ones(A, dtype=bool))
+        acts, logps, vals = model.act(o, s)
+        buf.add([0, 1, 2], o, acts, 10.0 + o[:, 0], vals, logps, np.zeros(A), np.zeros(A), state=s)
+    buf.compute_returns_advantages(0.0, 0.0)
+    batch = buf.as_tensors("cpu")
+    assert batch["cstate"].shape == (T * A, S)
+    model.value_norm.update(batch["rets"])
+    batch["rets"] = model.value_norm.normalize(batch["rets"])
+    opt = torch.optim.Adam(model.parameters(), lr=1e-2)
+    first = ppo_update(model, opt, batch, epochs=1, minibatch_size=16)
+    last = ppo_update(model, opt, batch, epochs=10, minibatch_size=16)
+    assert last["v_loss"] < first["v_loss"]
+
+    path = str(tmp_path / "mappo.pt")
+    save_checkpoint(path, model)
+    loaded = load_checkpoint(path)
+    assert isinstance(loaded, MAPPOActorCritic)
+    s = batch["cstate"][:4].numpy()
+    np.testing.assert_allclose(loaded.predict_values(s), model.predict_values(s), rtol=1e-6)
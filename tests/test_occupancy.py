@@ -0,0 +1,65 @@
+from __future__ import annotations
+import numpy as np
+from airsim_multi_rl.config import EnvConfig, OccupancyConfig
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+from airsim_multi_rl.envs.occupancy import OccupancyGrid
+
+
+class _Vec:
+    def __init__(self, x, y, z):
+        self.x_val, self.y_val, self.z_val = x, y, z
+
+
+class _Pose:
+    def __init__(self, x, y, z):
+        self.position = _Vec(x, y, z)
+
+
+class SceneClient(DummyClient):
+    """场景中 x=5 处有一堵 1m 厚、20m 宽的墙，记录障碍物导出查询次数。"""
+
+    def __init__(self, agent_names):
+        super().__init__(agent_names)
+        self.scene_calls = 0
+
+    def list_scene_objects(self, pattern):
+        return ["Wall_1"] if pattern.startswith("Wall") else []
+
+    def get_object_pose(self, name):
+        return _Pose(5.5, 0.0, -3.0)
+
+    def get_object_scale(self, name):
+        self.scene_calls += 1
+        return (1.0, 20.0, 10.0)
+
+
+def test_raycast_hits_first_occupied_voxel():
+    grid = OccupancyGrid.from_boxes(np.array([[5.5, 0.0, 0.0]]), np.array([[0.5, 0.5, 0.5]]), ((-10, 10), (-10, 10), (-10, 10)), 0.5)
+    dirs = np.array([[[1.0, 0.0, 0.0], [-1.0, 0.0, 0.0]]], dtype=np.float32)
+    r = grid.raycast(np.zeros((1, 3), dtype=np.float32), dirs, max_range=8.0)
+    np.testing.assert_allclose(r, [[5.0, 8.0]])
+
+
+def test_env_range_obs_uses_cached_grid(tmp_path):
+    occ = OccupancyConfig(enabled=True, n_rays=4, max_range=10.0, map_name="unit", cache_dir=str(tmp_path))
+    cfg = EnvConfig(agent_names=["Drone1"], spawn_points={"Drone1": (0.0, 0.0, -3.0)}, goal_points={"Drone1": (20.0, 0.0, -3.0)}, occupancy=occ)
+    client = SceneClient(cfg.agent_names)
+    env = AirSimMultiDroneParallelEnv(cfg, client=client)
+    # 测距块使用归一化上界 1
+    np.testing.assert_array_equal(env.observation_space("Drone1").high[env.obs_builder.layout()["range"]], [1.0] * 4)
+    obs, _ = env.reset()
+    rng = obs["Drone1"][env.obs_builder.layout()["range"]]
+    # 射线依次为 +x/+y/-x/-y（偏航 0）
+    np.testing.assert_allclose(rng, [0.5, 1.0, 1.0, 1.0])
+    assert client.scene_calls == 1
+    env.step({"Drone1": np.zeros(4, dtype=np.float32)})
+    env.reset()
+    assert client.scene_calls == 1
+
+    # 新环境从磁盘缓存加载栅格，不再导出场景
+    client2 = SceneClient(cfg.agent_names)
+    env2 = AirSimMultiDroneParallelEnv(cfg, client=client2)
+    obs2, _ = env2.reset()
+    assert client2.scene_calls == 0
+    np.testing.assert_allclose(obs2["Drone1"], obs["Drone1"])
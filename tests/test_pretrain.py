@@ -0,0 +1,101 @@
+from __future__ import annotations
+import numpy as np
+import torch
+
+from airsim_marl.data.trajectory import TrajectoryDataset, TrajectoryWriter
+from airsim_marl.train.mappo import MAPPOActorCritic, global_state_dim
+from airsim_marl.train.ppo import ActorCritic, init_from_checkpoint, save_checkpoint
+from airsim_marl.train.pretrain import GoalSeekingController, ShuffledBatchStream, pretrain_bc, record_demos
+
+
+class _PointMassEnv:
+    """17 维观测的质点环境：按速度动作积分，到达目标即终止。"""
+    possible_agents = ["d0", "d1"]
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+
+    def _obs(self, a):
+        o = np.zeros(17, np.float32)
+        o[0:3] = self.pos[a]
+        o[7:10] = self.goal[a] - self.pos[a]
+        o[10:13] = self.jammer - self.pos[a]
+        return o
+
+    def reset(self, seed=None, options=None):
+        self.t = 0
+        self.agents = list(self.possible_agents)
+        self.pos = {a: self.rng.uniform(-5, 5, 3).astype(np.float32) for a in self.agents}
+        self.goal = {a: self.rng.uniform(-5, 5, 3).astype(np.float32) for a in self.agents}
+        self.jammer = np.array([50.0, 50.0, 50.0], np.float32)
+        return {a: self._obs(a) for a in self.agents}, {a: {} for a in self.agents}
+
+    def step(self, actions):
+        self.t += 1
+        out = [{}, {}, {}, {}, {}]
+        for a, act in actions.items():
+            self.pos[a] = self.pos[a] + 0.2 * np.asarray(act[:3], np.float32)
+            dist = float(np.linalg.norm(self.goal[a] - self.pos[a]))
+            for d, v in zip(out, (self._obs(a), -dist, dist < 0.5, self.t >= 20, {"dist": dist})):
+                d[a] = v
+        self.agents = [a for a in self.agents if not (out[2][a] or out[3][a])]
+        return tuple(out)
+
+    def close(self):
+        pass
+
+
+def test_controller_avoids_close_jammer():
+    ctrl = GoalSeekingController(v_max=4.0, jammer_radius=6.0)
+    obs = np.zeros((2, 17), np.float32)
+    obs[:, 7:10] = [6.0, 0.0, 0.0]
+    obs[1, 10:13] = [2.0, 0.0, 0.0]
+    act = ctrl.act(obs)
+    assert act.shape == (2, 4)
+    np.testing.assert_allclose(act[0, :3], [3.0, 0.0, 0.0], rtol=1e-5)
+    # 干扰源挡在正前方时减速
+    assert act[1, 0] < act[0, 0]
+
+
+def test_shuffled_stream_covers_every_row_once_per_epoch(tmp_path):
+    stats = record_demos(_PointMassEnv(), GoalSeekingController(4.0, 6.0),
+                         TrajectoryWriter(str(tmp_path), _PointMassEnv.possible_agents, chunk_steps=4), episodes=5)
+    ds = TrajectoryDataset(str(tmp_path))
+    assert stats["rows"] == len(ds) and ds.num_chunks > 5
+    stream = ShuffledBatchStream(ds, batch_size=16, shuffle_rows=32, epochs=2, num_workers=2,
+                                 prefetch_chunks=2, prefetch_batches=2, seed=0)
+    batches = list(stream)
+    assert all(b["obs"].dtype == torch.float32 and b["obs"].shape[1:] == (17,) for b in batches)
+    seen = torch.cat([b["obs"] for b in batches])
+    assert seen.shape[0] == 2 * len(ds)
+    # 顺序被打乱，但每个 epoch 恰好覆盖所有行
+    ref = np.sort(np.asarray(ds[np.arange(len(ds))]["obs"])[:, :10], axis=0)
+    np.testing.assert_allclose(np.sort(seen[:, :10].numpy(), axis=0), np.repeat(ref, 2, axis=0))
+    assert stream.stats()["chunks"] == 2 * ds.num_chunks
+    # 提前退出时后台线程正常结束
+    for _ in ShuffledBatchStream(ds, batch_size=4, shuffle_rows=8):
+        break
+
+
+def test_behavior_cloning_imitates_demos_and_warm_starts_mappo(tmp_path):
+    torch.manual_seed(0)
+    ctrl = GoalSeekingController(4.0, 6.0)
+    record_demos(_PointMassEnv(), ctrl, TrajectoryWriter(str(tmp_path / "demos"), _PointMassEnv.possible_agents), 20)
+    ds = TrajectoryDataset(str(tmp_path / "demos"))
+    model = ActorCritic(17, 4, hidden=32)
+    v_before = [p.clone() for p in model.v.parameters()]
+    stats = pretrain_bc(model, ShuffledBatchStream(ds, 64, 256, epochs=30, seed=0), lr=3e-3, min_std=0.1)
+    assert stats["steps"] > 0
+    obs = np.asarray(ds[np.arange(len(ds))]["obs"])
+    pred, _, _ = model.act(obs, deterministic=True)
+    assert np.abs(pred - ctrl.act(obs)).mean() < 0.3
+    assert float(model.log_std.detach().min()) >= np.log(0.1) - 1e-6
+    # 只训练 actor
+    assert all(torch.equal(a, b) for a, b in zip(v_before, model.v.parameters()))
+
+    path = str(tmp_path / "bc.pt")
+    save_checkpoint(path, model)
+    mappo = MAPPOActorCritic(17, 4, global_state_dim(2), hidden=32)
+    loaded = init_from_checkpoint(mappo, path)
+    assert "log_std" in loaded and "v.0.weight" not in loaded
+    torch.testing.assert_close(mappo.pi[0].weight, model.pi[0].weight)
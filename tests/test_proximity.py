@@ -0,0 +1,44 @@
+from __future__ import annotations
+import numpy as np
+from airsim_multi_rl.config import EnvConfig, ProximityConfig
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+from airsim_multi_rl.envs.proximity import nearest_by_hash, pairwise_distances
+
+
+class PollCountingClient(DummyClient):
+    def __init__(self, agent_names):
+        super().__init__(agent_names)
+        self.polled = []
+
+    def get_collisions(self, vehicle_names):
+        names = list(vehicle_names)
+        self.polled.append(names)
+        return super().get_collisions(names)
+
+
+def test_spatial_hash_matches_distance_matrix():
+    rng = np.random.default_rng(0)
+    pos = rng.uniform(-20, 20, size=(200, 3)).astype(np.float32)
+    radius = 3.0
+    exact = pairwise_distances(pos).min(axis=1)
+    exact[exact > radius] = np.inf
+    np.testing.assert_allclose(nearest_by_hash(pos, radius), exact, rtol=1e-5)
+
+
+def test_collision_rpc_only_for_close_drones():
+    spawns = {"Drone1": (0.0, 0.0, -10.0), "Drone2": (1.0, 0.0, -10.0), "Drone3": (30.0, 30.0, -10.0)}
+    cfg = EnvConfig(
+        spawn_points=spawns,
+        proximity=ProximityConfig(enabled=True, poll_all_every=0, terminate_on_near_miss=True),
+    )
+    client = PollCountingClient(cfg.agent_names)
+    env = AirSimMultiDroneParallelEnv(cfg, client=client)
+    env.reset()
+    _, rews, terms, _, infos = env.step({a: np.zeros(4, dtype=np.float32) for a in env.agents})
+    assert client.polled == [["Drone1", "Drone2"]]
+    assert infos["Drone1"]["near_miss"] and not infos["Drone3"]["near_miss"]
+    assert not infos["Drone3"]["collision_polled"]
+    assert terms["Drone1"] and terms["Drone2"] and not terms["Drone3"]
+    assert rews["Drone1"] < rews["Drone3"]
+    assert env.agents == ["Drone3"]
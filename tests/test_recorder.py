@@ -0,0 +1,81 @@
+from __future__ import annotations
+import glob
+import os
+import threading
+import numpy as np
+from airsim_multi_rl.config import CameraConfig, EnvConfig, RecorderConfig
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+from airsim_multi_rl.runners.recorder import FrameRecorder, RecordedEnv
+
+
+class _CountingClient(DummyClient):
+    """计数抓帧调用；用条件变量等待调用次数代替 sleep。第 n 次调用开始时执行 hooks[n]。"""
+    thread_safe = True
+
+    def __init__(self, agents, hooks=None):
+        super().__init__(agents)
+        self.calls = 0
+        self.hooks = dict(hooks or {})
+        self._cond = threading.Condition()
+
+    def get_images_batch(self, vehicle_names, specs):
+        with self._cond:
+            self.calls += 1
+            hook = self.hooks.get(self.calls)
+            self._cond.notify_all()
+        if hook is not None:
+            hook()
+        return super().get_images_batch(vehicle_names, specs)
+
+    def wait_calls(self, n, timeout=5.0):
+        with self._cond:
+            return self._cond.wait_for(lambda: self.calls >= n, timeout)
+
+
+def _frames(path):
+    return sum(len(np.load(p)["timestamps"]) for p in glob.glob(os.path.join(path, "*.npz")))
+
+
+def test_recorder_writes_chunks_per_episode(tmp_path):
+    agents = ["Drone1", "Drone2"]
+    camera = CameraConfig(width=256, height=144, downscale=4)
+    cfg = RecorderConfig(out_dir=str(tmp_path), rate_hz=1000.0, chunk_frames=4)
+    holder = {}
+    # 第 5 帧开始前切换回合：前 4 帧属于回合 0，之后的帧属于回合 1
+    client = _CountingClient(agents, {5: lambda: holder["rec"].new_episode()})
+    rec = holder["rec"] = FrameRecorder(client, agents, camera, cfg)
+    rec.stop()  # 未启动时为空操作
+    rec.start()
+    # 第 9 次调用开始时前 8 帧都已入队
+    assert client.wait_calls(9)
+    rec.stop()
+    rec.stop()  # 重复调用为空操作
+    stats = rec.stats()
+    assert stats["captured"] >= 8 and stats["errors"] == 0
+    assert stats["chunks_written"] >= 2 and stats["pending_chunks"] == 0
+    assert sorted(os.listdir(tmp_path)) == ["episode_00000", "episode_00001"]
+    chunk = np.load(str(tmp_path / "episode_00000" / "chunk_00000.npz"))
+    assert chunk["color"].shape == (4, 2, 1, 36, 64, 3)
+    assert chunk["valid"].all()
+    assert _frames(str(tmp_path / "episode_00000")) == 4
+    assert _frames(str(tmp_path / "episode_00001")) >= 4
+
+
+def test_recorded_env_switches_episodes_on_reset(tmp_path):
+    agents = ["Drone1", "Drone2"]
+    cfg = EnvConfig(agent_names=agents, recorder=RecorderConfig(out_dir=str(tmp_path), rate_hz=1000.0))
+    env = AirSimMultiDroneParallelEnv(cfg, client=DummyClient(agents))
+    rec_client = _CountingClient(agents)
+    wrapped = RecordedEnv(env, client=rec_client)
+    # 录制器使用专用客户端，环境连接不参与抓图
+    assert wrapped.recorder.client is rec_client and wrapped.agents == env.agents
+    for _ in range(2):
+        wrapped.reset()
+        # reset 之后开始的抓帧属于新回合；再下一次调用开始时该帧已入队
+        assert rec_client.wait_calls(rec_client.calls + 2)
+    wrapped.close()
+    assert not wrapped.recorder.running
+    assert sorted(os.listdir(tmp_path)) == ["episode_00000", "episode_00001"]
+    # stop 之后可再次启动
+    wrapped.recorder.start().stop()
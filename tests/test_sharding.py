@@ -0,0 +1,75 @@
+from __future__ import annotations
+import numpy as np
+import pytest
+from airsim_multi_rl.config import EnvConfig, ShardEndpoint, ShardingConfig
+from airsim_multi_rl.envs.airsim_client import ShardedAirSimClient, make_client
+from airsim_multi_rl.envs.dummy_client import DummyClient
+from airsim_multi_rl.envs.multi_drone_parallel import AirSimMultiDroneParallelEnv
+
+ENDPOINTS = [("10.0.0.1", 41451, ["Drone1", "Drone2"]), ("10.0.0.2", 41451, ["Drone3"])]
+
+
+class _Vec:
+    def __init__(self, x, y, z):
+        self.x_val, self.y_val, self.z_val = x, y, z
+
+
+class _Pose:
+    def __init__(self, x, y, z):
+        self.position = _Vec(x, y, z)
+
+
+class ServerClient(DummyClient):
+    """模拟一个 AirSim 服务端：只承载自己的载具，场景中 Jammer 位置按服务端给定。"""
+
+    def __init__(self, agent_names, jammer_x=5.0):
+        super().__init__(agent_names)
+        self.jammer_x = jammer_x
+        self.ping = lambda: True
+        self.client = self
+
+    def list_scene_objects(self, pattern):
+        return ["Jammer1"] if pattern.startswith("Jammer") else []
+
+    def get_object_pose(self, name):
+        return _Pose(self.jammer_x, 0.0, -5.0)
+
+
+def _connect(servers, jammer_x=None):
+    def connect(ip, port):
+        agents = next(a for i, p, a in ENDPOINTS if (i, p) == (ip, port))
+        servers[ip] = ServerClient(agents, jammer_x if (jammer_x is not None and ip != "10.0.0.1") else 5.0)
+        return servers[ip]
+    return connect
+
+
+def test_sharded_env_routes_vehicles_to_their_server():
+    servers = {}
+    client = ShardedAirSimClient(ENDPOINTS, connect=_connect(servers))
+    assert client.endpoint_of("Drone3") == ("10.0.0.2", 41451)
+    env = AirSimMultiDroneParallelEnv(EnvConfig(), client=client)
+    obs, _ = env.reset()
+    env.step({a: np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32) for a in env.agents})
+    assert set(servers["10.0.0.1"].pos) == {"Drone1", "Drone2"}
+    assert servers["10.0.0.2"].pos["Drone3"][0] > 10.0
+    # 各分片载具使用同一份（主分片）Jammer 坐标
+    np.testing.assert_allclose(env.jammers.positions["Jammer1"], [5.0, 0.0, -5.0])
+    assert client.check_jammers(EnvConfig().jammer_patterns) == []
+    client.close()
+
+
+def test_check_jammers_reports_mismatch():
+    client = ShardedAirSimClient(ENDPOINTS, connect=_connect({}, jammer_x=9.0))
+    issues = client.check_jammers(["Jammer.*"], tolerance=0.5)
+    client.close()
+    assert len(issues) == 1 and "10.0.0.2" in issues[0]
+
+
+def test_uncovered_vehicle_is_rejected_before_connecting():
+    with pytest.raises(ValueError, match="Drone4"):
+        ShardedAirSimClient(ENDPOINTS, connect=_connect({}), vehicle_names=["Drone1", "Drone4"])
+    # make_client 按 agent_names 核对，不会先去连接服务端
+    cfg = EnvConfig(agent_names=["Drone1", "Drone2", "Drone3"], sharding=ShardingConfig(
+        enabled=True, endpoints=[ShardEndpoint(ip, port, agents) for ip, port, agents in ENDPOINTS[:1]]))
+    with pytest.raises(ValueError, match="Drone3"):
+        make_client(cfg)
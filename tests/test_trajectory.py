@@ -0,0 +1,71 @@
+from __future__ import annotations
+import numpy as np
+
+from airsim_marl.data.trajectory import RecordingEnv, TrajectoryDataset, TrajectoryWriter
+
+
+class _ParallelToyEnv:
+    """最小 PettingZoo 并行环境：agent b 在第 2 步先结束，第 4 步全部截断。"""
+    possible_agents = ["a", "b"]
+
+    def reset(self, seed=None, options=None):
+        self.t = 0
+        self.agents = list(self.possible_agents)
+        return {a: np.full(3, 0.0, np.float32) for a in self.agents}, {a: {} for a in self.agents}
+
+    def step(self, actions):
+        self.t += 1
+        obs = {a: np.full(3, self.t, np.float32) for a in self.agents}
+        rews = {a: float(self.t) for a in self.agents}
+        terms = {a: (a == "b" and self.t == 2) for a in self.agents}
+        truncs = {a: self.t == 4 for a in self.agents}
+        infos = {a: ({"dist": 10.0 - self.t} if a == "a" else {}) for a in self.agents}
+        self.agents = [a for a in self.agents if not (terms[a] or truncs[a])]
+        return obs, rews, terms, truncs, infos
+
+    def close(self):
+        pass
+
+
+def _run(env, episodes):
+    for _ in range(episodes):
+        env.reset()
+        while env.agents:
+            env.step({a: np.ones(2, np.float32) for a in env.agents})
+
+
+def test_writer_and_mmap_reader_roundtrip(tmp_path):
+    writer = TrajectoryWriter(str(tmp_path), ["a", "b"], chunk_steps=3, max_queue=1)
+    env = RecordingEnv(_ParallelToyEnv(), writer)
+    _run(env, 2)
+    env.close()
+    assert writer.stats()["errors"] == 0
+
+    ds = TrajectoryDataset(str(tmp_path))
+    # 每回合 4 步 + 2 步（b 提前结束）= 6 行；chunk_steps=3 时每回合两个分块
+    assert len(ds) == 12 and ds.num_chunks == 4
+    assert ds.episodes() == {0: [0, 1], 1: [2, 3]}
+    ch = ds.chunk(0)
+    assert isinstance(ch["obs"], np.memmap)
+    np.testing.assert_array_equal(ch["agent"], [0, 1, 0, 1, 0])
+    np.testing.assert_array_equal(ch["terminated"], [False, False, False, True, False])
+    # 每个动作对应执行它时的观测
+    np.testing.assert_array_equal(ch["obs"][:, 0], [0, 0, 1, 1, 2])
+    # b 未上报 info 的行为 NaN
+    assert np.isnan(ch["info_dist"][1]) and ch["info_dist"][0] == 9.0
+
+    rows = ds[np.array([11, 0, 6])]
+    np.testing.assert_array_equal(rows["t"], [3, 0, 0])
+    np.testing.assert_array_equal(rows["reward"], [4.0, 1.0, 1.0])
+    assert bool(ds[5]["truncated"])
+    streamed = sum(len(c["reward"]) for c in ds.iter_chunks(["reward"], order=[2, 1]))
+    assert streamed == 6
+
+
+def test_writer_appends_to_existing_dataset(tmp_path):
+    for _ in range(2):
+        env = RecordingEnv(_ParallelToyEnv(), TrajectoryWriter(str(tmp_path), ["a", "b"]))
+        _run(env, 1)
+        env.close()
+    ds = TrajectoryDataset(str(tmp_path))
+    assert sorted(ds.episodes()) == [0, 1] and len(ds) == 12